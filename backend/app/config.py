@@ -6,10 +6,117 @@ class Settings(BaseSettings):
     aws_region: str = "ap-south-1"
     aws_access_key_id: str = ""
     aws_secret_access_key: str = ""
+    aws_endpoint_url: str = ""  # override for local fakes / LocalStack
+
+    # AWS client I/O: executor threads, connection pool, timeouts, retries
+    aws_max_workers: int = 32
+    aws_max_pool_connections: int = 32
+    aws_connect_timeout_s: float = 2.0
+    aws_read_timeout_s: float = 30.0
+    aws_max_attempts: int = 3
 
     # Bedrock
     bedrock_model_id: str = "anthropic.claude-3-haiku-20240307-v1:0"
     bedrock_embed_model_id: str = "amazon.titan-embed-text-v2:0"
+    # USD per 1K [input, output] tokens, for the cost estimates in /api/admin/usage
+    bedrock_pricing: dict[str, list[float]] = {
+        "anthropic.claude-3-haiku-20240307-v1:0": [0.00025, 0.00125],
+        "anthropic.claude-3-5-sonnet-20240620-v1:0": [0.003, 0.015],
+        "amazon.titan-embed-text-v2:0": [0.00002, 0.0],
+    }
+
+    # Per-model circuit breaker: open after `threshold` outage errors making up at least
+    # `rate` of the calls in the last `window_s`; probe again after `reset_timeout_s`
+    circuit_breaker_enabled: bool = True
+    circuit_failure_threshold: int = 5
+    circuit_failure_rate: float = 0.5
+    circuit_window_s: float = 30.0
+    circuit_reset_timeout_s: float = 30.0
+    circuit_half_open_probes: int = 1
+
+    # Per-model adaptive (AIMD) concurrency limit for Bedrock calls, the wait queue behind
+    # it, and jittered exponential backoff for throttled calls
+    bedrock_limiter_enabled: bool = True
+    bedrock_limit_initial: int = 8
+    bedrock_limit_min: int = 1
+    bedrock_limit_max: int = 64
+    bedrock_queue_size: int = 256
+    bedrock_throttle_retries: int = 3
+    bedrock_backoff_base_s: float = 0.25
+    bedrock_backoff_max_s: float = 4.0
+
+    # MatchMaker ANN shortlist (used once the catalog reaches min_platforms)
+    match_ann_enabled: bool = False
+    match_ann_min_platforms: int = 2000
+    match_ann_lists: int = 0  # 0 = sqrt(#platforms)
+    match_ann_probe: int = 8
+    match_ann_candidates: int = 1024
+
+    # MatchMaker explanations: "sequential", "concurrent" or "batched"
+    match_explanation_mode: str = "concurrent"
+    match_explanation_concurrency: int = 3
+
+    # CatalogAI: prompt only the K most plausible categories, unless retrieval is unsure. Off by
+    # default: on the held-out set (scripts/eval_taxonomy_retrieval.py) no K/min_score/coverage
+    # keeps the gold category for >95% of texts while pruning most prompts (K=30, min_score 3,
+    # no coverage gate: 87% kept, 10% fallback; min_score 8: 99% kept, 76% fallback, 11% saved)
+    taxonomy_retrieval_enabled: bool = False
+    taxonomy_retrieval_k: int = 12
+    taxonomy_retrieval_min_score: float = 3.0
+    taxonomy_retrieval_min_coverage: float = 0.5
+
+    # CatalogAI: answer locally when the fast-path classifier is in the GREEN band. Off by
+    # default: on the held-out set (scripts/bench_fast_path.py) its top-1 accuracy is 33%, and
+    # no similarity gate keeps a useful share of answers accurate (0.3: 6% local, 7/8 right)
+    fast_path_enabled: bool = False
+    # ...and only when the text's best cosine similarity to a category reaches this (novel texts escalate)
+    fast_path_min_similarity: float = 0.4
+    # /api/catalog/classify/batch: items in flight through Bedrock at once
+    classify_batch_concurrency: int = 8
+
+    # Admission control per route class ("llm": may call Bedrock/AWS AI, "bulk": batch and
+    # streaming LLM routes, "cheap": the rest): requests in flight, and latency target
+    # (EWMA, s) above which that cap shrinks; 0 = none
+    admission_enabled: bool = True
+    admission_max_in_flight: dict[str, int] = {"llm": 64, "bulk": 16, "cheap": 512}
+    admission_latency_target_s: dict[str, float] = {"llm": 8.0, "cheap": 1.0}
+
+    # Bulk ingestion jobs (/api/jobs): rows in flight, largest accepted catalog
+    jobs_enabled: bool = True
+    jobs_workers: int = 8
+    jobs_max_rows: int = 100000
+
+    # Add the old fixed demo-cache delays (+120/+85/+50 ms) to processing_time_ms
+    simulated_latency_enabled: bool = False
+
+    # Caches
+    embedding_cache_size: int = 4096
+    embedding_cache_ttl_s: float = 86400
+    llm_cache_enabled: bool = True
+    llm_cache_disk_enabled: bool = True
+    llm_cache_max_entries: int = 2048
+    llm_cache_disk_max_entries: int = 50000
+    llm_cache_ttl_s: float = 86400
+    # Per call site ("feature") TTLs in seconds; 0 disables caching for that feature
+    llm_cache_ttls: dict[str, float] = {
+        "classification": 30 * 86400,
+        "match_explanation": 7 * 86400,
+        "pricing_insight": 86400,
+        "geo_insight": 7 * 86400,
+    }
+
+    # Local state (disk caches) lives here
+    local_state_dir: str = ".vyaparsetu"
+
+    # Record store persistence: "sqlite" (local_state_dir/store.sqlite3) or "memory"; records
+    # are written in batches off the request path, and not persisted while the queue is full
+    storage_backend: str = "sqlite"
+    storage_batch_size: int = 200
+    storage_flush_interval_s: float = 0.5
+    storage_queue_size: int = 10000
+    storage_restore_limit: int = 1000
+    # Records kept in memory per store (newest first out); older ones stay in the durable store
+    store_capacity: int = 100000
 
     # Supabase
     supabase_url: str = ""
@@ -1,7 +1,18 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import catalog, match, intelligence, admin
-import json, os
+from fastapi.responses import PlainTextResponse
+from app.config import get_settings
+from app.models.database import audit_log, classifications_store, matches_store, overrides_store, restore, writer
+from app.routers import catalog, match, intelligence, admin, jobs, onboard
+from app.services.admission import AdmissionMiddleware, gates
+from app.services.catalog_ai import train_fast_path
+from app.services.circuit_breaker import breakers
+from app.services.jobs import job_runner
+from app.services.llm_cache import bypass_llm_cache
+from app.services.metrics import metrics
+from app.services.tracing import trace_scope
+from app.services.usage import usage_scope
+import asyncio, json, os, time
 
 app = FastAPI(title="VyaparSetu AI", version="0.1.0")
 
@@ -11,8 +22,64 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-Bedrock-Tokens", "X-Bedrock-Cost-USD"],
 )
 
+@app.middleware("http")
+async def llm_cache_control(request: Request, call_next):
+    # `Cache-Control: no-cache` forces fresh LLM answers for this request
+    if "no-cache" in request.headers.get("cache-control", "").lower():
+        bypass_llm_cache.set(True)
+    return await call_next(request)
+
+@app.middleware("http")
+async def bedrock_usage(request: Request, call_next):
+    # Tokens and estimated cost of the Bedrock calls made for this request (see app.services.usage)
+    with usage_scope() as usage:
+        response = await call_next(request)
+    if usage.calls:
+        response.headers["X-Bedrock-Tokens"] = f"input={usage.input_tokens}, output={usage.output_tokens}, calls={usage.calls}"
+        response.headers["X-Bedrock-Cost-USD"] = f"{usage.cost_usd:.6f}"
+    return response
+
+def _route_template(request: Request) -> str:
+    """Matched route as a template ("/api/jobs/{job_id}"), to keep label cardinality bounded."""
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched"
+    template = getattr(route, "path_format", route.path)
+    # Routes of an included router may carry only their own part of the path
+    matched = template.format(**request.path_params)
+    path = request.url.path
+    if path.endswith(matched) and len(path) > len(matched):
+        template = path[: len(path) - len(matched)] + template
+    return template
+
+@app.middleware("http")
+async def observe_request(request: Request, call_next):
+    # Collects the spans of every pipeline this request runs (see app.services.tracing)
+    # into the Server-Timing header, and records request/stage metrics for /metrics
+    start = time.perf_counter()
+    metrics.inc("http_requests_started_total")
+    status = 500
+    try:
+        with trace_scope() as trace:
+            response = await call_next(request)
+        status = response.status_code
+        response.headers["Server-Timing"] = trace.server_timing(total_ms=(time.perf_counter() - start) * 1000)
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        route = _route_template(request)
+        metrics.inc("http_requests_finished_total")
+        metrics.inc("http_requests_total", (route, request.method, str(status)))
+        metrics.observe("http_request_duration_seconds", elapsed, (route, request.method))
+        for stage, ms in trace.durations.items():
+            metrics.observe("stage_duration_seconds", ms / 1000, (stage,))
+
+# Registered last, so it runs first: a shed request costs almost nothing (see app.services.admission)
+app.add_middleware(AdmissionMiddleware)
+
 # In-memory demo cache
 demo_cache = {}
 
@@ -30,11 +97,61 @@ async def load_demo_cache():
     except Exception as e:
         print(f"Warning: Could not load demo cache: {e}")
 
+@app.on_event("startup")
+async def restore_store():
+    # Dashboard totals and the newest records, from the durable store (see app.models.storage)
+    try:
+        restore(limit=get_settings().storage_restore_limit)
+    except Exception as e:
+        print(f"Warning: Could not restore store: {e}")
+
+@app.on_event("startup")
+async def warm_fast_path():
+    # Train the local classifier (with restored corrections) before the first request, off the loop
+    if get_settings().fast_path_enabled:
+        await asyncio.get_running_loop().run_in_executor(None, train_fast_path)
+
+@app.on_event("startup")
+async def start_job_runner():
+    # Also resumes jobs a previous process left unfinished
+    if get_settings().jobs_enabled:
+        job_runner.start()
+
+@app.on_event("shutdown")
+async def stop_job_runner():
+    await job_runner.stop()
+    if writer is not None:
+        writer.flush()
+
+def _store_metrics():
+    yield "store_records", ("classifications",), len(classifications_store)
+    yield "store_records", ("matches",), len(matches_store)
+    yield "store_records", ("overrides",), len(overrides_store)
+    yield "store_records", ("audit_log",), len(audit_log)
+
+metrics.register_collector(_store_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "service": "VyaparSetu AI"}
+    circuits = {name: breaker.stats() for name, breaker in breakers.items()}
+    # The service itself stays healthy (liveness); "degraded" upstream means some model
+    # is failing fast and answers come from fallbacks
+    upstream = "degraded" if any(c["state"] != "closed" for c in circuits.values()) else "ok"
+    return {
+        "status": "healthy",
+        "service": "VyaparSetu AI",
+        "upstream": upstream,
+        "circuit_breakers": circuits,
+        "admission": {name: gate.stats() for name, gate in gates.items()},
+    }
 
 app.include_router(catalog.router, prefix="/api/catalog", tags=["catalog"])
 app.include_router(match.router, prefix="/api/match", tags=["match"])
 app.include_router(intelligence.router, prefix="/api/intelligence", tags=["intelligence"])
 app.include_router(admin.router, prefix="/api/admin", tags=["admin"])
+app.include_router(onboard.router, prefix="/api/onboard", tags=["onboard"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
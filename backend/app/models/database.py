@@ -1,69 +1,282 @@
-"""Simple in-memory store for demo purposes."""
+"""In-memory record stores, persisted through a write-behind queue (see app.models.storage).
+
+Reads that reach the durable store run on its own reader thread (`_read`),
+never on the event loop, and include records still waiting to be written.
+"""
+import asyncio
+import functools
+import heapq
+import time
 import uuid
-from datetime import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import get_settings
+from app.models.records import ClassificationRecord, MatchRecord, OverrideRecord, RingStore, _to_epoch, _to_iso
+from app.models.rollups import rollups
+from app.models.storage import WriteBehind, make_backend
+from app.services.utils import text_fingerprint
+
+_settings = get_settings()
+
+# In-memory stores: the newest STORE_CAPACITY records each, indexed by id
+classifications_store = RingStore(ClassificationRecord, _settings.store_capacity)
+matches_store = RingStore(MatchRecord, _settings.store_capacity)
+overrides_store = RingStore(OverrideRecord, _settings.store_capacity)
+audit_log = RingStore(OverrideRecord, _settings.store_capacity)
+
+# Running dashboard aggregates, updated as records are added so the dashboard
+# costs the same however large the stores grow
+RECENT_LIMIT = 10
+recent_classifications: deque[ClassificationRecord] = deque(maxlen=RECENT_LIMIT)
+_totals = {"count": 0, "confidence": 0.0, "processing_time_ms": 0.0, "overrides": 0}
+_bands = {"GREEN": 0, "YELLOW": 0, "RED": 0}
+
+# Admin category corrections: product text fingerprint -> (text, category as entered).
+# catalog_ai checks these before the demo cache, the fast path or Bedrock.
+category_corrections: dict[str, tuple[str, str]] = {}
+_corrections_version = 0
+
+def _set_correction(text: str, category: str) -> None:
+    global _corrections_version
+    category_corrections[text_fingerprint(text)] = (text, category)
+    _corrections_version += 1
+
+def _remove_correction(text: str) -> str | None:
+    """Drop the correction for this text; the category it set, if there was one."""
+    global _corrections_version
+    removed = category_corrections.pop(text_fingerprint(text), None)
+    if removed is None:
+        return None
+    _corrections_version += 1
+    return removed[1]
 
-# In-memory stores
-classifications_store: list[dict] = []
-matches_store: list[dict] = []
-overrides_store: list[dict] = []
-audit_log: list[dict] = []
+def corrections_version() -> int:
+    """Changes whenever a category correction is added or replaced."""
+    return _corrections_version
+
+store = make_backend(_settings)
+writer = WriteBehind(
+    store,
+    batch_size=_settings.storage_batch_size,
+    flush_interval_s=_settings.storage_flush_interval_s,
+    max_queue=_settings.storage_queue_size,
+) if store else None
+_reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store-reader")
+
+async def _read(fn, *args, **kwargs):
+    return await asyncio.get_running_loop().run_in_executor(_reader, functools.partial(fn, *args, **kwargs))
+
+def _stored(table: str, record_id: str) -> dict | None:
+    """A record from the durable store, or still in the write-behind queue (blocking)."""
+    pending = writer.pending(table, record_id)
+    return pending[0] if pending else store.get(table, record_id)
+
+def _persist(table: str, record) -> None:
+    if writer is not None:
+        writer.submit(table, record.to_dict())
 
 def add_classification(data: dict) -> str:
     record_id = str(uuid.uuid4())[:8]
-    record = {
+    record = classifications_store.append({
         "id": record_id,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": time.time(),
         **data
-    }
-    classifications_store.append(record)
+    })
+    _persist("classifications", record)
+    band = record.band or "RED"
+    _bands[band] = _bands.get(band, 0) + 1
+    _totals["count"] += 1
+    _totals["confidence"] += record.confidence or 0
+    _totals["processing_time_ms"] += record.processing_time_ms or 0
+    recent_classifications.append(record)
+    rollups.record_classification(
+        band, record.source or "demo", record.confidence or 0, record.processing_time_ms or 0,
+    )
     return record_id
 
 def add_match(data: dict) -> str:
     record_id = str(uuid.uuid4())[:8]
-    record = {
+    record = matches_store.append({
         "id": record_id,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": time.time(),
         **data
-    }
-    matches_store.append(record)
+    })
+    _persist("matches", record)
+    rollups.record_match(record.processing_time_ms or 0)
     return record_id
 
-def add_override(data: dict) -> str:
+async def add_override(data: dict) -> str:
+    """Record an override in the audit log and apply it to the record it names.
+
+    "category" updates the classification and the correction table;
+    "platform" updates a match's top platform. The audit record notes
+    whether the override could be applied (`applied`).
+    """
     audit_id = str(uuid.uuid4())[:8]
-    record = {
+    updated = await _apply_override(data.get("record_id"), data.get("field"), data.get("new_value"))
+    record = overrides_store.append({
         "audit_id": audit_id,
-        "timestamp": datetime.utcnow().isoformat(),
-        **data
-    }
-    overrides_store.append(record)
+        "timestamp": time.time(),
+        **data,
+        "applied": updated is not None,
+    })
     audit_log.append(record)
+    _persist("overrides", record)
+    _persist("audit_log", record)
+    _totals["overrides"] += 1
+    if updated is not None and record.field == "category" and updated.get("text"):
+        _set_correction(updated["text"], record.new_value)
     return audit_id
 
-def get_dashboard_data() -> dict:
-    total = len(classifications_store)
-    if total == 0:
-        return {
-            "total_onboarded": 0,
-            "avg_confidence": 0,
-            "avg_processing_time_ms": 0,
-            "band_distribution": {"GREEN": 0, "YELLOW": 0, "RED": 0},
-            "recent_classifications": []
-        }
-
-    bands = {"GREEN": 0, "YELLOW": 0, "RED": 0}
-    total_confidence = 0
-    total_time = 0
-
-    for c in classifications_store:
-        band = c.get("band", "RED")
-        bands[band] = bands.get(band, 0) + 1
-        total_confidence += c.get("confidence", 0)
-        total_time += c.get("processing_time_ms", 0)
+async def remove_correction(record_id: str, reason: str, admin_id: str = "admin") -> str | None:
+    """Withdraw the category correction for this classification's text (audited as a
+    "correction" override); the audit id, or None if the text had no correction."""
+    record = await get_classification(record_id)
+    if not record or not record.get("text"):
+        return None
+    removed = _remove_correction(record["text"])
+    if removed is None:
+        return None
+    audit_id = str(uuid.uuid4())[:8]
+    override = overrides_store.append({
+        "audit_id": audit_id,
+        "timestamp": time.time(),
+        "record_id": record_id,
+        "field": "correction",
+        "old_value": removed,
+        "new_value": None,
+        "reason": reason,
+        "admin_id": admin_id,
+        "applied": True,
+    })
+    audit_log.append(override)
+    _persist("overrides", override)
+    _persist("audit_log", override)
+    _totals["overrides"] += 1
+    return audit_id
+
+# Overridable field -> (table, store, record field)
+_OVERRIDES = {
+    "category": ("classifications", classifications_store, "category"),
+    "platform": ("matches", matches_store, "top_platform"),
+}
 
+async def _apply_override(record_id: str, field: str, value) -> dict | None:
+    """Set the overridden field in memory and in the durable store; the updated record."""
+    if field not in _OVERRIDES or not record_id:
+        return None
+    table, records, name = _OVERRIDES[field]
+    record = records.get(record_id)
+    if record is not None:
+        record.set(name, value)
+        records.touch()
+        _persist(table, record)
+        return record.to_dict()
+    if store is None:
+        return None
+    # Evicted from memory (or written by another process): update the stored copy
+    data = await _read(_stored, table, record_id)
+    if data is None:
+        return None
+    data[name] = value
+    writer.submit(table, data)
+    return data
+
+def _get_classification(record_id: str) -> dict | None:
+    record = classifications_store.get(record_id)
+    if record is not None:
+        return record.to_dict()
+    return _stored("classifications", record_id) if store else None
+
+async def get_classification(record_id: str) -> dict | None:
+    record = classifications_store.get(record_id)
+    if record is not None:
+        return record.to_dict()
+    return await _read(_stored, "classifications", record_id) if store else None
+
+async def find_classifications(since: str | None = None, until: str | None = None,
+                               category: str | None = None, limit: int = 100) -> list[dict]:
+    """Newest first, by ISO timestamp range and exact category."""
+    if store is None:
+        found = []
+        for r in reversed(classifications_store):
+            timestamp = r["timestamp"]
+            if (not since or timestamp >= since) and (not until or timestamp < until) \
+                    and (not category or r.category == category):
+                found.append(r.to_dict())
+                if len(found) >= limit:
+                    break
+        return found
+    filters = {"category": category} if category else {}
+    found = await _read(store.query, "classifications", since=since, until=until, limit=limit, **filters)
+    # Records still waiting in the write-behind queue replace the stored copies
+    pending = {r["id"]: r for r in writer.pending("classifications")}
+    if pending:
+        found = [r for r in found if r["id"] not in pending] + [
+            r for r in pending.values()
+            if (not since or r["timestamp"] >= since) and (not until or r["timestamp"] < until)
+            and (not category or r.get("category") == category)
+        ]
+        found.sort(key=lambda r: r["timestamp"], reverse=True)
+    return found[:limit]
+
+def restore(limit: int = 1000) -> None:
+    """Load dashboard totals and the newest records from the durable store (startup)."""
+    if store is None or classifications_store:
+        return
+    for band, (n, confidence, ms) in store.band_totals().items():
+        _bands[band] = _bands.get(band, 0) + n
+        _totals["count"] += n
+        _totals["confidence"] += confidence
+        _totals["processing_time_ms"] += ms
+    _totals["overrides"] = store.count("overrides")
+    for table, records in (
+        ("classifications", classifications_store),
+        ("matches", matches_store),
+        ("overrides", overrides_store),
+        ("audit_log", audit_log),
+    ):
+        records.extend(reversed(store.query(table, limit=limit)))
+    recent_classifications.extend(classifications_store.tail(RECENT_LIMIT))
+    _restore_rollups()
+    # Replay category overrides and withdrawn corrections, oldest first, into the correction table
+    overrides = [
+        *store.query("overrides", limit=_settings.store_capacity, field="category"),
+        *store.query("overrides", limit=_settings.store_capacity, field="correction"),
+    ]
+    for override in sorted(overrides, key=lambda o: o["timestamp"]):
+        record = _get_classification(override.get("record_id", ""))
+        if not override.get("applied", True) or not record or not record.get("text"):
+            continue
+        if override["field"] == "correction":
+            _remove_correction(record["text"])
+        else:
+            _set_correction(record["text"], override["new_value"])
+
+def _restore_rollups() -> None:
+    """Replay stored classifications and matches, oldest first, into the (empty) rollup tiers."""
+    since = _to_iso(time.time() - rollups.retention_s())
+    events = heapq.merge(
+        (("classification", row) for row in store.timeline("classifications", since)),
+        (("match", row) for row in store.timeline("matches", since)),
+        key=lambda event: event[1][0],
+    )
+    for kind, row in events:
+        ts = _to_epoch(row[0])
+        if kind == "match":
+            rollups.record_match(row[1] or 0, ts=ts)
+        else:
+            _, band, source, confidence, ms = row
+            rollups.record_classification(band or "RED", source or "demo", confidence or 0, ms or 0, ts=ts)
+
+def get_dashboard_data() -> dict:
+    total = _totals["count"]
     return {
         "total_onboarded": total,
-        "avg_confidence": round(total_confidence / total, 3) if total > 0 else 0,
-        "avg_processing_time_ms": round(total_time / total, 1) if total > 0 else 0,
-        "band_distribution": bands,
-        "recent_classifications": classifications_store[-10:][::-1]
+        "avg_confidence": round(_totals["confidence"] / total, 3) if total > 0 else 0,
+        "avg_processing_time_ms": round(_totals["processing_time_ms"] / total, 1) if total > 0 else 0,
+        "band_distribution": dict(_bands),
+        "total_overrides": _totals["overrides"],
+        "recent_classifications": [r.to_dict() for r in reversed(recent_classifications)],
     }
@@ -0,0 +1,180 @@
+"""Compact records and bounded stores for `database.py`.
+
+Records are `__slots__` objects instead of dicts: the field names live once
+on the class, the timestamp is a float, and low-cardinality strings
+(category, band, platform, ...) are interned so a million records share a
+handful of copies. They read like the dicts they replace (`record["id"]`,
+`record.get("text")`) and `to_dict()` gives the JSON shape.
+
+`RingStore` keeps the newest `capacity` records in a ring buffer with a
+dict index by id: appends and lookups are O(1), and memory stays bounded
+(older records remain in the durable store, see app.models.storage).
+"""
+import sys
+from datetime import datetime, timezone
+
+
+def _to_epoch(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+    return datetime.now(timezone.utc).timestamp()
+
+
+def _to_iso(ts: float) -> str:
+    """Same format as `datetime.utcnow().isoformat()`."""
+    return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat()
+
+
+class Record:
+    """Base for the record types; subclasses list their FIELDS (and which to INTERN)."""
+
+    __slots__ = ("timestamp", "extra")
+    ID_FIELD = "id"
+    FIELDS: tuple[str, ...] = ()
+    INTERN: frozenset[str] = frozenset()
+
+    def __init__(self, data: dict):
+        extra = None
+        for name in self.FIELDS:
+            setattr(self, name, None)
+        self.timestamp = _to_epoch(data.get("timestamp"))
+        for key, value in data.items():
+            if key == "timestamp":
+                continue
+            if key in self.FIELDS:
+                if key in self.INTERN and type(value) is str:
+                    value = sys.intern(value)
+                setattr(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self.extra = extra
+
+    @property
+    def key(self) -> str:
+        return getattr(self, self.ID_FIELD)
+
+    def get(self, key: str, default=None):
+        if key == "timestamp":
+            return _to_iso(self.timestamp)
+        if key in self.FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self.extra.get(key, default) if self.extra else default
+
+    def __getitem__(self, key: str):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key: str, value) -> None:
+        if key == "timestamp":
+            self.timestamp = _to_epoch(value)
+        elif key in self.FIELDS:
+            setattr(self, key, sys.intern(value) if key in self.INTERN and type(value) is str else value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def to_dict(self) -> dict:
+        data = {self.ID_FIELD: getattr(self, self.ID_FIELD), "timestamp": _to_iso(self.timestamp)}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not None and name not in data:
+                data[name] = value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+_MISSING = object()
+
+
+class ClassificationRecord(Record):
+    FIELDS = ("id", "text", "category", "confidence", "band", "hsn", "processing_time_ms", "source")
+    __slots__ = FIELDS
+    INTERN = frozenset({"category", "band", "hsn", "source"})
+
+
+class MatchRecord(Record):
+    FIELDS = ("id", "category", "location", "top_platform", "top_score", "processing_time_ms")
+    __slots__ = FIELDS
+    INTERN = frozenset({"category", "location", "top_platform"})
+
+
+class OverrideRecord(Record):
+    ID_FIELD = "audit_id"
+    FIELDS = ("audit_id", "record_id", "field", "old_value", "new_value", "reason", "admin_id")
+    __slots__ = FIELDS
+    INTERN = frozenset({"field", "admin_id"})
+
+
+class RingStore:
+    """The newest `capacity` records in insertion order, indexed by id."""
+
+    def __init__(self, record_type: type[Record], capacity: int):
+        self.record_type = record_type
+        self.capacity = max(1, capacity)
+        self._buffer: list[Record | None] = []
+        self._index: dict[str, int] = {}  # id -> sequence number of its slot
+        self._appended = 0
+        self._updates = 0
+
+    @property
+    def version(self) -> int:
+        """Changes on every append or update (unlike len, which stops at capacity)."""
+        return self._appended + self._updates
+
+    def append(self, record: Record | dict) -> Record:
+        if not isinstance(record, Record):
+            record = self.record_type(record)
+        pos = self._appended % self.capacity
+        if len(self._buffer) < self.capacity:
+            self._buffer.append(record)
+        else:
+            evicted = self._buffer[pos]
+            if self._index.get(evicted.key) == self._appended - self.capacity:
+                del self._index[evicted.key]
+            self._buffer[pos] = record
+        self._index[record.key] = self._appended
+        self._appended += 1
+        return record
+
+    def extend(self, records) -> None:
+        for record in records:
+            self.append(record)
+
+    def get(self, record_id: str) -> Record | None:
+        seq = self._index.get(record_id)
+        return None if seq is None else self._buffer[seq % self.capacity]
+
+    def touch(self) -> None:
+        """Note an in-place update of a record (bumps `version`)."""
+        self._updates += 1
+
+    def tail(self, n: int) -> list[Record]:
+        """The newest `n` records, oldest first."""
+        n = min(n, len(self._buffer))
+        return [self._buffer[(self._appended - n + i) % self.capacity] for i in range(n)]
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __bool__(self) -> bool:
+        return bool(self._buffer)
+
+    def __iter__(self):
+        """Oldest to newest."""
+        return iter(self.tail(len(self._buffer)))
+
+    def __reversed__(self):
+        for i in range(1, len(self._buffer) + 1):
+            yield self._buffer[(self._appended - i) % self.capacity]
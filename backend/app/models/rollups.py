@@ -0,0 +1,192 @@
+"""Time-bucketed rollups of classification and match events.
+
+Every event is added to one slot in each tier: the current minute, hour
+and (UTC) day. Slots hold counts, the band and source mix, and latency
+sketches that merge by adding bucket counts. A window query walks the
+window from its start and takes the coarsest slot that fits at each point
+(a day, then hours, then minutes), so even "last 7 days" merges a few
+dozen slots. Each tier keeps a fixed number of slots (3 hours of minutes,
+8 days of hours, 90 days of days); a window edge older than a tier's
+retention is rounded outward to the next coarser slot. The tiers live in
+memory; on startup `database.restore` replays the stored events of the
+last `retention_s()` into them.
+"""
+import math
+import time
+
+ALPHA = 0.01  # relative accuracy of latency quantiles
+_GAMMA = (1 + ALPHA) / (1 - ALPHA)
+_LOG_GAMMA = math.log(_GAMMA)
+_MIN_MS = 1e-3  # latencies at or below this go to the zero bucket
+
+# (name, slot width in seconds, slots kept)
+TIERS = (("minute", 60, 180), ("hour", 3600, 192), ("day", 86400, 90))
+
+
+class LatencySketch:
+    """Mergeable quantile sketch: logarithmic buckets with relative error ALPHA (as in DDSketch)."""
+
+    __slots__ = ("bins", "zero", "count", "total", "max")
+
+    def __init__(self):
+        self.bins: dict[int, int] = {}
+        self.zero = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        if value <= _MIN_MS:
+            self.zero += 1
+        else:
+            i = math.ceil(math.log(value) / _LOG_GAMMA)
+            self.bins[i] = self.bins.get(i, 0) + 1
+
+    def merge(self, other: "LatencySketch") -> None:
+        for i, n in other.bins.items():
+            self.bins[i] = self.bins.get(i, 0) + n
+        self.zero += other.zero
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero
+        if rank < seen:
+            return 0.0
+        for i in sorted(self.bins):
+            seen += self.bins[i]
+            if rank < seen:
+                return min(self.max, 2 * _GAMMA ** i / (_GAMMA + 1))
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 1) if self.count else 0.0,
+            "p50": round(self.quantile(0.5), 1),
+            "p90": round(self.quantile(0.9), 1),
+            "p99": round(self.quantile(0.99), 1),
+            "max": round(self.max, 1),
+        }
+
+
+class Slot:
+    __slots__ = ("classifications", "matches", "bands", "sources", "confidence", "classify_ms", "match_ms")
+
+    def __init__(self):
+        self.classifications = 0
+        self.matches = 0
+        self.bands: dict[str, int] = {}
+        self.sources: dict[str, int] = {}
+        self.confidence = 0.0
+        self.classify_ms = LatencySketch()
+        self.match_ms = LatencySketch()
+
+    def merge(self, other: "Slot") -> None:
+        self.classifications += other.classifications
+        self.matches += other.matches
+        for band, n in other.bands.items():
+            self.bands[band] = self.bands.get(band, 0) + n
+        for source, n in other.sources.items():
+            self.sources[source] = self.sources.get(source, 0) + n
+        self.confidence += other.confidence
+        self.classify_ms.merge(other.classify_ms)
+        self.match_ms.merge(other.match_ms)
+
+
+class Rollups:
+    def __init__(self, tiers: tuple = TIERS):
+        self._tiers = [(name, width, keep, {}) for name, width, keep in tiers]  # finest first
+
+    def _slots(self, ts: float) -> list[Slot]:
+        """The slot for `ts` in every tier, created (and old slots evicted) as needed."""
+        slots = []
+        for _, width, keep, tier in self._tiers:
+            start = int(ts // width) * width
+            slot = tier.get(start)
+            if slot is None:
+                slot = tier[start] = Slot()
+                cutoff = start - keep * width
+                while tier and next(iter(tier)) <= cutoff:
+                    del tier[next(iter(tier))]
+            slots.append(slot)
+        return slots
+
+    def record_classification(self, band: str, source: str, confidence: float, latency_ms: float, ts: float | None = None):
+        for slot in self._slots(time.time() if ts is None else ts):
+            slot.classifications += 1
+            slot.bands[band] = slot.bands.get(band, 0) + 1
+            slot.sources[source] = slot.sources.get(source, 0) + 1
+            slot.confidence += confidence
+            slot.classify_ms.add(latency_ms)
+
+    def record_match(self, latency_ms: float, ts: float | None = None):
+        for slot in self._slots(time.time() if ts is None else ts):
+            slot.matches += 1
+            slot.match_ms.add(latency_ms)
+
+    def _retained_from(self, width: int, keep: int, tier: dict) -> float:
+        newest = next(reversed(tier), None)
+        return -math.inf if newest is None else newest - (keep - 1) * width
+
+    def query(self, start: float, end: float) -> dict:
+        """Merge the slots covering [start, end) (edges rounded out to whole minutes)."""
+        merged = Slot()
+        used = {name: 0 for name, *_ in self._tiers}
+        finest = self._tiers[0][1]
+        t = int(start // finest) * finest
+        end = math.ceil(end / finest) * finest
+        actual_start = t
+        while t < end:
+            # Coarsest slot that starts here and fits in the window, if its tier still has it
+            choice = None
+            for name, width, keep, tier in reversed(self._tiers):
+                if t % width == 0 and t + width <= end and t >= self._retained_from(width, keep, tier):
+                    choice = (name, width, tier, t)
+                    break
+            if choice is None:
+                # Evicted at this resolution: the finest tier that still has it, rounded out
+                for name, width, keep, tier in self._tiers:
+                    if t >= self._retained_from(width, keep, tier) or width == self._tiers[-1][1]:
+                        choice = (name, width, tier, int(t // width) * width)
+                        break
+            name, width, tier, slot_start = choice
+            actual_start = min(actual_start, slot_start)
+            slot = tier.get(slot_start)
+            if slot is not None:
+                merged.merge(slot)
+                used[name] += 1
+            t = slot_start + width
+
+        n = merged.classifications
+        return {
+            "start": actual_start,
+            "end": max(end, t),
+            "classifications": n,
+            "matches": merged.matches,
+            "band_distribution": {"GREEN": 0, "YELLOW": 0, "RED": 0, **merged.bands},
+            "sources": merged.sources,
+            "avg_confidence": round(merged.confidence / n, 3) if n else 0,
+            "latency_ms": {
+                "classification": merged.classify_ms.summary(),
+                "match": merged.match_ms.summary(),
+            },
+            "slots_merged": used,
+        }
+
+    def retention_s(self) -> int:
+        """How far back the coarsest tier reaches."""
+        return max(width * keep for _, width, keep, _ in self._tiers)
+
+    def stats(self) -> dict:
+        return {name: {"slot_s": width, "kept": keep, "slots": len(tier)} for name, width, keep, tier in self._tiers}
+
+
+rollups = Rollups()
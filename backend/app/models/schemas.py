@@ -45,6 +45,23 @@ class ClassifyResponse(BaseModel):
     attributes: ProductAttributes
     ondc_catalog: Optional[dict] = None
     processing_time_ms: float
+    stage_timings: Optional[dict[str, float]] = None  # ms per traced stage
+
+class BatchClassifyRequest(BaseModel):
+    texts: list[str] = Field(min_length=1, max_length=1000)
+    language: str = "en"
+
+class BatchClassifyItem(BaseModel):
+    index: int
+    result: Optional[ClassifyResponse] = None
+    error: Optional[str] = None
+
+class BatchClassifyResponse(BaseModel):
+    results: list[BatchClassifyItem]  # in input order
+    total: int
+    unique: int
+    failed: int
+    processing_time_ms: float  # whole batch; per item in each result
 
 class TranslateRequest(BaseModel):
     text: str
@@ -84,6 +101,7 @@ class MatchResponse(BaseModel):
     msme_profile: dict
     top_platforms: list[PlatformMatch]
     processing_time_ms: float
+    stage_timings: Optional[dict[str, float]] = None  # ms per traced stage
 
 class PricingProduct(BaseModel):
     name: str
@@ -114,6 +132,23 @@ class PricingResponse(BaseModel):
     growth_yoy: float
     insight: Optional[PricingInsight] = None
 
+class OnboardRequest(BaseModel):
+    text: str
+    language: str = "en"
+    location: str = "India"
+    business_type: str = "B2C"
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    your_price: Optional[float] = None
+
+class OnboardResponse(BaseModel):
+    classification: ClassifyResponse
+    match: Optional[MatchResponse] = None
+    pricing: Optional[dict] = None
+    errors: dict[str, str] = {}  # stage -> error, for stages that failed
+    stage_timings: dict[str, float]  # ms per stage: classify, match, pricing, total
+    processing_time_ms: float
+
 class OverrideRequest(BaseModel):
     record_id: str
     field: str  # "category" or "platform"
@@ -133,4 +168,5 @@ class DashboardMetrics(BaseModel):
     avg_confidence: float
     avg_processing_time_ms: float
     band_distribution: dict  # {"GREEN": n, "YELLOW": n, "RED": n}
+    total_overrides: int = 0
     recent_classifications: list[dict]
@@ -0,0 +1,279 @@
+"""Durable storage behind the in-memory stores in `database.py`.
+
+`database.add_*` keep serving reads from memory and hand each record to a
+`WriteBehind` queue. A background thread drains the queue and writes the
+records in batches (one transaction per batch) to the configured backend,
+so request handlers never wait on disk or network I/O; records still in
+the queue can be read back with `WriteBehind.pending`. On startup the
+in-memory state is restored from the backend, which also makes records
+written by other processes (other uvicorn workers, scripts/seed_db.py)
+visible after a restart.
+
+Backends: SQLite in WAL mode (the local default), or none ("memory").
+"""
+import atexit
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# Per table: columns copied out of the record for indexed lookups (plus id and timestamp)
+TABLES = {
+    "classifications": ("category", "band", "confidence", "processing_time_ms"),
+    "matches": ("category",),
+    "overrides": ("record_id", "field"),
+    "audit_log": ("record_id",),
+}
+_ID_FIELD = {"overrides": "audit_id", "audit_log": "audit_id"}  # default: "id"
+_INDEXED = ("timestamp", "category", "record_id")
+
+
+def record_id(table: str, record: dict) -> str:
+    return record[_ID_FIELD.get(table, "id")]
+
+
+class StorageBackend(ABC):
+    """Interface of a durable record store. Writes come from the write-behind thread."""
+
+    @abstractmethod
+    def write(self, batch: list[tuple[str, dict]]) -> None:
+        """Insert or replace (by id) a batch of (table, record) pairs."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def get(self, table: str, record_id: str) -> dict | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def query(self, table: str, since: str | None = None, until: str | None = None,
+              limit: int = 100, **filters) -> list[dict]:
+        """Newest first; `since`/`until` bound the ISO timestamp, `filters` match indexed columns."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def count(self, table: str) -> int:
+        raise NotImplementedError
+
+    @abstractmethod
+    def band_totals(self) -> dict[str, tuple[int, float, float]]:
+        """Per band: (classifications, summed confidence, summed processing_time_ms)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def timeline(self, table: str, since: str) -> list[tuple]:
+        """Oldest first, from ISO timestamp `since`: (timestamp, band, source, confidence,
+        processing_time_ms) per classification, (timestamp, processing_time_ms) per match."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteBackend(StorageBackend):
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for table, columns in TABLES.items():
+            extra = "".join(f", {c}" for c in columns)
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {table} (id TEXT PRIMARY KEY, timestamp TEXT{extra}, data TEXT NOT NULL)")
+            for column in ("timestamp", *columns):
+                if column in _INDEXED:
+                    self._db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+
+    def write(self, batch: list[tuple[str, dict]]) -> None:
+        rows: dict[str, list[tuple]] = {}
+        for table, record in batch:
+            rows.setdefault(table, []).append((
+                record_id(table, record),
+                record.get("timestamp"),
+                *(record.get(c) for c in TABLES[table]),
+                json.dumps(record, ensure_ascii=False, default=str),
+            ))
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                for table, values in rows.items():
+                    columns = ("id", "timestamp", *TABLES[table], "data")
+                    self._db.executemany(
+                        f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        values,
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def get(self, table: str, record_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(f"SELECT data FROM {table} WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query(self, table: str, since: str | None = None, until: str | None = None,
+              limit: int = 100, **filters) -> list[dict]:
+        clauses, params = [], []
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        for column, value in filters.items():
+            if column not in TABLES[table]:
+                raise ValueError(f"{table} cannot be filtered by {column}")
+            clauses.append(f"{column} = ?")
+            params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT data FROM {table}{where} ORDER BY timestamp DESC LIMIT ?", (*params, limit)
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def count(self, table: str) -> int:
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def band_totals(self) -> dict[str, tuple[int, float, float]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT COALESCE(band, 'RED'), COUNT(*), TOTAL(confidence), TOTAL(processing_time_ms)"
+                " FROM classifications GROUP BY 1"
+            ).fetchall()
+        return {band: (n, confidence, ms) for band, n, confidence, ms in rows}
+
+    def timeline(self, table: str, since: str) -> list[tuple]:
+        columns = {
+            "classifications": "timestamp, band, json_extract(data, '$.source'), confidence, processing_time_ms",
+            "matches": "timestamp, json_extract(data, '$.processing_time_ms')",
+        }[table]
+        with self._lock:
+            return self._db.execute(
+                f"SELECT {columns} FROM {table} WHERE timestamp >= ? ORDER BY timestamp", (since,)
+            ).fetchall()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class WriteBehind:
+    """Batches records off the request path onto a backend, from one background thread.
+
+    A batch is written once it holds `batch_size` records or its first record
+    has waited `flush_interval_s`. `submit` never blocks: when `max_queue`
+    records are already waiting, the new record is not persisted (it stays
+    in memory) and is counted in `dropped`.
+    """
+
+    _STOP = object()
+
+    def __init__(self, backend: StorageBackend, batch_size: int = 200, flush_interval_s: float = 0.5,
+                 max_queue: int = 10000):
+        self.backend = backend
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        # (table, id) -> newest submitted record not yet written, for reads
+        self._pending: dict[tuple[str, str], dict] = {}
+        self._pending_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="store-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, table: str, record: dict) -> None:
+        item = (table, dict(record))  # a snapshot: later in-memory edits are submitted again
+        key = (table, record_id(table, item[1]))
+        with self._pending_lock:
+            previous = self._pending.get(key)
+            self._pending[key] = item[1]
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self._pending[key] = previous
+                if previous is None:
+                    del self._pending[key]
+                self.dropped += 1
+                if self.dropped == 1 or self.dropped % 1000 == 0:
+                    print(f"Store write-behind queue full: {self.dropped} records not persisted so far")
+
+    def pending(self, table: str, record_id: str | None = None) -> list[dict]:
+        """Records of `table` submitted but not written yet (only `record_id`'s, if given)."""
+        with self._pending_lock:
+            if record_id is not None:
+                record = self._pending.get((table, record_id))
+                return [dict(record)] if record is not None else []
+            return [dict(r) for (t, _), r in self._pending.items() if t == table]
+
+    def flush(self) -> None:
+        """Block until everything submitted so far is written (or failed). Not for request handlers."""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout=10)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is self._STOP:
+                self._queue.task_done()
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    self._queue.task_done()
+                    stop = True
+                    break
+                batch.append(item)
+            try:
+                self.backend.write(batch)
+                self.written += len(batch)
+                self.batches += 1
+            except Exception as e:
+                self.failed += len(batch)
+                print(f"Store write-behind error ({len(batch)} records lost): {e}")
+            with self._pending_lock:
+                for table, record in batch:
+                    key = (table, record_id(table, record))
+                    if self._pending.get(key) is record:
+                        del self._pending[key]
+            for _ in batch:
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "dropped": self.dropped,
+        }
+
+
+def make_backend(settings) -> StorageBackend | None:
+    """The configured backend, or None to keep records in memory only."""
+    try:
+        if settings.storage_backend == "sqlite":
+            return SQLiteBackend(os.path.join(settings.local_state_dir, "store.sqlite3"))
+        if settings.storage_backend != "memory":
+            raise ValueError(f"unknown STORAGE_BACKEND '{settings.storage_backend}'")
+    except Exception as e:
+        print(f"Store: persistence disabled, keeping records in memory only ({e})")
+    return None
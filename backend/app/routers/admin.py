@@ -1,6 +1,19 @@
+import time
+from typing import Optional
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
 from app.models.schemas import OverrideRequest, OverrideResponse, DashboardMetrics
-from app.models.database import add_override, get_dashboard_data
+from app.models.database import (
+    add_override, find_classifications, get_classification, get_dashboard_data, overrides_store, remove_correction,
+    writer,
+)
+from app.models.rollups import rollups
+from app.services.aws_nlp import aws_nlp
+from app.services.bedrock import bedrock_client
+from app.services.catalog_ai import fast_path, forget_classification, resolve_category
+from app.services.circuit_breaker import breakers
+from app.services.limiter import limiters
+from app.services.usage import usage_ledger
 
 router = APIRouter()
 
@@ -8,19 +21,118 @@ router = APIRouter()
 async def dashboard():
     return get_dashboard_data()
 
+@router.get("/classifications")
+async def classifications(
+    since: Optional[str] = None, until: Optional[str] = None, category: Optional[str] = None, limit: int = 100,
+):
+    """Stored classifications, newest first; since/until are ISO timestamps (UTC)."""
+    return await find_classifications(since=since, until=until, category=category, limit=min(limit, 1000))
+
+@router.get("/classifications/{record_id}")
+async def classification(record_id: str):
+    record = await get_classification(record_id)
+    if record is None:
+        return JSONResponse(status_code=404, content={"detail": f"classification '{record_id}' not found"})
+    return record
+
+@router.get("/store")
+async def store_stats():
+    return writer.stats() if writer is not None else {"backend": "memory"}
+
+# Named windows for /rollups, in seconds back from now ("today" starts at UTC midnight)
+ROLLUP_WINDOWS = {"last_hour": 3600, "last_24h": 86400, "last_7_days": 7 * 86400, "last_30_days": 30 * 86400}
+
+@router.get("/rollups")
+async def rollup_window(window: str = "last_hour", start: Optional[float] = None, end: Optional[float] = None):
+    """Volume, band mix and latency percentiles for a named window, or for [start, end) in epoch seconds."""
+    now = time.time()
+    if start is not None:
+        end = now if end is None else end
+        window = "custom"
+    elif window == "today":
+        start, end = now - now % 86400, now
+    elif window in ROLLUP_WINDOWS:
+        start, end = now - ROLLUP_WINDOWS[window], now
+    else:
+        names = ", ".join(["today", *ROLLUP_WINDOWS])
+        return JSONResponse(status_code=400, content={"detail": f"unknown window '{window}' (use {names}, or start/end)"})
+    if end <= start:
+        return JSONResponse(status_code=400, content={"detail": "end must be after start"})
+    return {"window": window, **rollups.query(start, end), "retention": rollups.stats()}
+
+@router.get("/cache")
+async def cache_stats():
+    return {
+        "embeddings": bedrock_client.embedding_cache.stats(),
+        "llm_responses": await bedrock_client.response_cache.stats(),
+        "coalesced": {
+            flight.name: flight.stats()
+            for flight in (bedrock_client.claude_flight, bedrock_client.embedding_flight,
+                           aws_nlp.translate_flight, aws_nlp.detect_flight)
+        },
+    }
+
+@router.get("/bedrock")
+async def bedrock_stats():
+    return {
+        "limiters": {name: limiter.stats() for name, limiter in limiters.items()},
+        "circuit_breakers": {name: breaker.stats() for name, breaker in breakers.items()},
+    }
+
+@router.get("/usage")
+async def usage_stats():
+    return usage_ledger.summary()
+
+@router.get("/classifier")
+async def classifier_stats():
+    return fast_path.summary()
+
 @router.post("/override", response_model=OverrideResponse)
 async def override(request: OverrideRequest):
-    audit_id = add_override({
+    new_value = request.new_value
+    if request.field == "category":
+        # Stored and served as the canonical taxonomy path
+        new_value = resolve_category(request.new_value)
+        if new_value is None:
+            return JSONResponse(status_code=400, content={
+                "detail": f"unknown category '{request.new_value}' (use a taxonomy path, L3 name or code)"
+            })
+    audit_id = await add_override({
         "record_id": request.record_id,
         "field": request.field,
         "old_value": request.old_value,
-        "new_value": request.new_value,
+        "new_value": new_value,
         "reason": request.reason,
         "admin_id": request.admin_id,
     })
+    if not overrides_store.get(audit_id).get("applied"):
+        return OverrideResponse(
+            success=False,
+            record_id=request.record_id,
+            audit_id=audit_id,
+            message=f"Override recorded but not applied: no {request.field} to override on record '{request.record_id}'."
+        )
+    if request.field == "category":
+        # The correction is served from now on; cached answers for this text are stale
+        record = await get_classification(request.record_id)
+        if record and record.get("text"):
+            await forget_classification(record["text"])
     return OverrideResponse(
         success=True,
         record_id=request.record_id,
         audit_id=audit_id,
-        message=f"Override applied. {request.field} changed from '{request.old_value}' to '{request.new_value}'."
+        message=f"Override applied. {request.field} changed from '{request.old_value}' to '{new_value}'."
+    )
+
+@router.delete("/corrections/{record_id}", response_model=OverrideResponse)
+async def withdraw_correction(record_id: str, reason: str = "correction withdrawn", admin_id: str = "admin"):
+    """Stop serving the category correction made on this classification's text."""
+    audit_id = await remove_correction(record_id, reason, admin_id)
+    if audit_id is None:
+        return JSONResponse(status_code=404, content={"detail": f"no category correction for record '{record_id}'"})
+    return OverrideResponse(
+        success=True,
+        record_id=record_id,
+        audit_id=audit_id,
+        message="Correction withdrawn. This product text is classified as usual again."
     )
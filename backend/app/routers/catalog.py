@@ -1,7 +1,11 @@
 from fastapi import APIRouter
-from app.models.schemas import ClassifyRequest, ClassifyResponse, TranslateRequest, TranslateResponse
-from app.services.catalog_ai import classify_product
+from fastapi.responses import StreamingResponse
+from app.models.schemas import (
+    BatchClassifyRequest, BatchClassifyResponse, ClassifyRequest, ClassifyResponse, TranslateRequest, TranslateResponse,
+)
+from app.services.catalog_ai import classify_batch, classify_product
 from app.services.aws_nlp import aws_nlp
+from app.services.streaming import SSE_HEADERS, sse_events
 
 router = APIRouter()
 
@@ -12,6 +16,23 @@ async def classify(request: ClassifyRequest):
         language=request.language,
     )
 
+@router.post("/classify/stream")
+async def classify_stream(request: ClassifyRequest):
+    """Same as /classify, as Server-Sent Events: language, translation, classified, result, done."""
+    events = sse_events(lambda on_stage: classify_product(
+        text=request.text,
+        language=request.language,
+        on_stage=on_stage,
+    ))
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/classify/batch", response_model=BatchClassifyResponse)
+async def classify_many(request: BatchClassifyRequest):
+    return await classify_batch(
+        texts=request.texts,
+        language=request.language,
+    )
+
 @router.post("/translate", response_model=TranslateResponse)
 async def translate(request: TranslateRequest):
     translated = await aws_nlp.translate(
@@ -0,0 +1,79 @@
+import asyncio
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import JSONResponse
+from app.config import get_settings
+from app.services.jobs import JobInputError, job_progress, job_runner, parse_rows
+
+router = APIRouter()
+
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/jsonl": "jsonl",
+    "application/x-ndjson": "jsonl",
+    "application/x-jsonlines": "jsonl",
+}
+
+
+def _not_found(job_id: str) -> JSONResponse:
+    return JSONResponse(status_code=404, content={"detail": f"job '{job_id}' not found"})
+
+
+@router.post("", status_code=202)
+async def submit_job(request: Request, format: str = Query(None, description="csv or jsonl; defaults from Content-Type")):
+    """Upload a catalog as the raw request body (CSV with a header row, or JSONL)."""
+    fmt = format or _CONTENT_TYPES.get(request.headers.get("content-type", "").split(";")[0].strip().lower())
+    if not fmt:
+        return JSONResponse(status_code=415, content={"detail": "send text/csv or application/x-ndjson, or pass ?format="})
+    try:
+        # Parsing a large catalog is CPU work: keep it off the event loop
+        rows = await asyncio.get_running_loop().run_in_executor(None, parse_rows, await request.body(), fmt.lower())
+    except JobInputError as e:
+        return JSONResponse(status_code=400, content={"detail": str(e)})
+
+    max_rows = get_settings().jobs_max_rows
+    if len(rows) > max_rows:
+        return JSONResponse(status_code=413, content={"detail": f"catalog has {len(rows)} rows, the limit is {max_rows}"})
+
+    job_id = await job_runner.submit(rows, fmt.lower())
+    return {"job_id": job_id, "status": "queued", "total_rows": len(rows)}
+
+
+@router.get("")
+async def list_jobs(limit: int = Query(50, ge=1, le=500)):
+    store = job_runner.store
+    return [job_progress(j) for j in await store.run(store.recent, limit)]
+
+
+@router.get("/{job_id}")
+async def job_status(job_id: str):
+    job = await job_runner.store.run(job_runner.store.get, job_id)
+    if not job:
+        return _not_found(job_id)
+    return job_progress(job)
+
+
+@router.get("/{job_id}/results")
+async def job_results(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    status: str = Query(None, description="pending, done or failed"),
+):
+    store = job_runner.store
+    job = await store.run(store.get, job_id)
+    if not job:
+        return _not_found(job_id)
+    return {
+        "job": job_progress(job),
+        "offset": offset,
+        "results": await store.run(store.results, job_id, offset=offset, limit=limit, status=status),
+    }
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    job = await job_runner.store.run(job_runner.store.get, job_id)
+    if not job:
+        return _not_found(job_id)
+    return {"job_id": job_id, "cancelled": await job_runner.cancel(job_id)}
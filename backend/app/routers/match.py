@@ -1,6 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from app.models.schemas import MatchRequest, MatchResponse
 from app.services.matchmaker import recommend_platforms
+from app.services.streaming import SSE_HEADERS, sse_events
 
 router = APIRouter()
 
@@ -15,3 +17,18 @@ async def recommend(request: MatchRequest):
         lat=request.lat,
         lon=request.lon,
     )
+
+@router.post("/recommend/stream")
+async def recommend_stream(request: MatchRequest):
+    """Same as /recommend, as Server-Sent Events: scores, explanation (x3), result, done."""
+    events = sse_events(lambda on_stage: recommend_platforms(
+        product_category=request.product_category,
+        product_description=request.product_description,
+        location=request.location,
+        language=request.language,
+        business_type=request.business_type,
+        lat=request.lat,
+        lon=request.lon,
+        on_stage=on_stage,
+    ))
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from app.models.schemas import OnboardRequest, OnboardResponse
+from app.services.onboarding import onboard_product
+
+router = APIRouter()
+
+@router.post("", response_model=OnboardResponse)
+async def onboard(request: OnboardRequest):
+    return await onboard_product(
+        text=request.text,
+        language=request.language,
+        location=request.location,
+        business_type=request.business_type,
+        lat=request.lat,
+        lon=request.lon,
+        your_price=request.your_price,
+    )
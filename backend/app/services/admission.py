@@ -0,0 +1,145 @@
+"""Admission control for the API.
+
+Requests are split into route classes: "llm" for routes that may wait on
+Bedrock or the other AWS AI services, "bulk" for the long-running ones
+among them (batches and Server-Sent Event streams, whose duration says
+nothing about interactive latency), "cheap" for everything else (admin,
+job status, ...). Each class has a gate with a cap on requests in flight
+and a latency target. While the class's recent latency (an EWMA of
+admitted requests) is over target, the cap shrinks in proportion, so a
+backlog behind slow LLM calls stops growing instead of timing everyone
+out. Requests over the cap are rejected with 503 and a Retry-After hint;
+requests already admitted keep their latency.
+"""
+import math
+import time
+
+from fastapi.responses import JSONResponse
+
+from app.config import get_settings
+from app.services.metrics import metrics
+
+# Routes that may call Bedrock, Translate or Comprehend
+LLM_PREFIXES = (
+    "/api/catalog/classify",
+    "/api/catalog/translate",
+    "/api/match/recommend",
+    "/api/intelligence/",
+    "/api/onboard",
+)
+# Long-running LLM routes: their own gate, so they don't inflate the "llm" latency average
+BULK_PATHS = (
+    "/api/catalog/classify/batch",
+    "/api/catalog/classify/stream",
+    "/api/match/recommend/stream",
+)
+# Never shed: health checks and scrapes must work best when we are busy
+EXEMPT_PATHS = ("/health", "/metrics")
+
+_EWMA_WEIGHT = 0.1  # weight of the newest request in the latency average
+
+
+def route_class(path: str) -> str | None:
+    """The gate a request goes through, or None for exempt paths."""
+    if path in EXEMPT_PATHS:
+        return None
+    if path in BULK_PATHS:
+        return "bulk"
+    return "llm" if path.startswith(LLM_PREFIXES) else "cheap"
+
+
+class AdmissionGate:
+    def __init__(self, name: str, max_in_flight: int, latency_target_s: float):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.latency_target_s = latency_target_s
+        self.in_flight = 0
+        self.latency_s = 0.0  # EWMA of admitted requests
+        self.admitted = 0
+        self.shed = 0
+
+    @property
+    def capacity(self) -> int:
+        """The in-flight cap, scaled down while latency is over target."""
+        if self.latency_target_s <= 0 or self.latency_s <= self.latency_target_s:
+            return self.max_in_flight
+        return max(1, int(self.max_in_flight * self.latency_target_s / self.latency_s))
+
+    def admit(self) -> bool:
+        if self.in_flight >= self.capacity:
+            self.shed += 1
+            metrics.inc("http_requests_shed_total", (self.name,))
+            return False
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self, elapsed_s: float) -> None:
+        self.in_flight -= 1
+        self.latency_s = elapsed_s if not self.latency_s else (
+            _EWMA_WEIGHT * elapsed_s + (1 - _EWMA_WEIGHT) * self.latency_s
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until a retry is likely to be admitted: about one request's latency."""
+        return min(30, max(1, math.ceil(self.latency_s)))
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "capacity": self.capacity,
+            "max_in_flight": self.max_in_flight,
+            "latency_ewma_s": round(self.latency_s, 3),
+            "latency_target_s": self.latency_target_s,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+_settings = get_settings()
+gates = {
+    name: AdmissionGate(
+        name,
+        max_in_flight=_settings.admission_max_in_flight.get(name, 256),
+        latency_target_s=_settings.admission_latency_target_s.get(name, 0.0),
+    )
+    for name in ("llm", "bulk", "cheap")
+}
+
+
+def _admission_metrics():
+    for name, gate in gates.items():
+        yield "admission_in_flight", (name,), gate.in_flight
+        yield "admission_capacity", (name,), gate.capacity
+
+
+metrics.register_collector(_admission_metrics)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware applying the gates. A plain ASGI wrapper rather than an
+    HTTP middleware: the slot is held until the app has sent the whole
+    response (streams included) and is released however the request ends,
+    including client disconnects and cancellation before the body is sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        gate = None
+        if scope["type"] == "http" and get_settings().admission_enabled:
+            gate = gates.get(route_class(scope["path"]))
+        if gate is None:
+            return await self.app(scope, receive, send)
+        if not gate.admit():
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "server is busy, retry later"},
+                headers={"Retry-After": str(gate.retry_after())},
+            )
+            return await response(scope, receive, send)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(time.perf_counter() - start)
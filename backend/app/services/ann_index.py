@@ -0,0 +1,67 @@
+"""Approximate nearest-neighbour search over platform embeddings.
+
+An IVF (inverted file) index: vectors are clustered with spherical k-means,
+and a query only scans the members of the `n_probe` clusters whose
+centroids are closest to it. Similarity is cosine throughout.
+"""
+import numpy as np
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+class IVFIndex:
+    """Inverted-file cosine index built with spherical k-means."""
+
+    def __init__(self, vectors: np.ndarray, ids: np.ndarray | None = None, n_lists: int = 0, n_iter: int = 10, seed: int = 0):
+        vectors = np.asarray(vectors, dtype=np.float64)
+        n = len(vectors)
+        self.ids = np.arange(n) if ids is None else np.asarray(ids, dtype=np.int64)
+        self.dim = vectors.shape[1] if vectors.ndim == 2 else 0
+        self.n_lists = max(1, min(n, n_lists or int(np.sqrt(n)))) if n else 0
+        self.vectors = _normalize_rows(vectors) if n else vectors
+
+        if not n:
+            self.centroids = np.zeros((0, self.dim))
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.order = np.zeros(0, dtype=np.int64)
+            return
+
+        rng = np.random.default_rng(seed)
+        centroids = self.vectors[rng.choice(n, self.n_lists, replace=False)]
+        assign = np.zeros(n, dtype=np.int64)
+        for _ in range(n_iter):
+            assign = np.argmax(self.vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, self.vectors)
+            empty = ~sums.any(axis=1)
+            # Re-seed empty clusters on random points so every list stays useful
+            sums[empty] = self.vectors[rng.choice(n, int(empty.sum()))]
+            centroids = _normalize_rows(sums)
+        self.centroids = centroids
+
+        # Store members contiguously per list: list j is order[offsets[j]:offsets[j + 1]]
+        self.order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=self.n_lists)
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.vectors = self.vectors[self.order]
+        self.ids = self.ids[self.order]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query, k: int, n_probe: int = 8) -> np.ndarray:
+        """Return the ids of up to `k` vectors most similar to `query`."""
+        if not len(self) or len(query) != self.dim:
+            return np.zeros(0, dtype=np.int64)
+        q = np.asarray(query, dtype=np.float64)
+        n_probe = min(max(1, n_probe), self.n_lists)
+        lists = np.argpartition(-(self.centroids @ q), n_probe - 1)[:n_probe]
+        rows = np.concatenate([np.arange(self.offsets[j], self.offsets[j + 1]) for j in lists])
+        if len(rows) <= k:
+            return self.ids[rows]
+        sims = self.vectors[rows] @ q
+        return self.ids[rows[np.argpartition(-sims, k - 1)[:k]]]
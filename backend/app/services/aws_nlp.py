@@ -1,5 +1,14 @@
-import boto3
+import asyncio
+
 from app.config import get_settings
+from app.services.aws_runtime import aws_call, make_client
+from app.services.singleflight import SingleFlight
+
+# Service limits: Comprehend batch calls take 25 documents of up to 5,000 bytes
+# each; TranslateText takes up to 10,000 bytes (kept below that for headroom).
+COMPREHEND_BATCH_SIZE = 25
+COMPREHEND_MAX_DOC_BYTES = 5000
+TRANSLATE_MAX_BYTES = 9000
 
 class AWSNLPService:
     def __init__(self):
@@ -7,35 +16,33 @@ class AWSNLPService:
         self._translate_available = False
         self._comprehend_available = False
         try:
-            self.translate_client = boto3.client(
-                "translate",
-                region_name=self.settings.aws_region,
-                aws_access_key_id=self.settings.aws_access_key_id or None,
-                aws_secret_access_key=self.settings.aws_secret_access_key or None,
-            )
+            self.translate_client = make_client("translate")
             self._translate_available = True
         except Exception:
             pass
         try:
-            self.comprehend_client = boto3.client(
-                "comprehend",
-                region_name=self.settings.aws_region,
-                aws_access_key_id=self.settings.aws_access_key_id or None,
-                aws_secret_access_key=self.settings.aws_secret_access_key or None,
-            )
+            self.comprehend_client = make_client("comprehend")
             self._comprehend_available = True
         except Exception:
             pass
+        # Identical texts in flight at once share one Translate/Comprehend call
+        self.translate_flight = SingleFlight("translate")
+        self.detect_flight = SingleFlight("detect_language")
 
     async def translate(self, text: str, source_lang: str = "hi", target_lang: str = "en") -> str:
         """Translate text via AWS Translate. Returns original text on failure."""
         if not self._translate_available:
             return text
         try:
-            response = self.translate_client.translate_text(
-                Text=text,
-                SourceLanguageCode=source_lang,
-                TargetLanguageCode=target_lang,
+            response = await self.translate_flight.do(
+                (source_lang, target_lang, text),
+                lambda: aws_call(
+                    "translate", "translate_text",
+                    self.translate_client.translate_text,
+                    Text=text,
+                    SourceLanguageCode=source_lang,
+                    TargetLanguageCode=target_lang,
+                ),
             )
             return response["TranslatedText"]
         except Exception as e:
@@ -47,7 +54,13 @@ class AWSNLPService:
         # Try Comprehend first
         if self._comprehend_available:
             try:
-                response = self.comprehend_client.detect_dominant_language(Text=text)
+                response = await self.detect_flight.do(
+                    text,
+                    lambda: aws_call(
+                        "comprehend", "detect_dominant_language",
+                        self.comprehend_client.detect_dominant_language, Text=text,
+                    ),
+                )
                 languages = response.get("Languages", [])
                 if languages:
                     top = max(languages, key=lambda x: x["Score"])
@@ -55,7 +68,91 @@ class AWSNLPService:
             except Exception as e:
                 print(f"Comprehend detect_language error: {e}")
 
-        # Fallback: Devanagari script heuristic
+        return self.detect_language_local(text)
+
+    async def detect_languages(self, texts: list[str]) -> list[str]:
+        """Detect many languages with BatchDetectDominantLanguage, 25 texts per call.
+
+        Texts Comprehend rejects or cannot answer fall back to the local heuristic.
+        """
+        results: list[str | None] = [None] * len(texts)
+        if self._comprehend_available:
+            # Comprehend only needs a prefix to spot the language
+            docs = [t.encode("utf-8")[:COMPREHEND_MAX_DOC_BYTES].decode("utf-8", "ignore") for t in texts]
+
+            async def detect_chunk(offset: int):
+                try:
+                    response = await aws_call(
+                        "comprehend", "batch_detect_dominant_language",
+                        self.comprehend_client.batch_detect_dominant_language,
+                        TextList=docs[offset:offset + COMPREHEND_BATCH_SIZE],
+                    )
+                    for item in response.get("ResultList", []):
+                        languages = item.get("Languages", [])
+                        if languages:
+                            results[offset + item["Index"]] = max(languages, key=lambda x: x["Score"])["LanguageCode"]
+                except Exception as e:
+                    print(f"Comprehend batch_detect_dominant_language error: {e}")
+
+            await asyncio.gather(*(detect_chunk(i) for i in range(0, len(docs), COMPREHEND_BATCH_SIZE)))
+        return [lang or self.detect_language_local(text) for lang, text in zip(results, texts)]
+
+    async def translate_many(self, texts: list[str], source_lang: str = "hi", target_lang: str = "en") -> list[str]:
+        """Translate many texts with few TranslateText calls.
+
+        Single-line texts are packed newline-separated into requests under the
+        byte limit and split back apart; Translate keeps line breaks. Texts
+        with line breaks of their own, oversized texts and any chunk whose
+        line count does not survive the round trip are translated one by one.
+        Like `translate`, returns the original text for anything that fails.
+        """
+        if not self._translate_available or not texts:
+            return list(texts)
+        results = list(texts)
+        chunks: list[list[int]] = []
+        singles: list[int] = []
+        size = 0
+        for i, text in enumerate(texts):
+            n_bytes = len(text.encode("utf-8")) + 1
+            if "\n" in text or "\r" in text or n_bytes > TRANSLATE_MAX_BYTES:
+                singles.append(i)
+                continue
+            if not chunks or size + n_bytes > TRANSLATE_MAX_BYTES:
+                chunks.append([])
+                size = 0
+            chunks[-1].append(i)
+            size += n_bytes
+
+        async def translate_one(i: int):
+            results[i] = await self.translate(texts[i], source_lang, target_lang)
+
+        async def translate_chunk(indices: list[int]):
+            if len(indices) == 1:
+                return await translate_one(indices[0])
+            try:
+                response = await aws_call(
+                    "translate", "translate_text",
+                    self.translate_client.translate_text,
+                    Text="\n".join(texts[i] for i in indices),
+                    SourceLanguageCode=source_lang,
+                    TargetLanguageCode=target_lang,
+                )
+                lines = response["TranslatedText"].split("\n")
+                if len(lines) == len(indices):
+                    for i, line in zip(indices, lines):
+                        results[i] = line.strip()
+                    return
+            except Exception as e:
+                print(f"Translate batch error: {e}")
+            await asyncio.gather(*(translate_one(i) for i in indices))
+
+        await asyncio.gather(*(translate_chunk(c) for c in chunks), *(translate_one(i) for i in singles))
+        return results
+
+    @staticmethod
+    def detect_language_local(text: str) -> str:
+        """Offline language guess: Devanagari script, then Romanized Hindi markers."""
+        # Devanagari script heuristic
         devanagari_range = range(0x0900, 0x097F + 1)
         devanagari_count = sum(1 for c in text if ord(c) in devanagari_range)
         if devanagari_count > 0:
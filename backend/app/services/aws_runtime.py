@@ -0,0 +1,80 @@
+"""Shared boto3 plumbing for the AWS service clients.
+
+boto3 is synchronous, so every AWS call is run on a dedicated, sized thread
+pool instead of the event loop. Clients share one connection-pool size,
+timeout and retry policy from settings.
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+
+from app.config import get_settings
+from app.services.metrics import metrics
+
+_settings = get_settings()
+
+aws_executor = ThreadPoolExecutor(max_workers=_settings.aws_max_workers, thread_name_prefix="aws-io")
+
+
+def make_client(service: str, max_attempts: int | None = None):
+    """Create a boto3 client with explicit pool sizing, timeouts and retry budget.
+
+    `max_attempts` overrides AWS_MAX_ATTEMPTS for callers that retry themselves.
+    """
+    config = Config(
+        max_pool_connections=_settings.aws_max_pool_connections,
+        connect_timeout=_settings.aws_connect_timeout_s,
+        read_timeout=_settings.aws_read_timeout_s,
+        retries={"max_attempts": max_attempts or _settings.aws_max_attempts, "mode": "standard"},
+    )
+    return boto3.client(
+        service,
+        region_name=_settings.aws_region,
+        aws_access_key_id=_settings.aws_access_key_id or None,
+        aws_secret_access_key=_settings.aws_secret_access_key or None,
+        endpoint_url=_settings.aws_endpoint_url or None,
+        config=config,
+    )
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Run a blocking call on the AWS executor without stalling the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(aws_executor, functools.partial(fn, *args, **kwargs))
+
+
+THROTTLING_CODES = frozenset({
+    "ThrottlingException", "Throttling", "TooManyRequestsException", "ServiceQuotaExceededException",
+})
+
+
+def is_throttling(error: Exception) -> bool:
+    return isinstance(error, ClientError) and error.response.get("Error", {}).get("Code") in THROTTLING_CODES
+
+
+def is_transient(error: Exception) -> bool:
+    """A 5xx, timeout or dropped connection: worth retrying, unlike client errors (throttles aside)."""
+    if isinstance(error, (BotoConnectionError, HTTPClientError)):
+        return True  # connect/read timeouts, connection resets and refusals
+    if isinstance(error, ClientError):
+        return (error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0) >= 500
+    return False
+
+
+async def aws_call(service: str, operation: str, fn, *args, **kwargs):
+    """`run_blocking` for an AWS API call, recording its count, outcome and latency."""
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        return await run_blocking(fn, *args, **kwargs)
+    except Exception as e:
+        outcome = "throttled" if is_throttling(e) else "error"
+        raise
+    finally:
+        metrics.inc("aws_calls_total", (service, operation, outcome))
+        metrics.observe("aws_call_duration_seconds", time.perf_counter() - start, (service, operation))
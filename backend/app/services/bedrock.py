@@ -1,65 +1,209 @@
-import boto3
+import asyncio
 import json
+import os
 from app.config import get_settings
+from app.services.aws_runtime import aws_call, is_throttling, is_transient, make_client
+from app.services.cache import TTLCache
+from app.services.circuit_breaker import CircuitOpenError, get_breaker
+from app.services.limiter import QueueFullError, backoff_delay, call_priority, get_limiter
+from app.services.llm_cache import LLMResponseCache, bypass_llm_cache, make_cache_key
+from app.services.metrics import cache_samples, metrics
+from app.services.singleflight import SingleFlight
+from app.services.tracing import span
+from app.services.usage import usage_ledger
+from app.services.utils import normalize_text
 
 class BedrockClient:
     def __init__(self):
         self.settings = get_settings()
         try:
-            self.client = boto3.client(
-                "bedrock-runtime",
-                region_name=self.settings.aws_region,
-                aws_access_key_id=self.settings.aws_access_key_id or None,
-                aws_secret_access_key=self.settings.aws_secret_access_key or None,
+            # With the adaptive limiter on, throttled and transient failures are retried here
+            # (with backoff the limiter hears about), not silently inside botocore
+            self.client = make_client(
+                "bedrock-runtime", max_attempts=1 if self.settings.bedrock_limiter_enabled else None,
             )
             self._available = True
         except Exception:
             self._available = False
+        self.embedding_cache = TTLCache(
+            maxsize=self.settings.embedding_cache_size,
+            ttl=self.settings.embedding_cache_ttl_s,
+        )
+        self.response_cache = LLMResponseCache(
+            path=os.path.join(self.settings.local_state_dir, "llm_cache.sqlite3") if self.settings.llm_cache_disk_enabled else None,
+            max_entries=self.settings.llm_cache_max_entries,
+            disk_max_entries=self.settings.llm_cache_disk_max_entries,
+        )
+        # Identical prompts/texts in flight at once share one InvokeModel call
+        self.claude_flight = SingleFlight("bedrock_invoke")
+        self.embedding_flight = SingleFlight("bedrock_embedding")
 
-    async def invoke_claude(self, prompt: str, system: str = "") -> str:
+    async def invoke_claude(
+        self,
+        prompt: str,
+        system: str = "",
+        max_tokens: int = 2048,
+        feature: str = "default",
+        use_cache: bool = True,
+        tag: str | None = None,
+    ) -> str:
+        """Call Claude, serving byte-identical prompts from the response cache.
+
+        `feature` names the call site: it selects the cache TTL from
+        LLM_CACHE_TTLS and labels the hit/miss counters. Pass
+        `use_cache=False`, or set `bypass_llm_cache` for the request, to force
+        a fresh call (the new answer is still stored). Concurrent misses for
+        the same prompt share one InvokeModel call. `tag` groups cached
+        responses for `forget_tagged`.
+        """
         if not self._available:
             return self._fallback_response(prompt)
+        cache_key = make_cache_key(self.settings.bedrock_model_id, system, prompt, max_tokens)
+        if self.settings.llm_cache_enabled and use_cache and not bypass_llm_cache.get():
+            with span("llm_cache_lookup"):
+                cached = await self.response_cache.get(cache_key, feature)
+            if cached is not None:
+                usage_ledger.record_cache_hit(feature)
+                return cached
         try:
-            body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 2048,
-                "system": system,
-                "messages": [{"role": "user", "content": prompt}]
-            }
-            response = self.client.invoke_model(
-                modelId=self.settings.bedrock_model_id,
-                body=json.dumps(body),
-                contentType="application/json",
-            )
-            result = json.loads(response["body"].read())
-            return result["content"][0]["text"]
+            with span("bedrock"):
+                return await self.claude_flight.do(
+                    cache_key, lambda: self._invoke_claude(cache_key, prompt, system, max_tokens, feature, tag),
+                )
+        except (CircuitOpenError, QueueFullError):
+            return self._fallback_response(prompt)
         except Exception as e:
             print(f"Bedrock error: {e}")
             return self._fallback_response(prompt)
 
+    async def _invoke_claude(self, cache_key: str, prompt: str, system: str, max_tokens: int, feature: str,
+                             tag: str | None = None) -> str:
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "system": system,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        result = await self._call_model(self.settings.bedrock_model_id, "invoke_model", body, feature)
+        text = result["content"][0]["text"]
+        usage = result.get("usage") or {}
+        usage_ledger.record(
+            feature, self.settings.bedrock_model_id,
+            usage.get("input_tokens", 0), usage.get("output_tokens", 0),
+        )
+        if self.settings.llm_cache_enabled:
+            ttl = self.settings.llm_cache_ttls.get(feature, self.settings.llm_cache_ttl_s)
+            await self.response_cache.set(cache_key, text, ttl, feature, tag)
+        return text
+
+    async def forget_response(self, prompt: str, system: str = "", max_tokens: int = 2048) -> None:
+        """Drop a cached response, e.g. one the caller could not parse."""
+        await self.response_cache.delete(make_cache_key(self.settings.bedrock_model_id, system, prompt, max_tokens))
+
+    async def forget_tagged(self, tag: str) -> int:
+        """Drop every cached response stored with `tag`, e.g. all answers about a corrected product."""
+        return await self.response_cache.delete_tag(tag)
+
     async def get_embedding(self, text: str) -> list[float]:
         if not self._available:
             return [0.5] * 8  # fallback 8-dim vector
+        cache_key = (self.settings.bedrock_embed_model_id, normalize_text(text))
+        cached = self.embedding_cache.get(cache_key)
+        if cached is not None:
+            usage_ledger.record_cache_hit("embedding")
+            return list(cached)
         try:
-            body = {"inputText": text}
-            response = self.client.invoke_model(
-                modelId=self.settings.bedrock_embed_model_id,
-                body=json.dumps(body),
-                contentType="application/json",
-            )
-            result = json.loads(response["body"].read())
-            embedding = result["embedding"]
-            # Reduce to 8 dimensions for our simple matching
-            if len(embedding) > 8:
-                step = len(embedding) // 8
-                embedding = [embedding[i * step] for i in range(8)]
-            return embedding
+            with span("bedrock_embedding"):
+                return list(await self.embedding_flight.do(cache_key, lambda: self._embed(cache_key, text)))
+        except (CircuitOpenError, QueueFullError):
+            return [0.5] * 8
         except Exception as e:
             print(f"Embedding error: {e}")
             return [0.5] * 8
 
+    async def _embed(self, cache_key: tuple, text: str) -> tuple:
+        body = {"inputText": text}
+        result = await self._call_model(self.settings.bedrock_embed_model_id, "embed", body, "embedding")
+        embedding = result["embedding"]
+        usage_ledger.record("embedding", self.settings.bedrock_embed_model_id, result.get("inputTextTokenCount", 0))
+        # Reduce to 8 dimensions for our simple matching
+        if len(embedding) > 8:
+            step = len(embedding) // 8
+            embedding = [embedding[i * step] for i in range(8)]
+        # Fallback vectors are never cached, so an outage doesn't stick
+        embedding = tuple(embedding)
+        self.embedding_cache.set(cache_key, embedding)
+        return embedding
+
+    async def _call_model(self, model_id: str, operation: str, body: dict, feature: str) -> dict:
+        """InvokeModel through the model's circuit breaker (CircuitOpenError while it is open)."""
+        if not self.settings.circuit_breaker_enabled:
+            return await self._call_limited(model_id, operation, body, feature)
+        return await get_breaker(model_id).call(self._call_limited, model_id, operation, body, feature)
+
+    async def _call_limited(self, model_id: str, operation: str, body: dict, feature: str) -> dict:
+        """InvokeModel within the model's adaptive concurrency limit, retrying with backoff.
+
+        Throttles get BEDROCK_THROTTLE_RETRIES retries; 5xx, timeouts and dropped
+        connections get the AWS_MAX_ATTEMPTS budget botocore would have used.
+        """
+        if not self.settings.bedrock_limiter_enabled:
+            return await aws_call("bedrock", operation, self._invoke_model, model_id, body)
+        limiter = get_limiter(model_id)
+        priority = call_priority(feature)
+        throttle_retries = self.settings.bedrock_throttle_retries
+        transient_retries = max(0, self.settings.aws_max_attempts - 1)
+        throttled = failed = 0
+        for attempt in range(throttle_retries + transient_retries + 1):
+            granted_at = await limiter.acquire(priority)
+            outcome = "error"
+            try:
+                result = await aws_call("bedrock", operation, self._invoke_model, model_id, body)
+                outcome = "ok"
+                return result
+            except Exception as e:
+                if is_throttling(e):
+                    outcome = "throttled"
+                    throttled += 1
+                    if throttled > throttle_retries:
+                        raise
+                elif is_transient(e):
+                    failed += 1
+                    if failed > transient_retries:
+                        raise
+                else:
+                    raise
+            finally:
+                limiter.release(granted_at, outcome)
+            # Back off without holding a slot
+            await asyncio.sleep(backoff_delay(attempt, self.settings.bedrock_backoff_base_s, self.settings.bedrock_backoff_max_s))
+
+    def _invoke_model(self, model_id: str, body: dict) -> dict:
+        """Blocking InvokeModel call; runs on the AWS executor."""
+        response = self.client.invoke_model(
+            modelId=model_id,
+            body=json.dumps(body),
+            contentType="application/json",
+        )
+        return json.loads(response["body"].read())
+
     def _fallback_response(self, prompt: str) -> str:
         """Return a reasonable fallback when Bedrock is unavailable."""
         return '{"note": "Bedrock unavailable, using cached demo data"}'
 
 bedrock_client = BedrockClient()
+
+
+def _cache_metrics():
+    embeddings = bedrock_client.embedding_cache
+    yield from cache_samples("embedding", embeddings.hits, embeddings.misses)
+    totals = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+    for counters in list(bedrock_client.response_cache.counters.values()):
+        for k in totals:
+            totals[k] += counters[k]
+    # A memory miss falls through to the disk tier
+    yield from cache_samples("llm_memory", totals["memory_hits"], totals["disk_hits"] + totals["misses"])
+    yield from cache_samples("llm_disk", totals["disk_hits"], totals["misses"])
+
+
+metrics.register_collector(_cache_metrics)
@@ -1,21 +1,26 @@
+import asyncio
 import json
 import time
 import os
+import threading
+from app.config import get_settings
 from app.services.bedrock import bedrock_client
 from app.services.aws_nlp import aws_nlp
-from app.services.utils import extract_json
-from app.models.schemas import ClassifyResponse, CategoryResult, ProductAttributes, ConfidenceBand
-from app.models.database import add_classification
+from app.services.fast_classifier import FastPathClassifier
+from app.services.limiter import background_work
+from app.services.streaming import StageCallback, emit_stage
+from app.services.tracing import span, trace_scope
+from app.services.taxonomy import CompiledTaxonomy, TaxonomyLoader
+from app.services.utils import extract_json, text_fingerprint
+from app.models.schemas import (
+    BatchClassifyItem, BatchClassifyResponse, ClassifyResponse, CategoryResult, ProductAttributes, ConfidenceBand,
+)
+from app.models.database import add_classification, category_corrections, corrections_version
 
 # Load demo scenarios for cache
 _demo_cache = {}
 _data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 
-# Load ONDC taxonomy for prompt injection and validation
-_ondc_taxonomy = {}
-_valid_hsn_codes = set()
-_valid_category_codes = {}  # code -> {"category": "L1 > L2 > L3", "hsn": "XXXX"}
-
 def _load_cache():
     global _demo_cache
     try:
@@ -27,43 +32,7 @@ def _load_cache():
     except Exception:
         pass
 
-def _load_taxonomy():
-    global _ondc_taxonomy, _valid_hsn_codes, _valid_category_codes
-    try:
-        with open(os.path.join(_data_dir, "ondc_categories.json")) as f:
-            _ondc_taxonomy = json.load(f)
-            for cat in _ondc_taxonomy.get("categories", []):
-                l1 = cat["l1"]
-                for sub in cat.get("subcategories", []):
-                    l2 = sub["l2"]
-                    for item in sub.get("items", []):
-                        l3 = item["l3"]
-                        code = item["l3_code"]
-                        hsn = item["hsn"]
-                        full_cat = f"{l1} > {l2} > {l3}"
-                        _valid_hsn_codes.add(hsn)
-                        _valid_category_codes[code] = {"category": full_cat, "hsn": hsn}
-    except Exception:
-        pass
-
 _load_cache()
-_load_taxonomy()
-
-
-def _build_taxonomy_text() -> str:
-    """Build a compact taxonomy string for the classification prompt."""
-    lines = []
-    for cat in _ondc_taxonomy.get("categories", []):
-        l1 = cat["l1"]
-        l1_code = cat["l1_code"]
-        for sub in cat.get("subcategories", []):
-            l2 = sub["l2"]
-            for item in sub.get("items", []):
-                l3 = item["l3"]
-                code = item["l3_code"]
-                hsn = item["hsn"]
-                lines.append(f"  {l1} > {l2} > {l3}  (code: {code}, HSN: {hsn})")
-    return "\n".join(lines)
 
 
 CLASSIFICATION_PROMPT = """You are an expert product classifier for Indian MSME products using the ONDC (Open Network for Digital Commerce) taxonomy.
@@ -148,6 +117,43 @@ Location: {location}
 
 Return ONLY the JSON object (no markdown fences, no explanation)."""
 
+# Taxonomy text, few-shot block and code/HSN tables, compiled once per file version
+_taxonomy = TaxonomyLoader(
+    os.path.join(_data_dir, "ondc_categories.json"),
+    CLASSIFICATION_PROMPT,
+    request_fields=("text", "location"),
+    synonyms_path=os.path.join(_data_dir, "category_synonyms.json"),
+)
+
+
+def _build_classification_prompt(taxonomy: CompiledTaxonomy, text: str, location: str, original_text: str | None = None) -> str:
+    """Render the classification prompt with a retrieval-pruned category list.
+
+    Falls back to the full taxonomy when retrieval is disabled or not
+    confident (see TAXONOMY_RETRIEVAL_MIN_SCORE / _MIN_COVERAGE).
+    """
+    settings = get_settings()
+    if settings.taxonomy_retrieval_enabled:
+        # Hinglish terms in the original often survive translation badly, so search both
+        query = text if not original_text or original_text == text else f"{text}\n{original_text}"
+        hits = taxonomy.retriever.candidates(
+            query,
+            settings.taxonomy_retrieval_k,
+            settings.taxonomy_retrieval_min_score,
+            settings.taxonomy_retrieval_min_coverage,
+        )
+        if hits:
+            candidates = taxonomy.with_neighbours([i for i, _ in hits], settings.taxonomy_retrieval_k)
+            return taxonomy.render_prompt(
+                taxonomy=taxonomy.taxonomy_block(candidates),
+                text=text,
+                location=location,
+            )
+    return taxonomy.render_prompt(text=text, location=location)
+
+
+CLASSIFICATION_SYSTEM = "You are a product classification expert for Indian MSME products. Return only valid JSON matching the exact schema shown."
+
 
 def _get_confidence_band(confidence: float) -> ConfidenceBand:
     if confidence >= 0.85:
@@ -159,14 +165,137 @@ def _get_confidence_band(confidence: float) -> ConfidenceBand:
 
 def _validate_hsn(hsn_code: str) -> str:
     """Validate HSN code against taxonomy. Return the code if valid, or '9999' fallback."""
-    if hsn_code in _valid_hsn_codes:
+    if hsn_code in _taxonomy.get().valid_hsn_codes:
         return hsn_code
     return "9999"
 
 
 def _validate_category_code(code: str) -> bool:
     """Check if a category code exists in our taxonomy."""
-    return code in _valid_category_codes
+    return code in _taxonomy.get().category_codes
+
+
+# Local classifier for routine products; retrained when the taxonomy or the category corrections change
+fast_path = FastPathClassifier()
+_fast_path_version = None
+_fast_path_lock = threading.Lock()  # held while a (re)training runs
+
+
+def _resolve_category(taxonomy: CompiledTaxonomy, value: str) -> str | None:
+    """Map an override value (L3 code, full category path or L3 name, any case) to a taxonomy category."""
+    if value in taxonomy.category_codes:
+        return taxonomy.category_codes[value]["category"]
+    wanted = value.strip().casefold()
+    for item in taxonomy.items:
+        category = item["category"]
+        if category.casefold() == wanted or category.rsplit(" > ", 1)[-1].casefold() == wanted:
+            return category
+    return None
+
+
+def resolve_category(value: str) -> str | None:
+    """The taxonomy category path an admin override value names, or None if it names none."""
+    return _resolve_category(_taxonomy.get(), value)
+
+
+def _fast_path_examples(taxonomy: CompiledTaxonomy) -> list[tuple[str, str]]:
+    """Training pairs: taxonomy names and synonyms, demo scenarios, admin category overrides."""
+    examples = []
+    for item in taxonomy.items:
+        category = item["category"]
+        _, l2, l3 = category.split(" > ")
+        examples.append((l3, category))
+        examples.append((f"{l2} {l3}", category))
+        examples.extend((term, category) for term in taxonomy.synonyms.get(category, ()))
+
+    for text, scenario in _demo_cache.items():
+        category = _resolve_category(taxonomy, scenario["expected_classification"]["top_3"][0]["category"])
+        if category:
+            examples.append((text, category))
+
+    for text, value in list(category_corrections.values()):
+        category = _resolve_category(taxonomy, value)
+        if category:
+            examples.append((text, category))
+    return examples
+
+
+def _retrain_fast_path(taxonomy: CompiledTaxonomy, version: tuple) -> None:
+    """Train on the current examples; the caller holds _fast_path_lock."""
+    global _fast_path_version
+    try:
+        fast_path.train(_fast_path_examples(taxonomy))
+    except Exception as e:
+        print(f"Fast-path classifier training error: {e}")
+    finally:
+        _fast_path_version = version
+
+
+def train_fast_path() -> FastPathClassifier:
+    """Train now in the calling thread, unless up to date (startup, scripts)."""
+    taxonomy = _taxonomy.get()
+    version = (id(taxonomy), corrections_version())
+    with _fast_path_lock:
+        if version != _fast_path_version:
+            _retrain_fast_path(taxonomy, version)
+    return fast_path
+
+
+def _get_fast_path(taxonomy: CompiledTaxonomy) -> FastPathClassifier:
+    """The classifier. Stale models retrain on a background thread while the old one keeps serving."""
+    version = (id(taxonomy), corrections_version())
+    if version != _fast_path_version and _fast_path_lock.acquire(blocking=False):
+        def retrain():
+            try:
+                _retrain_fast_path(taxonomy, version)
+            finally:
+                _fast_path_lock.release()
+        threading.Thread(target=retrain, name="fast-path-train", daemon=True).start()
+    return fast_path
+
+
+def _classify_fast(taxonomy: CompiledTaxonomy, text: str) -> tuple[list[CategoryResult], str] | None:
+    """Top categories and HSN from the local classifier, or None unless its top answer is GREEN."""
+    predictions = _get_fast_path(taxonomy).predict(text, min_similarity=get_settings().fast_path_min_similarity)
+    if not predictions or _get_confidence_band(predictions[0][1]) != ConfidenceBand.GREEN:
+        return None
+    by_category = {item["category"]: item for item in taxonomy.items}
+    top_cats = [
+        CategoryResult(
+            category=category,
+            code=by_category[category]["code"],
+            confidence=round(confidence, 3),
+            band=_get_confidence_band(confidence),
+        )
+        for category, confidence in predictions
+    ]
+    return top_cats, by_category[predictions[0][0]]["hsn"]
+
+
+def _classify_corrected(taxonomy: CompiledTaxonomy, text: str) -> tuple[list[CategoryResult], str] | None:
+    """The category an admin override set for this product text (see database.add_override), if any."""
+    correction = category_corrections.get(text_fingerprint(text))
+    category = _resolve_category(taxonomy, correction[1]) if correction else None
+    if category is None:
+        return None
+    item = next(item for item in taxonomy.items if item["category"] == category)
+    top = CategoryResult(category=category, code=item["code"], confidence=1.0, band=ConfidenceBand.GREEN)
+    return [top], item["hsn"]
+
+
+def local_category(text: str) -> str | None:
+    """The top category an admin correction or a demo scenario will give this text, if either does."""
+    if category_corrections:
+        corrected = _classify_corrected(_taxonomy.get(), text)
+        if corrected:
+            return corrected[0][0].category
+    scenario = _demo_cache.get(text)
+    return scenario["expected_classification"]["top_3"][0]["category"] if scenario else None
+
+
+async def forget_classification(text: str) -> int:
+    """Drop cached Bedrock classifications of this product text, e.g. after an override."""
+    return await bedrock_client.forget_tagged(text_fingerprint(text))
 
 
 def _normalize_confidences(top_3: list[dict]) -> list[dict]:
@@ -183,12 +312,54 @@ def _normalize_confidences(top_3: list[dict]) -> list[dict]:
     return top_3
 
 
-async def classify_product(text: str, language: str = "en", location: str = "India") -> ClassifyResponse:
+async def classify_product(
+    text: str,
+    language: str = "en",
+    location: str = "India",
+    detected_lang: str | None = None,
+    translated_text: str | None = None,
+    on_stage: StageCallback | None = None,
+) -> ClassifyResponse:
+    """Classify one product description.
+
+    `detected_lang` / `translated_text` let bulk callers pass language
+    detection and translation they have already done for many texts at once.
+    `on_stage` receives "language", "translation" and "classified" events
+    as those stages finish (used by the streaming endpoint).
+    """
     start = time.time()
+    with trace_scope("classify") as trace:
+        response = _classify_local(text, language, location, start)
+        if response:
+            await emit_stage(on_stage, "classified", _classified_event(response.top_categories, response.hsn_code, response.attributes))
+        else:
+            response = await _classify_remote(text, location, start, detected_lang, translated_text, on_stage)
+    response.stage_timings = trace.timings()
+    return response
+
+
+def _classified_event(top_cats: list[CategoryResult], hsn: str, attrs: ProductAttributes) -> dict:
+    return {
+        "top_categories": [c.model_dump(mode="json") for c in top_cats],
+        "hsn_code": hsn,
+        "attributes": attrs.model_dump(exclude_none=True),
+    }
+
+
+def _classify_local(text: str, language: str, location: str, start: float) -> ClassifyResponse | None:
+    """Answer from admin corrections, the demo cache or the fast-path classifier, without any AWS call."""
+    # Admin corrections win over every other answer
+    if category_corrections:
+        with span("corrections"):
+            corrected = _classify_corrected(_taxonomy.get(), text)
+        if corrected:
+            return _fast_path_response(text, None, aws_nlp.detect_language_local(text), *corrected, location, start,
+                                       source="correction")
 
     # Check demo cache first
-    if text in _demo_cache:
-        scenario = _demo_cache[text]
+    with span("cache_lookup"):
+        scenario = _demo_cache.get(text)
+    if scenario:
         cls = scenario["expected_classification"]
         translated = scenario["input"]["text_en"] if language == "hi" else None
 
@@ -203,18 +374,21 @@ async def classify_product(text: str, language: str = "en", location: str = "Ind
 
         attrs = ProductAttributes(**cls["attributes"])
 
-        elapsed = (time.time() - start) * 1000 + 120
-
         ondc = _generate_ondc_catalog(top_cats[0], attrs, text)
 
-        add_classification({
-            "text": text,
-            "category": top_cats[0].category,
-            "confidence": top_cats[0].confidence,
-            "band": top_cats[0].band.value,
-            "hsn": cls["hsn"],
-            "processing_time_ms": elapsed
-        })
+        elapsed = (time.time() - start) * 1000
+        if get_settings().simulated_latency_enabled:
+            elapsed += 120  # legacy demo padding
+
+        with span("persistence"):
+            add_classification({
+                "text": text,
+                "category": top_cats[0].category,
+                "confidence": top_cats[0].confidence,
+                "band": top_cats[0].band.value,
+                "hsn": cls["hsn"],
+                "processing_time_ms": elapsed
+            })
 
         return ClassifyResponse(
             original_text=text,
@@ -224,32 +398,67 @@ async def classify_product(text: str, language: str = "en", location: str = "Ind
             hsn_code=cls["hsn"],
             attributes=attrs,
             ondc_catalog=ondc,
-            processing_time_ms=round(elapsed, 1)
+            processing_time_ms=round(elapsed, 3)
         )
 
+    # Routine products: answer locally before any AWS call
+    if get_settings().fast_path_enabled:
+        with span("fast_path"):
+            fast = _classify_fast(_taxonomy.get(), text)
+        if fast:
+            return _fast_path_response(text, None, aws_nlp.detect_language_local(text), *fast, location, start)
+    return None
+
+
+async def _classify_remote(
+    text: str,
+    location: str,
+    start: float,
+    detected_lang: str | None = None,
+    translated_text: str | None = None,
+    on_stage: StageCallback | None = None,
+) -> ClassifyResponse:
+    taxonomy = _taxonomy.get()
+    use_fast_path = get_settings().fast_path_enabled
+
     # Live classification via Bedrock
-    detected_lang = await aws_nlp.detect_language(text)
-    translated_text = None
+    if detected_lang is None:
+        with span("language_detection"):
+            detected_lang = await aws_nlp.detect_language(text)
+    await emit_stage(on_stage, "language", {"language_detected": detected_lang})
     classification_text = text
 
-    if detected_lang == "hi":
-        translated_text = await aws_nlp.translate(text, "hi", "en")
+    if detected_lang != "hi":
+        translated_text = None
+    else:
+        if translated_text is None:
+            with span("translation"):
+                translated_text = await aws_nlp.translate(text, "hi", "en")
+        await emit_stage(on_stage, "translation", {"translated_text": translated_text})
         classification_text = translated_text
-
-    taxonomy_text = _build_taxonomy_text()
-    prompt = CLASSIFICATION_PROMPT.format(
-        taxonomy=taxonomy_text,
-        text=classification_text,
-        location=location,
-    )
+        # The English translation may be routine even when the original was not
+        if use_fast_path and translated_text != text:
+            with span("fast_path"):
+                fast = _classify_fast(taxonomy, translated_text)
+            if fast:
+                await emit_stage(on_stage, "classified", _classified_event(fast[0], fast[1], ProductAttributes()))
+                return _fast_path_response(text, translated_text, detected_lang, *fast, location, start)
+
+    with span("prompt_build"):
+        prompt = _build_classification_prompt(taxonomy, classification_text, location, original_text=text)
     result = await bedrock_client.invoke_claude(
         prompt,
-        system="You are a product classification expert for Indian MSME products. Return only valid JSON matching the exact schema shown."
+        system=CLASSIFICATION_SYSTEM,
+        feature="classification",
+        tag=text_fingerprint(text),
     )
 
-    parsed = extract_json(result)
+    with span("json_extraction"):
+        parsed = extract_json(result)
 
     if not parsed or "top_3" not in parsed:
+        # Don't keep serving an unusable answer from the response cache
+        await bedrock_client.forget_response(prompt, system=CLASSIFICATION_SYSTEM)
         parsed = {
             "top_3": [
                 {"category": "General > Uncategorized", "code": "GN-UC-UC", "confidence": 0.5},
@@ -276,19 +485,25 @@ async def classify_product(text: str, language: str = "en", location: str = "Ind
         ))
 
     attrs = ProductAttributes(**parsed.get("attributes", {}))
+    await emit_stage(on_stage, "classified", _classified_event(top_cats, hsn, attrs))
 
-    elapsed = (time.time() - start) * 1000
+    with span("ondc_build"):
+        ondc = _generate_ondc_catalog(top_cats[0] if top_cats else None, attrs, classification_text)
 
-    ondc = _generate_ondc_catalog(top_cats[0] if top_cats else None, attrs, classification_text)
+    elapsed = (time.time() - start) * 1000
 
-    add_classification({
-        "text": text,
-        "category": top_cats[0].category if top_cats else "Unknown",
-        "confidence": top_cats[0].confidence if top_cats else 0,
-        "band": top_cats[0].band.value if top_cats else "RED",
-        "hsn": hsn,
-        "processing_time_ms": elapsed
-    })
+    with span("persistence"):
+        add_classification({
+            "text": text,
+            "category": top_cats[0].category if top_cats else "Unknown",
+            "confidence": top_cats[0].confidence if top_cats else 0,
+            "band": top_cats[0].band.value if top_cats else "RED",
+            "hsn": hsn,
+            "processing_time_ms": elapsed,
+            "source": "bedrock",
+        })
+    if use_fast_path:
+        fast_path.record(accepted=False, elapsed_ms=elapsed)
 
     return ClassifyResponse(
         original_text=text,
@@ -298,7 +513,117 @@ async def classify_product(text: str, language: str = "en", location: str = "Ind
         hsn_code=hsn,
         attributes=attrs,
         ondc_catalog=ondc,
-        processing_time_ms=round(elapsed, 1)
+        processing_time_ms=round(elapsed, 3)
+    )
+
+
+async def classify_batch(texts: list[str], language: str = "en", location: str = "India") -> BatchClassifyResponse:
+    """Classify many product descriptions, e.g. a seller's whole catalog.
+
+    Identical texts are classified once. Texts answered by the demo cache or
+    the fast path never reach AWS; the rest get language detection and
+    translation in bulk, then run through Bedrock with bounded concurrency.
+    One item failing does not fail the batch. Each item's processing_time_ms
+    covers its own work (not the shared detection/translation calls, nor time
+    spent waiting for a slot); the batch's covers the whole call.
+    """
+    start = time.time()
+    settings = get_settings()
+    unique = list(dict.fromkeys(texts))
+    outcomes: dict[str, ClassifyResponse | Exception] = {}
+
+    pending = []
+    for i, text in enumerate(unique):
+        try:
+            with trace_scope("classify") as trace:
+                local = _classify_local(text, language, location, time.time())
+        except Exception as e:
+            outcomes[text] = e
+            continue
+        if local:
+            local.stage_timings = trace.timings()
+            outcomes[text] = local
+        else:
+            pending.append(text)
+        if i % 64 == 63:
+            await asyncio.sleep(0)  # keep the event loop responsive on big batches
+
+    if pending:
+        with span("language_detection"):
+            languages = await aws_nlp.detect_languages(pending)
+        hindi = [t for t, lang in zip(pending, languages) if lang == "hi"]
+        with span("translation"):
+            translations = dict(zip(hindi, await aws_nlp.translate_many(hindi, "hi", "en")))
+        semaphore = asyncio.Semaphore(max(1, settings.classify_batch_concurrency))
+
+        async def run(text: str, lang: str):
+            background_work.set(True)  # this task only: interactive requests go first
+            async with semaphore:
+                try:
+                    with trace_scope("classify") as trace:
+                        response = await _classify_remote(text, location, time.time(), lang, translations.get(text))
+                    response.stage_timings = trace.timings()
+                    outcomes[text] = response
+                except Exception as e:
+                    print(f"Batch classification error: {e}")
+                    outcomes[text] = e
+
+        await asyncio.gather(*(run(t, lang) for t, lang in zip(pending, languages)))
+
+    results = []
+    for i, text in enumerate(texts):
+        outcome = outcomes[text]
+        if isinstance(outcome, Exception):
+            results.append(BatchClassifyItem(index=i, error=f"{type(outcome).__name__}: {outcome}"))
+        else:
+            results.append(BatchClassifyItem(index=i, result=outcome))
+
+    return BatchClassifyResponse(
+        results=results,
+        total=len(texts),
+        unique=len(unique),
+        failed=sum(1 for r in results if r.error),
+        processing_time_ms=round((time.time() - start) * 1000, 1),
+    )
+
+
+def _fast_path_response(
+    text: str,
+    translated_text: str | None,
+    language: str,
+    top_cats: list[CategoryResult],
+    hsn: str,
+    location: str,
+    start: float,
+    source: str = "fast_path",
+) -> ClassifyResponse:
+    """Build the response for a local (fast-path or corrected) answer. Attributes are not extracted locally."""
+    attrs = ProductAttributes(origin=location if location != "India" else None)
+    elapsed = (time.time() - start) * 1000
+    ondc = _generate_ondc_catalog(top_cats[0], attrs, translated_text or text)
+
+    with span("persistence"):
+        add_classification({
+            "text": text,
+            "category": top_cats[0].category,
+            "confidence": top_cats[0].confidence,
+            "band": top_cats[0].band.value,
+            "hsn": hsn,
+            "processing_time_ms": elapsed,
+            "source": source,
+        })
+    if source == "fast_path":
+        fast_path.record(accepted=True, elapsed_ms=elapsed)
+
+    return ClassifyResponse(
+        original_text=text,
+        translated_text=translated_text,
+        language_detected=language,
+        top_categories=top_cats,
+        hsn_code=hsn,
+        attributes=attrs,
+        ondc_catalog=ondc,
+        processing_time_ms=round(elapsed, 3)
     )
 
 
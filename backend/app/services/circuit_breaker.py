@@ -0,0 +1,178 @@
+"""Circuit breakers for upstream models.
+
+A breaker watches the outcome of calls to one model. While closed, calls
+go through and outcomes are kept for a rolling window; once the window
+holds at least `failure_threshold` failures that make up at least
+`failure_rate` of its calls, the breaker opens. While open, calls fail at
+once with `CircuitOpenError` (callers serve their fallback) instead of
+waiting out timeouts and retries. After `reset_timeout_s` the breaker is
+half-open: up to `half_open_probes` calls are let through, and the first
+result decides between closing again and another open period.
+
+Only outage-like errors count as failures: throttling, 5xx responses and
+connection/timeout errors. A 4xx such as a validation error is the
+request's fault, not the model's, and missing credentials or region are a
+deployment problem that failing fast would not help with.
+"""
+import time
+from collections import deque
+
+from botocore.exceptions import (
+    ClientError, CredentialRetrievalError, NoCredentialsError, NoRegionError, ParamValidationError,
+    PartialCredentialsError,
+)
+
+from app.config import get_settings
+from app.services.aws_runtime import is_throttling
+from app.services.limiter import QueueFullError
+from app.services.metrics import metrics
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+_CONFIG_ERRORS = (
+    NoCredentialsError, PartialCredentialsError, CredentialRetrievalError, NoRegionError, ParamValidationError,
+)
+
+
+class CircuitOpenError(RuntimeError):
+    """The breaker is open: the call was not attempted."""
+
+
+def is_outage(error: Exception) -> bool:
+    if isinstance(error, QueueFullError):
+        return False  # our own load shedding, not the model's
+    if isinstance(error, _CONFIG_ERRORS):
+        return False  # credentials/configuration: not an outage of the model
+    if isinstance(error, ClientError):
+        status = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+        return is_throttling(error) or status >= 500
+    return True  # connection errors, timeouts, ...
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        failure_rate: float = 0.5,
+        window_s: float = 30.0,
+        reset_timeout_s: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.failure_rate = failure_rate
+        self.window_s = window_s
+        self.reset_timeout_s = reset_timeout_s
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.rejected = 0  # calls failed fast while open
+        self.transitions = {CLOSED: 0, OPEN: 0, HALF_OPEN: 0}
+        self._outcomes: deque[tuple[float, bool]] = deque()  # (monotonic time, failed)
+        self._failures = 0
+        self._probes = 0
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            print(f"Circuit breaker {self.name}: {self.state} -> {state}")
+            self.state = state
+            self.transitions[state] += 1
+
+    def _trim(self, now: float) -> None:
+        while self._outcomes and self._outcomes[0][0] < now - self.window_s:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now; a True in half-open state takes a probe slot."""
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout_s:
+                self.rejected += 1
+                return False
+            self._set_state(HALF_OPEN)
+            self._probes = 0
+        if self.state == HALF_OPEN:
+            if self._probes >= self.half_open_probes:
+                self.rejected += 1
+                return False
+            self._probes += 1
+        return True
+
+    def record(self, failed: bool) -> None:
+        now = time.monotonic()
+        if self.state == HALF_OPEN:
+            if failed:
+                self._trip(now)
+            else:
+                self._set_state(CLOSED)
+                self._outcomes.clear()
+                self._failures = 0
+            return
+        self._outcomes.append((now, failed))
+        self._failures += failed
+        self._trim(now)
+        if (
+            self.state == CLOSED
+            and self._failures >= self.failure_threshold
+            and self._failures >= self.failure_rate * len(self._outcomes)
+        ):
+            self._trip(now)
+
+    def _trip(self, now: float) -> None:
+        self._set_state(OPEN)
+        self.opened_at = now
+        self._outcomes.clear()
+        self._failures = 0
+
+    async def call(self, fn, *args, **kwargs):
+        """Await `fn(*args, **kwargs)` through the breaker; raises CircuitOpenError while open."""
+        if not self.allow():
+            raise CircuitOpenError(f"circuit for {self.name} is open")
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            self.record(is_outage(e))
+            raise
+        except BaseException:
+            # Cancelled: no verdict, but give the probe slot back
+            if self.state == HALF_OPEN:
+                self._probes -= 1
+            raise
+        self.record(False)
+        return result
+
+    def stats(self) -> dict:
+        stats = {"state": self.state, "rejected": self.rejected, "opened": self.transitions[OPEN]}
+        if self.state == OPEN:
+            stats["retry_in_s"] = round(max(0.0, self.reset_timeout_s - (time.monotonic() - self.opened_at)), 1)
+        return stats
+
+
+breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """The breaker for one upstream model, created with the configured thresholds."""
+    breaker = breakers.get(name)
+    if breaker is None:
+        settings = get_settings()
+        breaker = breakers[name] = CircuitBreaker(
+            name,
+            failure_threshold=settings.circuit_failure_threshold,
+            failure_rate=settings.circuit_failure_rate,
+            window_s=settings.circuit_window_s,
+            reset_timeout_s=settings.circuit_reset_timeout_s,
+            half_open_probes=settings.circuit_half_open_probes,
+        )
+    return breaker
+
+
+def _breaker_metrics():
+    for name, breaker in list(breakers.items()):
+        yield "circuit_breaker_state", (name,), _STATE_VALUES[breaker.state]
+        yield "circuit_breaker_rejected_total", (name,), breaker.rejected
+        yield "circuit_breaker_opened_total", (name,), breaker.transitions[OPEN]
+
+
+metrics.register_collector(_breaker_metrics)
@@ -0,0 +1,208 @@
+"""In-process fast-path product classifier for CatalogAI.
+
+A nearest-centroid classifier over TF-IDF weighted character n-grams
+(within word boundaries, so "peetal"/"pital" or "diya"/"diyas" still share
+features) plus whole words. It is trained from the taxonomy names and
+synonyms, the demo scenarios and admin category overrides, and its softmax
+temperature is fitted by leave-one-out so the top probability can be
+compared against the GREEN band threshold. Routine products are answered
+here; everything else escalates to Bedrock.
+
+The softmax only ranks categories against each other, so it is confident
+about texts that match nothing well. Input features never seen in training
+therefore still count towards the input's norm (as the rarest known
+feature would), and a prediction whose best raw cosine is below
+`min_similarity` is discarded: "phone cover" shares only "cover" with
+cushion covers and escalates.
+"""
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+import numpy as np
+
+from app.services.utils import normalize_text
+
+_WORD = re.compile(r"\w+")
+_TEMPERATURES = np.geomspace(0.005, 1.0, 60)
+_DEFAULT_TEMPERATURE = 0.05
+
+
+def features(text: str, ngram_range: tuple[int, int] = (3, 5)) -> Counter:
+    """Word-boundary char n-grams plus whole words ("w:" prefixed) with raw counts."""
+    counts = Counter()
+    lo, hi = ngram_range
+    for word in _WORD.findall(normalize_text(text)):
+        if word.isdigit():
+            continue
+        counts["w:" + word] += 1
+        padded = f" {word} "
+        for n in range(lo, hi + 1):
+            for i in range(len(padded) - n + 1):
+                counts[padded[i:i + n]] += 1
+    return counts
+
+
+class FastPathClassifier:
+    """Nearest-centroid TF-IDF classifier with a calibrated softmax confidence."""
+
+    def __init__(self):
+        # (labels, idf, postings: feature -> (class indices, centroid weights), temperature, unseen idf)
+        self._model: tuple = ([], {}, {}, _DEFAULT_TEMPERATURE, 0.0)
+        self.n_examples = 0
+        self.stats = {"accepted": 0, "escalated": 0, "accepted_ms": 0.0, "escalated_ms": 0.0}
+        self._stats_lock = threading.Lock()
+
+    @staticmethod
+    def _vector(text: str, idf: dict[str, float], unseen_idf: float = 0.0) -> dict[str, float]:
+        """Sublinear TF-IDF vector, L2-normalized. Unknown features are dropped
+        from the vector but weigh `unseen_idf` in its norm."""
+        vec = {}
+        norm_sq = 0.0
+        for f, tf in features(text).items():
+            weight = (1.0 + math.log(tf)) * idf.get(f, unseen_idf)
+            norm_sq += weight * weight
+            if f in idf:
+                vec[f] = weight
+        norm = math.sqrt(norm_sq)
+        return {f: w / norm for f, w in vec.items()} if vec and norm else {}
+
+    def train(self, examples: list[tuple[str, str]]) -> "FastPathClassifier":
+        """Fit on (text, label) pairs. Replaces any previous model.
+
+        The new model is built aside and swapped in at the end, so concurrent
+        `predict` calls keep using the old one meanwhile.
+        """
+        examples = [(t, l) for t, l in examples if t and l]
+        labels = sorted({l for _, l in examples})
+        label_index = {l: i for i, l in enumerate(labels)}
+
+        df = Counter()
+        for text, _ in examples:
+            df.update(features(text).keys())
+        n = len(examples)
+        idf = {f: math.log((1 + n) / (1 + d)) + 1.0 for f, d in df.items()}
+
+        vectors = [self._vector(text, idf) for text, _ in examples]
+        sums: list[dict[str, float]] = [defaultdict(float) for _ in labels]
+        for vec, (_, label) in zip(vectors, examples):
+            acc = sums[label_index[label]]
+            for f, w in vec.items():
+                acc[f] += w
+        sum_norms = np.array([math.sqrt(sum(w * w for w in s.values())) or 1.0 for s in sums])
+
+        postings: dict[str, list[tuple[int, float]]] = defaultdict(list)
+        for c, s in enumerate(sums):
+            for f, w in s.items():
+                postings[f].append((c, w))
+        # Unnormalized class sums first: leave-one-out calibration needs them
+        postings = {
+            f: (np.array([c for c, _ in p], dtype=np.int32), np.array([w for _, w in p]))
+            for f, p in postings.items()
+        }
+        temperature = self._fit_temperature(
+            postings, len(labels), vectors, [label_index[l] for _, l in examples], sum_norms
+        )
+        postings = {f: (idx, w / sum_norms[idx]) for f, (idx, w) in postings.items()}
+
+        self._model = (labels, idf, postings, temperature, math.log(1 + n) + 1.0)
+        self.n_examples = n
+        return self
+
+    @property
+    def labels(self) -> list[str]:
+        return self._model[0]
+
+    @property
+    def temperature(self) -> float:
+        return self._model[3]
+
+    @staticmethod
+    def _dots(postings: dict, n_labels: int, vec: dict[str, float]) -> np.ndarray:
+        idx, weights = [], []
+        for f, w in vec.items():
+            posting = postings.get(f)
+            if posting is not None:
+                idx.append(posting[0])
+                weights.append(w * posting[1])
+        if not idx:
+            return np.zeros(n_labels)
+        return np.bincount(np.concatenate(idx), np.concatenate(weights), minlength=n_labels)
+
+    def _fit_temperature(
+        self, postings: dict, n_labels: int, vectors: list[dict], targets: list[int], sum_norms: np.ndarray
+    ) -> float:
+        """Leave-one-out NLL minimisation over a temperature grid.
+
+        Each example is scored against its own class centroid with itself
+        removed, so the confidence reflects unseen texts rather than recall
+        of the training set. Classes with a single example are skipped.
+        """
+        class_sizes = Counter(targets)
+        rows = []
+        for vec, y in zip(vectors, targets):
+            if class_sizes[y] < 2 or not vec:
+                continue
+            dots = self._dots(postings, n_labels, vec)  # v . sum_c
+            cos = dots / sum_norms
+            own_norm_sq = sum_norms[y] ** 2 - 2 * dots[y] + 1.0
+            cos[y] = (dots[y] - 1.0) / math.sqrt(own_norm_sq) if own_norm_sq > 1e-12 else 0.0
+            rows.append((cos, y))
+        if not rows:
+            return _DEFAULT_TEMPERATURE
+        cos = np.stack([r[0] for r in rows])
+        y = np.array([r[1] for r in rows])
+        best_t, best_nll = _DEFAULT_TEMPERATURE, math.inf
+        for t in _TEMPERATURES:
+            z = cos / t
+            z -= z.max(axis=1, keepdims=True)
+            log_p = z[np.arange(len(y)), y] - np.log(np.exp(z).sum(axis=1))
+            nll = -log_p.mean()
+            if nll < best_nll:
+                best_t, best_nll = float(t), nll
+        return best_t
+
+    def predict(self, text: str, k: int = 3, min_similarity: float = 0.0) -> list[tuple[str, float]]:
+        """Top-`k` (label, calibrated probability) pairs, best first.
+
+        Empty if nothing is known or the best cosine similarity to a class
+        centroid is below `min_similarity`.
+        """
+        labels, idf, postings, temperature, unseen_idf = self._model
+        if not labels:
+            return []
+        vec = self._vector(text, idf, unseen_idf)
+        if not vec:
+            return []
+        cos = self._dots(postings, len(labels), vec)
+        if cos.max() < min_similarity:
+            return []
+        z = cos / temperature
+        p = np.exp(z - z.max())
+        p /= p.sum()
+        order = np.argsort(-p, kind="stable")[:k]
+        return [(labels[i], float(p[i])) for i in order]
+
+    def record(self, accepted: bool, elapsed_ms: float):
+        """Count a request as answered locally or escalated, with its end-to-end latency."""
+        key = "accepted" if accepted else "escalated"
+        with self._stats_lock:
+            self.stats[key] += 1
+            self.stats[f"{key}_ms"] += elapsed_ms
+
+    def summary(self) -> dict:
+        with self._stats_lock:
+            s = dict(self.stats)
+        total = s["accepted"] + s["escalated"]
+        return {
+            "trained_examples": self.n_examples,
+            "labels": len(self.labels),
+            "temperature": round(self.temperature, 4),
+            "requests": total,
+            "accepted": s["accepted"],
+            "escalated": s["escalated"],
+            "escalation_rate": round(s["escalated"] / total, 3) if total else 0.0,
+            "avg_fast_path_ms": round(s["accepted_ms"] / s["accepted"], 2) if s["accepted"] else 0.0,
+            "avg_escalated_ms": round(s["escalated_ms"] / s["escalated"], 2) if s["escalated"] else 0.0,
+        }
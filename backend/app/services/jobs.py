@@ -0,0 +1,351 @@
+"""Bulk catalog ingestion jobs.
+
+A job is an uploaded CSV or JSONL catalog. Every row is stored in SQLite
+when the job is submitted and goes through the onboarding pipeline
+(classify, then platform matching and pricing) on a pool of asyncio workers.
+Each row's result is written as soon as it finishes, so progress can be
+polled while the job runs. The row table doubles as the checkpoint: after
+a crash or restart only rows that never finished are processed again.
+
+Workers live in the API process, so jobs need a long-running server
+(uvicorn), not the Lambda handler. SQLite calls run on the store's own
+thread (`JobStore.run`), never on the event loop.
+"""
+import asyncio
+import csv
+import functools
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import get_settings
+from app.services.limiter import background_work
+from app.services.onboarding import onboard_product
+
+ROW_FIELDS = ("text", "language", "location", "business_type", "lat", "lon", "price")
+_FEED_PAGE = 200  # rows read from the store per query
+
+# Job statuses: queued -> running -> completed | cancelled | failed
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobInputError(ValueError):
+    """The uploaded catalog cannot be parsed into rows."""
+
+
+def parse_rows(body: bytes, fmt: str) -> list[dict]:
+    """Parse a CSV (with a header row) or JSONL catalog into row dicts with a `text` field."""
+    try:
+        content = body.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise JobInputError(f"catalog must be UTF-8: {e}") from e
+
+    rows = []
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(content))
+        if not reader.fieldnames or "text" not in [f.strip().lower() for f in reader.fieldnames]:
+            raise JobInputError("CSV header must include a 'text' column")
+        for record in reader:
+            rows.append({(k or "").strip().lower(): (v or "").strip() for k, v in record.items()})
+    elif fmt == "jsonl":
+        for line_no, line in enumerate(content.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise JobInputError(f"line {line_no}: invalid JSON ({e.msg})") from e
+            if not isinstance(record, dict):
+                raise JobInputError(f"line {line_no}: expected a JSON object")
+            rows.append(record)
+    else:
+        raise JobInputError(f"unsupported format '{fmt}' (use csv or jsonl)")
+
+    cleaned = []
+    for record in rows:
+        row = {k: record[k] for k in ROW_FIELDS if record.get(k) not in (None, "")}
+        if row.get("text"):
+            cleaned.append(row)
+    if not cleaned:
+        raise JobInputError("catalog has no rows with a non-empty 'text'")
+    return cleaned
+
+
+def _float_or_none(value) -> float | None:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def process_row(row: dict) -> dict:
+    """Run one catalog row through the onboarding pipeline (classify, then match and pricing)."""
+    result = await onboard_product(
+        text=row["text"],
+        language=row.get("language", "en"),
+        location=row.get("location", "India"),
+        business_type=row.get("business_type", "B2C"),
+        lat=_float_or_none(row.get("lat")),
+        lon=_float_or_none(row.get("lon")),
+        your_price=_float_or_none(row.get("price")),
+    )
+    return result.model_dump(mode="json")
+
+
+class JobStore:
+    """SQLite (WAL) storage for jobs and their rows.
+
+    Methods are blocking; async code calls them through `run`.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-store")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, status TEXT NOT NULL, format TEXT, total_rows INTEGER NOT NULL,"
+            " processed INTEGER NOT NULL DEFAULT 0, failed INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL, error TEXT)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS job_rows ("
+            " job_id TEXT NOT NULL, row_index INTEGER NOT NULL, input TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending', result TEXT, error TEXT, finished_at REAL,"
+            " PRIMARY KEY (job_id, row_index))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_job_rows_status ON job_rows (job_id, status, row_index)")
+
+    async def run(self, fn, *args, **kwargs):
+        """Call a store method on the store thread without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def create(self, rows: list[dict], fmt: str) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT INTO jobs (id, status, format, total_rows, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, fmt, len(rows), time.time()),
+            )
+            self._db.executemany(
+                "INSERT INTO job_rows (job_id, row_index, input) VALUES (?, ?, ?)",
+                ((job_id, i, json.dumps(row, ensure_ascii=False)) for i, row in enumerate(rows)),
+            )
+            self._db.execute("COMMIT")
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            cur = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cur.fetchone()
+            return dict(zip([c[0] for c in cur.description], row)) if row else None
+
+    def recent(self, limit: int = 50) -> list[dict]:
+        with self._lock:
+            cur = self._db.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+            names = [c[0] for c in cur.description]
+            return [dict(zip(names, r)) for r in cur.fetchall()]
+
+    def unfinished(self) -> list[str]:
+        with self._lock:
+            return [r[0] for r in self._db.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", ACTIVE_STATUSES
+            )]
+
+    def set_status(self, job_id: str, status: str, error: str | None = None):
+        now = time.time()
+        with self._lock:
+            if status == "running":
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, started_at = COALESCE(started_at, ?) WHERE id = ?",
+                    (status, now, job_id),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ?, error = ? WHERE id = ?",
+                    (status, now, error, job_id),
+                )
+
+    def pending_rows(self, job_id: str, after: int, limit: int) -> list[tuple[int, dict]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT row_index, input FROM job_rows WHERE job_id = ? AND status = 'pending' AND row_index > ?"
+                " ORDER BY row_index LIMIT ?",
+                (job_id, after, limit),
+            ).fetchall()
+        return [(i, json.loads(data)) for i, data in rows]
+
+    def finish_row(self, job_id: str, row_index: int, result: dict | None, error: str | None):
+        """Checkpoint one row and bump the job's counters in the same transaction."""
+        failed = 1 if error else 0
+        with self._lock:
+            self._db.execute("BEGIN")
+            changed = self._db.execute(
+                "UPDATE job_rows SET status = ?, result = ?, error = ?, finished_at = ?"
+                " WHERE job_id = ? AND row_index = ? AND status = 'pending'",
+                ("failed" if error else "done", json.dumps(result, ensure_ascii=False) if result else None,
+                 error, time.time(), job_id, row_index),
+            ).rowcount
+            if changed:
+                self._db.execute(
+                    "UPDATE jobs SET processed = processed + 1, failed = failed + ? WHERE id = ?",
+                    (failed, job_id),
+                )
+            self._db.execute("COMMIT")
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 100, status: str | None = None) -> list[dict]:
+        query = "SELECT row_index, status, input, result, error FROM job_rows WHERE job_id = ?"
+        params: list = [job_id]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        query += " ORDER BY row_index LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self._db.execute(query, params).fetchall()
+        return [
+            {
+                "row": i,
+                "status": s,
+                "input": json.loads(data),
+                "result": json.loads(result) if result else None,
+                "error": error,
+            }
+            for i, s, data, result, error in rows
+        ]
+
+
+class JobRunner:
+    """Runs queued jobs one at a time, with `workers` rows of the active job in flight."""
+
+    def __init__(self, store: JobStore, workers: int = 8):
+        self.store = store
+        self.workers = max(1, workers)
+        self._jobs: asyncio.Queue | None = None
+        self._rows: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._cancelled: set[str] = set()
+        self._checkpoint_errors: dict[str, str] = {}  # job id -> last row checkpoint failure
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self):
+        """Start the dispatcher and workers, and requeue jobs left unfinished by the last process."""
+        if self._tasks:
+            return
+        self._jobs = asyncio.Queue()
+        self._rows = asyncio.Queue(maxsize=self.workers * 2)
+        self._tasks = [asyncio.create_task(self._dispatch())]
+        self._tasks += [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, rows: list[dict], fmt: str) -> str:
+        job_id = await self.store.run(self.store.create, rows, fmt)
+        if self._jobs is not None:
+            self._jobs.put_nowait(job_id)
+        return job_id
+
+    async def cancel(self, job_id: str) -> bool:
+        job = await self.store.run(self.store.get, job_id)
+        if not job or job["status"] not in ACTIVE_STATUSES:
+            return False
+        self._cancelled.add(job_id)
+        await self.store.run(self.store.set_status, job_id, "cancelled")
+        return True
+
+    async def _dispatch(self):
+        store = self.store
+        for job_id in await store.run(store.unfinished):
+            self._jobs.put_nowait(job_id)
+        while True:
+            job_id = await self._jobs.get()
+            try:
+                job = await store.run(store.get, job_id)
+                if not job or job["status"] not in ACTIVE_STATUSES or job_id in self._cancelled:
+                    continue
+                await store.run(store.set_status, job_id, "running")
+                last = -1
+                while job_id not in self._cancelled:
+                    page = await store.run(store.pending_rows, job_id, last, _FEED_PAGE)
+                    if not page:
+                        break
+                    for row_index, row in page:
+                        await self._rows.put((job_id, row_index, row))
+                    last = page[-1][0]
+                await self._rows.join()
+                if job_id in self._checkpoint_errors:
+                    # Some rows could not be saved and are still pending: don't report the job as done
+                    await store.run(store.set_status, job_id, "failed", error=self._checkpoint_errors[job_id])
+                elif job_id not in self._cancelled:
+                    await store.run(store.set_status, job_id, "completed")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job {job_id} error: {e}")
+                try:
+                    await store.run(store.set_status, job_id, "failed", error=str(e))
+                except Exception as e:
+                    print(f"Job {job_id} status error: {e}")
+            finally:
+                self._cancelled.discard(job_id)
+                self._checkpoint_errors.pop(job_id, None)
+
+    async def _work(self):
+        background_work.set(True)  # this worker task only: Bedrock serves interactive requests first
+        while True:
+            job_id, row_index, row = await self._rows.get()
+            try:
+                if job_id in self._cancelled:
+                    continue
+                try:
+                    result, error = await process_row(row), None
+                except asyncio.CancelledError:
+                    raise  # shutdown: the row stays pending and is redone on resume
+                except Exception as e:
+                    result, error = None, f"{type(e).__name__}: {e}"
+                try:
+                    await self.store.run(self.store.finish_row, job_id, row_index, result, error)
+                except Exception as e:
+                    # Keep the worker alive; the row stays pending and the job is marked failed
+                    print(f"Job {job_id} row {row_index} checkpoint error: {e}")
+                    self._checkpoint_errors[job_id] = f"row {row_index} checkpoint: {type(e).__name__}: {e}"
+            finally:
+                self._rows.task_done()
+
+
+def job_progress(job: dict) -> dict:
+    """Job row plus derived progress, throughput and ETA."""
+    total = job["total_rows"] or 0
+    processed = job["processed"] or 0
+    progress = {**job, "progress": round(processed / total, 4) if total else 1.0}
+    if job["started_at"]:
+        elapsed = (job["finished_at"] or time.time()) - job["started_at"]
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        progress["rows_per_s"] = round(rate, 2)
+        if job["status"] in ACTIVE_STATUSES and rate > 0:
+            progress["eta_s"] = round((total - processed) / rate, 1)
+    return progress
+
+
+_settings = get_settings()
+job_runner = JobRunner(
+    JobStore(os.path.join(_settings.local_state_dir, "jobs.sqlite3")),
+    workers=_settings.jobs_workers,
+)
@@ -0,0 +1,160 @@
+"""Adaptive concurrency limit for Bedrock calls.
+
+Each model gets an AIMD limiter: the number of calls in flight may grow by
+about one per round of successful calls (additive increase) and is halved
+when Bedrock throttles (multiplicative decrease), so concurrency settles
+just under the account's quota instead of repeatedly overshooting it.
+Only throttles of calls sent after the last cut trigger another cut; a
+burst of rejections from one overshoot shrinks the limit once.
+
+Calls over the limit wait in a bounded priority queue: interactive
+classification first, then the other interactive features (match
+explanations, insights, embeddings), then background work (bulk jobs and
+batch classification, marked with `background_work`). A full queue
+rejects with `QueueFullError` at once, and callers serve their fallback.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import random
+import time
+
+from app.config import get_settings
+from app.services.metrics import metrics
+
+INTERACTIVE, FOLLOW_UP, BACKGROUND = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", FOLLOW_UP: "follow_up", BACKGROUND: "background"}
+
+# Set by the bulk job workers and batch classification for the calls they make
+background_work: contextvars.ContextVar[bool] = contextvars.ContextVar("background_work", default=False)
+
+
+class QueueFullError(RuntimeError):
+    """Too many calls are already waiting for the limiter: the call was not attempted."""
+
+
+def call_priority(feature: str) -> int:
+    if background_work.get():
+        return BACKGROUND
+    return INTERACTIVE if feature == "classification" else FOLLOW_UP
+
+
+def backoff_delay(attempt: int, base_s: float, max_s: float) -> float:
+    """Exponential backoff with full jitter, so throttled callers don't retry in lockstep."""
+    return random.uniform(0, min(max_s, base_s * 2 ** attempt))
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        name: str,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        max_queue: int = 256,
+        backoff_ratio: float = 0.5,
+    ):
+        self.name = name
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.backoff_ratio = backoff_ratio
+        self.in_flight = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.decreases = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []  # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: int = INTERACTIVE) -> float:
+        """Wait for a slot; returns the time it was granted, to pass to `release`."""
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return time.monotonic()
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise QueueFullError(f"{self.name}: {len(self._waiters)} calls already waiting")
+        entry = (priority, next(self._seq), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, entry)
+        try:
+            await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].done() and not entry[2].cancelled():
+                self._release_slot()  # granted just as we were cancelled: pass it on
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+        return time.monotonic()
+
+    def release(self, granted_at: float, outcome: str) -> None:
+        """Return a slot and adapt the limit: "ok" grows it, "throttled" cuts it, "error" leaves it."""
+        if outcome == "ok":
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        elif outcome == "throttled":
+            self.throttled += 1
+            if granted_at >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self._last_decrease = time.monotonic()
+                self.decreases += 1
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def stats(self) -> dict:
+        queued: dict[str, int] = {}
+        for priority, _, waiter in self._waiters:
+            if not waiter.done():
+                queued[PRIORITY_NAMES[priority]] = queued.get(PRIORITY_NAMES[priority], 0) + 1
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": queued,
+            "throttled": self.throttled,
+            "decreases": self.decreases,
+            "rejected": self.rejected,
+        }
+
+
+limiters: dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(name: str) -> AdaptiveLimiter:
+    """The limiter for one upstream model, created with the configured bounds."""
+    limiter = limiters.get(name)
+    if limiter is None:
+        settings = get_settings()
+        limiter = limiters[name] = AdaptiveLimiter(
+            name,
+            initial=settings.bedrock_limit_initial,
+            min_limit=settings.bedrock_limit_min,
+            max_limit=settings.bedrock_limit_max,
+            max_queue=settings.bedrock_queue_size,
+        )
+    return limiter
+
+
+def _limiter_metrics():
+    for name, limiter in list(limiters.items()):
+        yield "bedrock_concurrency_limit", (name,), limiter.limit
+        yield "bedrock_concurrency_in_flight", (name,), limiter.in_flight
+        yield "bedrock_concurrency_queued", (name,), limiter.queued
+        yield "bedrock_throttled_total", (name,), limiter.throttled
+        yield "bedrock_limiter_rejected_total", (name,), limiter.rejected
+
+
+metrics.register_collector(_limiter_metrics)
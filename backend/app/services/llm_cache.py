@@ -0,0 +1,178 @@
+"""Content-addressed cache of Claude responses.
+
+Responses are keyed by a SHA-256 of (model id, system prompt, prompt,
+max_tokens) and kept in two tiers: an in-process LRU for the hot set and a
+SQLite file so answers survive restarts and are shared by workers on the
+same host. Each call site passes its own TTL, and may tag an entry (e.g.
+with the product text fingerprint) so that every response about one
+subject can be dropped at once when it is corrected.
+
+SQLite work runs on a dedicated thread, never on the event loop, and a
+failing disk tier (e.g. "database is locked") degrades to a cache miss.
+"""
+import asyncio
+import contextvars
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.cache import TTLCache
+
+# Set per request (e.g. from a `Cache-Control: no-cache` header) to skip lookups
+bypass_llm_cache: contextvars.ContextVar[bool] = contextvars.ContextVar("bypass_llm_cache", default=False)
+
+
+def make_cache_key(model_id: str, system: str, prompt: str, max_tokens: int) -> str:
+    payload = json.dumps([model_id, system, prompt, max_tokens], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Memory LRU in front of an optional SQLite store, with hit/miss counters."""
+
+    _PRUNE_EVERY = 100  # disk writes between size-cap checks
+
+    def __init__(self, path: str | None, max_entries: int = 2048, disk_max_entries: int = 50000):
+        self.memory = TTLCache(maxsize=max_entries)
+        self._tags = TTLCache(maxsize=max_entries)  # tag -> keys of memory entries
+        self.disk_max_entries = disk_max_entries
+        self.counters = defaultdict(lambda: {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0})
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._db = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+        if path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    " key TEXT PRIMARY KEY, feature TEXT, response TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL, last_access REAL NOT NULL, tag TEXT)"
+                )
+                columns = {row[1] for row in self._db.execute("PRAGMA table_info(llm_cache)")}
+                if "tag" not in columns:  # files written before tags existed
+                    self._db.execute("ALTER TABLE llm_cache ADD COLUMN tag TEXT")
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_tag ON llm_cache (tag)")
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+            except Exception as e:
+                print(f"LLM cache: disk tier disabled ({e})")
+                self._db = None
+
+    async def _disk(self, fn, *args, default=None):
+        """Run a disk-tier call on the cache thread; on any error log it and return `default`."""
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args))
+        except Exception as e:
+            print(f"LLM cache disk error: {e}")
+            return default
+
+    async def get(self, key: str, feature: str = "default") -> str | None:
+        counters = self.counters[feature]
+        value = self.memory.get(key)
+        if value is not None:
+            counters["memory_hits"] += 1
+            return value
+        if self._db is not None:
+            row = await self._disk(self._disk_get, key, time.time())
+            if row is not None:
+                counters["disk_hits"] += 1
+                response, expires_at = row
+                self.memory.set(key, response, ttl=expires_at - time.time())
+                return response
+        counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, response: str, ttl: float, feature: str = "default", tag: str | None = None) -> None:
+        if ttl <= 0:
+            return
+        self.counters[feature]["writes"] += 1
+        self.memory.set(key, response, ttl=ttl)
+        if tag:
+            self._tags.set(tag, self._tags.pop(tag, frozenset()) | {key}, ttl=ttl)
+        if self._db is not None:
+            await self._disk(self._disk_set, key, feature, response, ttl, tag)
+
+    async def delete(self, key: str) -> None:
+        self.memory.pop(key)
+        if self._db is not None:
+            await self._disk(self._disk_delete, key)
+
+    async def delete_tag(self, tag: str) -> int:
+        """Drop every entry stored with `tag`; the number of entries dropped."""
+        keys = set(self._tags.pop(tag, ()))
+        if self._db is not None:
+            keys.update(await self._disk(self._disk_delete_tag, tag, default=()))
+        for key in keys:
+            self.memory.pop(key)
+        return len(keys)
+
+    # Disk tier, called on the cache thread
+
+    def _disk_get(self, key: str, now: float) -> tuple[str, float] | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                return None
+            self._db.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        return row
+
+    def _disk_set(self, key: str, feature: str, response: str, ttl: float, tag: str | None) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, feature, response, expires_at, last_access, tag) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, feature, response, now + ttl, now, tag),
+            )
+            self._writes += 1
+            if self._writes % self._PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def _disk_delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def _disk_delete_tag(self, tag: str) -> list[str]:
+        with self._lock:
+            keys = [row[0] for row in self._db.execute("SELECT key FROM llm_cache WHERE tag = ?", (tag,))]
+            self._db.execute("DELETE FROM llm_cache WHERE tag = ?", (tag,))
+        return keys
+
+    def _prune(self, now: float) -> None:
+        """Drop expired rows, then the least recently used beyond the size cap."""
+        self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            " SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,),
+        )
+
+    def _disk_count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+    async def stats(self) -> dict:
+        totals = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+        for c in self.counters.values():
+            for k in totals:
+                totals[k] += c[k]
+        lookups = totals["memory_hits"] + totals["disk_hits"] + totals["misses"]
+        disk_size = await self._disk(self._disk_count, default=0) if self._db is not None else 0
+        return {
+            **totals,
+            "hit_ratio": round((totals["memory_hits"] + totals["disk_hits"]) / lookups, 3) if lookups else 0.0,
+            "memory_size": len(self.memory),
+            "disk_size": disk_size,
+            "by_feature": {f: dict(c) for f, c in self.counters.items()},
+        }
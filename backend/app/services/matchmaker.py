@@ -1,19 +1,26 @@
+import asyncio
 import json
 import math
 import os
 import time
+from app.config import get_settings
 from app.services.bedrock import bedrock_client
+from app.services.scoring import PlatformMatrix, l1_domain_score
+from app.services.streaming import StageCallback, emit_stage
+from app.services.tracing import span, trace_scope
 from app.services.utils import extract_json
 from app.models.schemas import MatchResponse, PlatformMatch, MatchFactor
 from app.models.database import add_match
 
 # Load platforms
 _platforms = []
+_matrix = PlatformMatrix([])
+_platforms_by_name = {}
 _demo_cache = {}
 _data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 
 def _load_data():
-    global _platforms, _demo_cache
+    global _platforms, _matrix, _platforms_by_name, _demo_cache
     try:
         with open(os.path.join(_data_dir, "platforms_seed.json")) as f:
             data = json.load(f)
@@ -24,6 +31,11 @@ def _load_data():
                 _platforms = data.get("platforms", [])
     except Exception:
         pass
+    _matrix = PlatformMatrix(_platforms)
+    settings = get_settings()
+    if settings.match_ann_enabled and len(_platforms) >= settings.match_ann_min_platforms:
+        _matrix.build_ann_index(n_lists=settings.match_ann_lists)
+    _platforms_by_name = {p["name"]: p for p in reversed(_platforms)}
     try:
         with open(os.path.join(_data_dir, "demo_scenarios.json")) as f:
             data = json.load(f)
@@ -35,8 +47,8 @@ def _load_data():
 
 _load_data()
 
-# Weights: M = 0.35D + 0.20G + 0.15C + 0.20H + 0.10S
-WEIGHTS = {"domain": 0.35, "geography": 0.20, "capacity": 0.15, "history": 0.20, "specialization": 0.10}
+# Per-platform reference implementation of the five factors. Live requests
+# use the vectorized PlatformMatrix in scoring.py, which must agree with these.
 
 def _haversine(lat1, lon1, lat2, lon2):
     R = 6371
@@ -55,27 +67,16 @@ def _cosine_similarity(a, b):
         return 0.5
     return dot / (mag_a * mag_b)
 
-async def _compute_domain_score(product_description: str, product_category: str, platform: dict) -> float:
+def _compute_domain_score(product_embedding: list[float] | None, product_category: str, platform: dict) -> float:
     """Compute domain score using Titan embeddings + L1 string match fallback."""
     platform_embedding = platform.get("embedding")
-    if platform_embedding:
-        try:
-            product_embedding = await bedrock_client.get_embedding(product_description)
-            sim = _cosine_similarity(product_embedding, platform_embedding)
-            # Normalize: cosine similarity is [-1, 1], map to [0.3, 0.95]
-            return max(0.3, min(0.95, 0.3 + (sim + 1) * 0.325))
-        except Exception:
-            pass
+    if platform_embedding and product_embedding is not None:
+        sim = _cosine_similarity(product_embedding, platform_embedding)
+        # Normalize: cosine similarity is [-1, 1], map to [0.3, 0.95]
+        return max(0.3, min(0.95, 0.3 + (sim + 1) * 0.325))
 
     # Fallback: L1 string match
-    l1 = product_category.split(" > ")[0] if " > " in product_category else product_category
-    domains = platform.get("domains", [])
-    if l1 in domains:
-        return 0.85 + 0.1 * (1 / (domains.index(l1) + 1))
-    for d in domains:
-        if l1.lower() in d.lower() or d.lower() in l1.lower():
-            return 0.65
-    return 0.3
+    return l1_domain_score(product_category, platform.get("domains", []))
 
 def _compute_geography_score(lat, lon, platform: dict) -> float:
     plat_geo = platform.get("geography", {})
@@ -116,34 +117,138 @@ Return ONLY a JSON object:
 The Hindi explanation should be in Hinglish (Hindi words in Roman script). Keep both explanations concise and actionable."""
 
 
-async def _generate_explanations(product_description: str, product_category: str, scored_platforms: list) -> list[dict]:
-    """Generate bilingual explanations for top platforms via Bedrock."""
-    results = []
-    for m in scored_platforms:
-        # Find platform data
-        platform_data = next((p for p in _platforms if p["name"] == m["platform"]), {})
-        prompt = EXPLANATION_PROMPT.format(
-            product_description=product_description,
-            product_category=product_category,
-            platform_name=m["platform"],
-            platform_desc=platform_data.get("description", ""),
-            score=m["score"],
-            domain=m["factors"]["domain"],
-            geography=m["factors"]["geography"],
-            capacity=m["factors"]["capacity"],
-            history=m["factors"]["history"],
-            specialization=m["factors"]["specialization"],
-        )
-        try:
-            raw = await bedrock_client.invoke_claude(prompt, system="You are a marketplace advisor. Return only valid JSON.")
+BATCH_EXPLANATION_PROMPT = """You are a marketplace advisor for Indian MSMEs. For EACH platform below, generate a brief, helpful explanation (2-3 sentences) for why it is a good match.
+
+Product: {product_description}
+Category: {product_category}
+
+Platforms:
+{platforms_block}
+
+Return ONLY a JSON object with one entry per platform, in the same order:
+{{"explanations": [{{"platform": "<platform name>", "explanation_en": "...", "explanation_hi": "..."}}]}}
+
+The Hindi explanations should be in Hinglish (Hindi words in Roman script). Keep all explanations concise and actionable."""
+
+
+def _explanation_fields(m: dict) -> dict:
+    """Prompt fields describing one scored platform."""
+    platform_data = _platforms_by_name.get(m["platform"], {})
+    return {
+        "platform_name": m["platform"],
+        "platform_desc": platform_data.get("description", ""),
+        "score": m["score"],
+        **m["factors"],
+    }
+
+
+def _apply_explanation(m: dict, parsed: dict) -> dict:
+    """Copy explanations onto a scored platform, falling back to templated strings."""
+    m["explanation_en"] = parsed.get("explanation_en", f"{m['platform']} scored {m['score']} based on strong domain match and geographic proximity.")
+    m["explanation_hi"] = parsed.get("explanation_hi", f"{m['platform']} ka score {m['score']} hai, acchi domain matching aur geographic proximity ke basis par.")
+    return m
+
+
+async def _explain_one(product_description: str, product_category: str, m: dict) -> dict:
+    prompt = EXPLANATION_PROMPT.format(
+        product_description=product_description,
+        product_category=product_category,
+        **_explanation_fields(m),
+    )
+    try:
+        raw = await bedrock_client.invoke_claude(prompt, system="You are a marketplace advisor. Return only valid JSON.", feature="match_explanation")
+        with span("json_extraction"):
             parsed = extract_json(raw)
-            m["explanation_en"] = parsed.get("explanation_en", f"{m['platform']} scored {m['score']} based on strong domain match and geographic proximity.")
-            m["explanation_hi"] = parsed.get("explanation_hi", f"{m['platform']} ka score {m['score']} hai, acchi domain matching aur geographic proximity ke basis par.")
-        except Exception:
-            m["explanation_en"] = f"{m['platform']} scored {m['score']} based on strong domain match and geographic proximity."
-            m["explanation_hi"] = f"{m['platform']} ka score {m['score']} hai, acchi domain matching aur geographic proximity ke basis par."
-        results.append(m)
-    return results
+        return _apply_explanation(m, parsed)
+    except Exception:
+        return _apply_explanation(m, {})
+
+
+async def _explain_batched(product_description: str, product_category: str, scored_platforms: list) -> list[dict]:
+    """One prompt for all platforms; entries missing from the reply get the fallback text."""
+    platforms_block = "\n".join(
+        f"{i}. Platform: {f['platform_name']}\n   Platform Description: {f['platform_desc']}\n   Match Score: {f['score']}\n"
+        f"   Key Factors: Domain={f['domain']}, Geography={f['geography']}, Capacity={f['capacity']}, History={f['history']}, Specialization={f['specialization']}"
+        for i, f in enumerate((_explanation_fields(m) for m in scored_platforms), 1)
+    )
+    prompt = BATCH_EXPLANATION_PROMPT.format(
+        product_description=product_description,
+        product_category=product_category,
+        platforms_block=platforms_block,
+    )
+    by_platform = {}
+    try:
+        raw = await bedrock_client.invoke_claude(prompt, system="You are a marketplace advisor. Return only valid JSON.", feature="match_explanation")
+        entries = extract_json(raw).get("explanations", [])
+        by_platform = {e["platform"]: e for e in entries if isinstance(e, dict) and "platform" in e}
+    except Exception:
+        pass
+    return [_apply_explanation(m, by_platform.get(m["platform"], {})) for m in scored_platforms]
+
+
+def _scores_event(top3: list[dict]) -> dict:
+    return {
+        "top_platforms": [
+            {"rank": rank, "platform": m["platform"], "score": m["score"], "factors": m["factors"]}
+            for rank, m in enumerate(top3, 1)
+        ]
+    }
+
+
+def _explanation_event(rank: int, m: dict) -> dict:
+    return {
+        "rank": rank,
+        "platform": m["platform"],
+        "explanation_en": m["explanation_en"],
+        "explanation_hi": m["explanation_hi"],
+    }
+
+
+async def _generate_explanations(
+    product_description: str,
+    product_category: str,
+    scored_platforms: list,
+    on_stage: StageCallback | None = None,
+) -> list[dict]:
+    """Generate bilingual explanations for top platforms via Bedrock.
+
+    MATCH_EXPLANATION_MODE selects "sequential" (one call at a time),
+    "concurrent" (one call per platform, at most MATCH_EXPLANATION_CONCURRENCY
+    in flight) or "batched" (a single call covering every platform).
+    Each explanation is reported to `on_stage` as soon as it is ready.
+    """
+    settings = get_settings()
+    mode = settings.match_explanation_mode
+    if mode == "batched":
+        explained = await _explain_batched(product_description, product_category, scored_platforms)
+        for rank, m in enumerate(explained, 1):
+            await emit_stage(on_stage, "explanation", _explanation_event(rank, m))
+        return explained
+
+    async def explain(rank: int, m: dict) -> dict:
+        m = await _explain_one(product_description, product_category, m)
+        await emit_stage(on_stage, "explanation", _explanation_event(rank, m))
+        return m
+
+    if mode == "concurrent":
+        semaphore = asyncio.Semaphore(max(1, settings.match_explanation_concurrency))
+
+        async def bounded(rank: int, m: dict) -> dict:
+            async with semaphore:
+                return await explain(rank, m)
+
+        return list(await asyncio.gather(*(bounded(rank, m) for rank, m in enumerate(scored_platforms, 1))))
+    return [await explain(rank, m) for rank, m in enumerate(scored_platforms, 1)]
+
+
+def uses_embeddings() -> bool:
+    """Whether live matching embeds the product description (any platform has an embedding)."""
+    return bool(_matrix.has_embedding.any())
+
+
+def needs_embedding(product_category: str) -> bool:
+    """Whether matching this category embeds the description (not served by a demo scenario)."""
+    return uses_embeddings() and product_category not in _demo_cache
 
 
 async def recommend_platforms(
@@ -154,12 +259,36 @@ async def recommend_platforms(
     business_type: str = "B2C",
     lat: float = None,
     lon: float = None,
+    on_stage: StageCallback | None = None,
+) -> MatchResponse:
+    """Top-3 platforms with bilingual explanations.
+
+    `on_stage` receives a "scores" event with the numeric top 3 as soon as
+    scoring is done, then one "explanation" event per platform.
+    """
+    with trace_scope("match") as trace:
+        response = await _recommend(
+            product_category, product_description, location, business_type, lat, lon, on_stage
+        )
+    response.stage_timings = trace.timings()
+    return response
+
+
+async def _recommend(
+    product_category: str,
+    product_description: str,
+    location: str,
+    business_type: str,
+    lat: float | None,
+    lon: float | None,
+    on_stage: StageCallback | None,
 ) -> MatchResponse:
     start = time.time()
 
     # Check demo cache
-    if product_category in _demo_cache:
-        scenario = _demo_cache[product_category]
+    with span("cache_lookup"):
+        scenario = _demo_cache.get(product_category)
+    if scenario:
         matches = []
         for m in scenario["expected_matching"]["top_3"]:
             matches.append(PlatformMatch(
@@ -169,15 +298,20 @@ async def recommend_platforms(
                 explanation_hi=m["explanation_hi"],
                 explanation_en=m["explanation_en"]
             ))
+        await emit_stage(on_stage, "scores", _scores_event(scenario["expected_matching"]["top_3"]))
 
-        elapsed = (time.time() - start) * 1000 + 85
+        elapsed = (time.time() - start) * 1000
+        if get_settings().simulated_latency_enabled:
+            elapsed += 85  # legacy demo padding
 
-        add_match({
-            "category": product_category,
-            "location": location,
-            "top_platform": matches[0].platform,
-            "top_score": matches[0].score,
-        })
+        with span("persistence"):
+            add_match({
+                "category": product_category,
+                "location": location,
+                "top_platform": matches[0].platform,
+                "top_score": matches[0].score,
+                "processing_time_ms": round(elapsed, 1),
+            })
 
         return MatchResponse(
             msme_profile={"category": product_category, "location": location, "business_type": business_type},
@@ -185,28 +319,27 @@ async def recommend_platforms(
             processing_time_ms=round(elapsed, 1)
         )
 
-    # Live matching with embeddings
-    scored = []
-    for platform in _platforms:
-        d = await _compute_domain_score(product_description, product_category, platform)
-        g = _compute_geography_score(lat, lon, platform)
-        c = _compute_capacity_score(platform)
-        h = _compute_history_score(platform)
-        s = _compute_specialization_score(business_type, platform)
-
-        total = WEIGHTS["domain"]*d + WEIGHTS["geography"]*g + WEIGHTS["capacity"]*c + WEIGHTS["history"]*h + WEIGHTS["specialization"]*s
-
-        scored.append({
-            "platform": platform["name"],
-            "score": round(total, 2),
-            "factors": {"domain": round(d,2), "geography": round(g,2), "capacity": round(c,2), "history": round(h,2), "specialization": round(s,2)}
-        })
-
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    top3 = scored[:3]
+    # Live matching with embeddings: embed the description once per request
+    product_embedding = None
+    if uses_embeddings():
+        with span("embedding"):
+            try:
+                product_embedding = await bedrock_client.get_embedding(product_description)
+            except Exception:
+                pass
+
+    # Large catalogs: re-rank an ANN shortlist exactly instead of scoring every row
+    settings = get_settings()
+    with span("scoring"):
+        candidates = _matrix.shortlist(
+            product_embedding, lat, lon, business_type, settings.match_ann_candidates, settings.match_ann_probe
+        )
+        top3 = _matrix.top_k(product_embedding, product_category, lat, lon, business_type, k=3, candidates=candidates)
+    await emit_stage(on_stage, "scores", _scores_event(top3))
 
     # Generate AI-powered bilingual explanations
-    top3 = await _generate_explanations(product_description, product_category, top3)
+    with span("explanations"):
+        top3 = await _generate_explanations(product_description, product_category, top3, on_stage)
 
     matches = []
     for m in top3:
@@ -220,12 +353,14 @@ async def recommend_platforms(
 
     elapsed = (time.time() - start) * 1000
 
-    add_match({
-        "category": product_category,
-        "location": location,
-        "top_platform": matches[0].platform if matches else "None",
-        "top_score": matches[0].score if matches else 0,
-    })
+    with span("persistence"):
+        add_match({
+            "category": product_category,
+            "location": location,
+            "top_platform": matches[0].platform if matches else "None",
+            "top_score": matches[0].score if matches else 0,
+            "processing_time_ms": round(elapsed, 1),
+        })
 
     return MatchResponse(
         msme_profile={"category": product_category, "location": location, "business_type": business_type},
@@ -0,0 +1,197 @@
+"""In-process metrics in the Prometheus text exposition format.
+
+Recording is lock-free: every thread writes to its own shard (a plain
+dict reached through `threading.local`), and only a scrape walks all
+shards to add them up. The lock is taken once per thread, when its shard
+is created. Gauges that describe current state (store sizes, cache hit
+ratios, ...) are read at scrape time from registered collectors instead
+of being pushed on the hot path.
+"""
+import bisect
+import math
+import threading
+from collections.abc import Callable, Iterable
+
+# Seconds; spans sub-millisecond cache hits up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A collector returns (name, labels, value) samples for one described gauge/counter
+Collector = Callable[[], Iterable[tuple[str, tuple, float]]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metrics:
+    """Registry of counters and histograms with per-thread shards."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: list[tuple[dict, dict]] = []  # (counters, histograms) per thread
+        self._shards_lock = threading.Lock()
+        self._meta: dict[str, tuple[str, str, tuple, tuple]] = {}  # name -> (type, help, label names, buckets)
+        self._collectors: list[Collector] = []
+
+    # -- registration ---------------------------------------------------------
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> None:
+        """A counter fed by `inc`, or by a collector for counts kept elsewhere."""
+        self._meta[name] = ("counter", help, labels, ())
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> None:
+        self._meta[name] = ("histogram", help, labels, tuple(sorted(buckets)))
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> None:
+        """A gauge whose samples come from collectors at scrape time."""
+        self._meta[name] = ("gauge", help, labels, ())
+
+    def register_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    # -- hot path -------------------------------------------------------------
+
+    def _shard(self) -> tuple[dict, dict]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = ({}, {})
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1.0) -> None:
+        counters = self._shard()[0]
+        key = (name, labels)
+        counters[key] = counters.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: tuple = ()) -> None:
+        histograms = self._shard()[1]
+        key = (name, labels)
+        state = histograms.get(key)
+        if state is None:
+            buckets = self._meta[name][3]
+            state = histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self._meta[name][3], value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    # -- scrape ---------------------------------------------------------------
+
+    def _merged(self) -> tuple[dict, dict]:
+        counters: dict = {}
+        histograms: dict = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard_counters, shard_histograms in shards:
+            for key, value in shard_counters.copy().items():
+                counters[key] = counters.get(key, 0.0) + value
+            for key, (counts, total, n) in shard_histograms.copy().items():
+                merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+                for i, c in enumerate(list(counts)):
+                    merged[0][i] += c
+                merged[1] += total
+                merged[2] += n
+        return counters, histograms
+
+    def value(self, name: str, labels: tuple = ()) -> float:
+        """Current total of a counter (summed over threads)."""
+        return self._merged()[0].get((name, labels), 0.0)
+
+    def render(self) -> str:
+        counters, histograms = self._merged()
+        samples: dict[str, list[tuple[tuple, float]]] = {}
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    samples.setdefault(name, []).append((labels, value))
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        for (name, labels), value in counters.items():
+            samples.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, (kind, help, label_names, buckets) in self._meta.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                for (hname, labels), (counts, total, n) in sorted(histograms.items(), key=lambda x: x[0][1]):
+                    if hname != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip((*buckets, math.inf), counts):
+                        cumulative += count
+                        le = f'le="{_format_value(bound)}"'
+                        lines.append(f"{name}_bucket{_format_labels(label_names, labels, le)} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(label_names, labels)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(label_names, labels)} {n}")
+            else:
+                for labels, value in sorted(samples.get(name, []), key=lambda x: x[0]):
+                    lines.append(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+metrics.counter("http_requests_total", "HTTP requests by route template, method and status.", ("route", "method", "status"))
+metrics.histogram("http_request_duration_seconds", "HTTP request latency.", ("route", "method"))
+metrics.counter("http_requests_started_total", "HTTP requests started.")
+metrics.counter("http_requests_finished_total", "HTTP requests finished.")
+metrics.gauge("http_requests_in_flight", "HTTP requests currently being served.")
+metrics.counter("http_requests_shed_total", "Requests rejected with 503 by admission control.", ("route_class",))
+metrics.gauge("admission_in_flight", "Admitted requests in flight per route class.", ("route_class",))
+metrics.gauge("admission_capacity", "Current in-flight cap per route class (shrinks while over the latency target).", ("route_class",))
+metrics.histogram("stage_duration_seconds", "Traced pipeline stage latency (see Server-Timing).", ("stage",))
+metrics.counter("aws_calls_total", "AWS API calls by outcome (ok, error, throttled).", ("service", "operation", "outcome"))
+metrics.histogram("aws_call_duration_seconds", "AWS API call latency, including retries.", ("service", "operation"))
+metrics.counter("bedrock_tokens_total", "Bedrock tokens by call site and direction (input, output).", ("feature", "direction"))
+metrics.counter("bedrock_cost_usd_total", "Estimated Bedrock spend in USD by call site (see BEDROCK_PRICING).", ("feature",))
+metrics.counter(
+    "singleflight_calls_total",
+    "Coalesced AWS calls: upstream (started), collapsed (joined one in flight), abandoned (no waiters left).",
+    ("flight", "outcome"),
+)
+metrics.gauge("singleflight_in_flight", "Distinct upstream calls currently in flight.", ("flight",))
+metrics.gauge("circuit_breaker_state", "Breaker state per upstream model: 0 closed, 1 open, 2 half-open.", ("model",))
+metrics.counter("circuit_breaker_rejected_total", "Calls failed fast because the breaker was open.", ("model",))
+metrics.counter("circuit_breaker_opened_total", "Times the breaker opened.", ("model",))
+metrics.gauge("bedrock_concurrency_limit", "Current adaptive concurrency limit per model.", ("model",))
+metrics.gauge("bedrock_concurrency_in_flight", "Bedrock calls in flight per model.", ("model",))
+metrics.gauge("bedrock_concurrency_queued", "Bedrock calls waiting for a slot per model.", ("model",))
+metrics.counter("bedrock_throttled_total", "Bedrock calls rejected with a throttling error.", ("model",))
+metrics.counter("bedrock_limiter_rejected_total", "Bedrock calls shed because the wait queue was full.", ("model",))
+metrics.counter("cache_hits_total", "Lookups answered by each cache layer.", ("cache",))
+metrics.counter("cache_misses_total", "Lookups each cache layer could not answer.", ("cache",))
+metrics.gauge("cache_hit_ratio", "hits / (hits + misses) per cache layer.", ("cache",))
+metrics.gauge("store_records", "Records held in each in-memory store.", ("store",))
+
+
+def _in_flight():
+    started = metrics.value("http_requests_started_total")
+    finished = metrics.value("http_requests_finished_total")
+    yield "http_requests_in_flight", (), started - finished
+
+
+metrics.register_collector(_in_flight)
+
+
+def cache_samples(layer: str, hits: float, misses: float):
+    """Collector samples for one cache layer."""
+    lookups = hits + misses
+    yield "cache_hits_total", (layer,), hits
+    yield "cache_misses_total", (layer,), misses
+    yield "cache_hit_ratio", (layer,), (hits / lookups) if lookups else 0.0
@@ -0,0 +1,100 @@
+"""One-call onboarding: classify, then match and price concurrently.
+
+Matching and pricing both only need the top category, so they start
+together as soon as classification returns. For English input the
+description embedding used by matching is also fetched while
+classification runs (unless a correction or demo scenario already fixes a
+category whose match needs no embedding), so end-to-end latency is close
+to classify + max(match, pricing).
+"""
+import asyncio
+import time
+
+from app.services.aws_nlp import aws_nlp
+from app.services.bedrock import bedrock_client
+from app.services.catalog_ai import classify_product, local_category
+from app.services.matchmaker import needs_embedding, recommend_platforms, uses_embeddings
+from app.services.pricewise import get_pricing_intelligence
+from app.models.schemas import OnboardResponse
+
+
+async def _timed(timings: dict, stage: str, coro):
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+
+
+async def onboard_product(
+    text: str,
+    language: str = "en",
+    location: str = "India",
+    business_type: str = "B2C",
+    lat: float = None,
+    lon: float = None,
+    your_price: float = None,
+) -> OnboardResponse:
+    start = time.perf_counter()
+    timings: dict[str, float] = {}
+
+    # Matching embeds the (English) description; warm the embedding cache meanwhile
+    prefetch = None
+    known_category = local_category(text)
+    needed = needs_embedding(known_category) if known_category else uses_embeddings()
+    if needed and aws_nlp.detect_language_local(text) == "en":
+        prefetch = asyncio.create_task(bedrock_client.get_embedding(text))
+
+    try:
+        classification = await _timed(timings, "classify", classify_product(text=text, language=language, location=location))
+    except BaseException:
+        if prefetch:
+            prefetch.cancel()
+        raise
+    top_category = classification.top_categories[0].category if classification.top_categories else ""
+
+    # Reuse the translation instead of matching on the Hindi original
+    description = classification.translated_text or text
+    if prefetch and description != text:
+        prefetch.cancel()
+        prefetch = None
+
+    async def match_stage():
+        if prefetch:
+            await prefetch  # lands in the embedding cache; don't embed the same text twice
+        return await recommend_platforms(
+            product_category=top_category,
+            product_description=description,
+            location=location,
+            language=language,
+            business_type=business_type,
+            lat=lat,
+            lon=lon,
+        )
+
+    match, pricing = await asyncio.gather(
+        _timed(timings, "match", match_stage()),
+        _timed(timings, "pricing", get_pricing_intelligence(
+            category=top_category,
+            your_price=your_price,
+            language=language,
+        )),
+        return_exceptions=True,
+    )
+
+    errors = {}
+    for stage, outcome in (("match", match), ("pricing", pricing)):
+        if isinstance(outcome, BaseException):
+            print(f"Onboarding {stage} error: {outcome}")
+            errors[stage] = f"{type(outcome).__name__}: {outcome}"
+
+    elapsed = (time.perf_counter() - start) * 1000
+    timings["total"] = round(elapsed, 1)
+    return OnboardResponse(
+        classification=classification,
+        match=None if "match" in errors else match,
+        pricing=None if "pricing" in errors else pricing,
+        errors=errors,
+        stage_timings=timings,
+        processing_time_ms=round(elapsed, 1),
+    )
@@ -1,7 +1,9 @@
 import json
 import os
 import time
+from app.config import get_settings
 from app.services.bedrock import bedrock_client
+from app.services.tracing import span, trace_scope
 from app.services.utils import extract_json
 
 _pricing_data = {}
@@ -145,13 +147,13 @@ async def _generate_pricing_insight(category: str, data: dict, your_price: float
     )
 
     try:
-        raw = await bedrock_client.invoke_claude(
-            prompt,
-            system="You are a pricing advisor for Indian MSMEs. Return only valid JSON."
-        )
-        parsed = extract_json(raw)
+        system = "You are a pricing advisor for Indian MSMEs. Return only valid JSON."
+        raw = await bedrock_client.invoke_claude(prompt, system=system, feature="pricing_insight")
+        with span("json_extraction"):
+            parsed = extract_json(raw)
         if parsed and "recommendation_en" in parsed:
             return parsed
+        await bedrock_client.forget_response(prompt, system=system)
     except Exception as e:
         print(f"Pricing insight generation error: {e}")
 
@@ -167,13 +169,13 @@ async def _generate_geo_insight(category: str, data: dict) -> dict | None:
     )
 
     try:
-        raw = await bedrock_client.invoke_claude(
-            prompt,
-            system="You are a geographic expansion advisor for Indian MSMEs. Return only valid JSON."
-        )
-        parsed = extract_json(raw)
+        system = "You are a geographic expansion advisor for Indian MSMEs. Return only valid JSON."
+        raw = await bedrock_client.invoke_claude(prompt, system=system, feature="geo_insight")
+        with span("json_extraction"):
+            parsed = extract_json(raw)
         if parsed and "geo_insight_en" in parsed:
             return parsed
+        await bedrock_client.forget_response(prompt, system=system)
     except Exception as e:
         print(f"Geo insight generation error: {e}")
 
@@ -181,16 +183,25 @@ async def _generate_geo_insight(category: str, data: dict) -> dict | None:
 
 
 async def get_pricing_intelligence(category: str, your_price: float = None, language: str = "en") -> dict:
+    with trace_scope("pricing") as trace:
+        result = await _pricing_intelligence(category, your_price)
+    result["stage_timings"] = trace.timings()
+    return result
+
+
+async def _pricing_intelligence(category: str, your_price: float | None) -> dict:
     start = time.time()
 
     # Check demo cache for fast path
     demo_insight = None
-    if category in _demo_cache:
-        scenario = _demo_cache[category]
+    with span("cache_lookup"):
+        scenario = _demo_cache.get(category)
+    if scenario:
         demo_insight = scenario.get("expected_pricing")
 
     # Find pricing data
-    _, data = _find_pricing_data(category)
+    with span("data_lookup"):
+        _, data = _find_pricing_data(category)
 
     if not data:
         return {
@@ -243,12 +254,14 @@ async def get_pricing_intelligence(category: str, your_price: float = None, lang
             }
     else:
         # Dynamic path: generate insights via Claude
-        insight = await _generate_pricing_insight(category, data, your_price)
-        geo_insight = await _generate_geo_insight(category, data)
+        with span("pricing_insight"):
+            insight = await _generate_pricing_insight(category, data, your_price)
+        with span("geo_insight"):
+            geo_insight = await _generate_geo_insight(category, data)
 
     elapsed = (time.time() - start) * 1000
-    if demo_insight:
-        elapsed += 50  # simulated latency for demo cache
+    if demo_insight and get_settings().simulated_latency_enabled:
+        elapsed += 50  # legacy demo padding
 
     return {
         "category": category,
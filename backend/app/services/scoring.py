@@ -0,0 +1,248 @@
+"""Vectorized platform scoring for MatchMaker.
+
+Platform records are compiled once into contiguous NumPy arrays so that a
+match request scores every platform with a handful of array operations
+instead of a Python loop over dicts. The factor formulas mirror the
+per-platform `_compute_*_score` functions in `matchmaker.py` exactly.
+"""
+from collections import Counter
+
+import numpy as np
+
+from app.services.ann_index import IVFIndex
+
+# Weights: M = 0.35D + 0.20G + 0.15C + 0.20H + 0.10S
+WEIGHTS = {"domain": 0.35, "geography": 0.20, "capacity": 0.15, "history": 0.20, "specialization": 0.10}
+
+EARTH_RADIUS_KM = 6371
+DEFAULT_LAT, DEFAULT_LON = 28.6, 77.2  # New Delhi
+
+
+def l1_domain_score(product_category: str, domains: list[str]) -> float:
+    """L1 string-match domain score, used when a platform has no embedding."""
+    l1 = product_category.split(" > ")[0] if " > " in product_category else product_category
+    if l1 in domains:
+        return 0.85 + 0.1 * (1 / (domains.index(l1) + 1))
+    for d in domains:
+        if l1.lower() in d.lower() or d.lower() in l1.lower():
+            return 0.65
+    return 0.3
+
+
+class PlatformMatrix:
+    """Platform data compiled into column arrays for batch scoring."""
+
+    def __init__(self, platforms: list[dict]):
+        self.platforms = platforms
+        self.names = [p.get("name", "") for p in platforms]
+        n = len(platforms)
+
+        geo = [p.get("geography", {}) for p in platforms]
+        self.lat_rad = np.radians(np.array([g.get("lat", DEFAULT_LAT) for g in geo], dtype=np.float64))
+        self.lon_rad = np.radians(np.array([g.get("lon", DEFAULT_LON) for g in geo], dtype=np.float64))
+        self.cos_lat = np.cos(self.lat_rad)
+        self.load_ratio = np.array([p.get("capacity", {}).get("load_ratio", 0.5) for p in platforms], dtype=np.float64)
+        self.success_rate = np.array([p.get("history", {}).get("success_rate", 0.5) for p in platforms], dtype=np.float64)
+        self.b2b_ratio = np.array([p.get("specialization", {}).get("b2b_ratio", 0.5) for p in platforms], dtype=np.float64)
+        self.b2c_ratio = np.array([p.get("specialization", {}).get("b2c_ratio", 0.5) for p in platforms], dtype=np.float64)
+
+        # Request-independent factors are computed once here
+        self.capacity = np.maximum(0.3, 1.0 - self.load_ratio * 0.5)
+        self.history = self.success_rate
+        self.spec_b2b = np.minimum(1.0, self.b2b_ratio + 0.3)
+        self.spec_b2c = np.minimum(1.0, self.b2c_ratio + 0.3)
+
+        # Embedding matrix holds every platform whose vector has the dominant
+        # dimension; the rare odd-sized vector is scored in Python.
+        embeddings = [p.get("embedding") or None for p in platforms]
+        dims = Counter(len(e) for e in embeddings if e)
+        self.dim = dims.most_common(1)[0][0] if dims else 0
+        self.has_embedding = np.array([e is not None for e in embeddings], dtype=bool)
+        self.in_matrix = np.array([e is not None and len(e) == self.dim for e in embeddings], dtype=bool)
+        self.embeddings = np.zeros((n, self.dim), dtype=np.float64)
+        for i, e in enumerate(embeddings):
+            if e is not None and len(e) == self.dim:
+                self.embeddings[i] = e
+        self.embedding_norms = np.linalg.norm(self.embeddings, axis=1)
+        self.odd_embedding_rows = [i for i, e in enumerate(embeddings) if e is not None and len(e) != self.dim]
+
+        # Platforms sharing a domain list share an L1 fallback score
+        groups: dict[tuple, int] = {}
+        self.domain_group = np.array(
+            [groups.setdefault(tuple(p.get("domains", [])), len(groups)) for p in platforms], dtype=np.int64
+        )
+        self._domain_groups = [list(g) for g in groups]
+        self._fallback_cache: dict[str, np.ndarray] = {}
+        self.ann_index: IVFIndex | None = None
+        self.geo_index: IVFIndex | None = None
+
+    def __len__(self) -> int:
+        return len(self.platforms)
+
+    def _domain_fallback(self, product_category: str) -> np.ndarray:
+        """L1 match score per domain group, memoized per category."""
+        cached = self._fallback_cache.get(product_category)
+        if cached is None:
+            cached = np.array([l1_domain_score(product_category, g) for g in self._domain_groups], dtype=np.float64)
+            if len(self._fallback_cache) < 4096:
+                self._fallback_cache[product_category] = cached
+        return cached
+
+    def build_ann_index(self, n_lists: int = 0, seed: int = 0) -> IVFIndex:
+        """Build the IVF indexes used by `shortlist`.
+
+        One index covers the embedding matrix. A second one covers platform
+        locations as unit vectors on the sphere, where cosine similarity is
+        monotonic in great-circle distance, so nearby platforms are found the
+        same way.
+        """
+        rows = np.flatnonzero(self.in_matrix)
+        self.ann_index = IVFIndex(self.embeddings[rows], ids=rows, n_lists=n_lists, seed=seed)
+        self.geo_index = IVFIndex(self._unit_vectors(self.lat_rad, self.lon_rad), n_lists=n_lists, seed=seed)
+        # Rows the embedding index can't see are always re-ranked exactly
+        self._unindexed_rows = np.flatnonzero(~self.in_matrix)
+        # Request-independent part of the score, best first, per business type
+        static = WEIGHTS["capacity"] * self.capacity + WEIGHTS["history"] * self.history
+        self._prior_order = {
+            "B2B": np.argsort(-(static + WEIGHTS["specialization"] * self.spec_b2b), kind="stable"),
+            "B2C": np.argsort(-(static + WEIGHTS["specialization"] * self.spec_b2c), kind="stable"),
+        }
+        return self.ann_index
+
+    @staticmethod
+    def _unit_vectors(lat_rad, lon_rad) -> np.ndarray:
+        cos_lat = np.cos(lat_rad)
+        return np.column_stack((cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)))
+
+    def shortlist(
+        self,
+        product_embedding: list[float] | None,
+        lat: float | None,
+        lon: float | None,
+        business_type: str,
+        n_candidates: int,
+        n_probe: int,
+    ) -> np.ndarray | None:
+        """Candidate rows for exact re-ranking, or None when every row must be scored.
+
+        The shortlist unions the embedding neighbours of the product, the
+        platforms nearest the seller, the rows with the best request-independent
+        score (capacity, history, specialization), and every row the embedding
+        index does not cover.
+        """
+        if self.ann_index is None or not product_embedding or len(product_embedding) != self.dim:
+            return None
+        seller = self._unit_vectors(np.radians(lat or DEFAULT_LAT), np.radians(lon or DEFAULT_LON))
+        prior = self._prior_order["B2B" if business_type == "B2B" else "B2C"][:n_candidates]
+        return np.unique(np.concatenate((
+            self.ann_index.search(product_embedding, n_candidates, n_probe),
+            self.geo_index.search(seller, n_candidates, n_probe),
+            prior,
+            self._unindexed_rows,
+        )))
+
+    def _cosine(self, product_embedding: list[float] | None, idx: np.ndarray) -> np.ndarray:
+        sims = np.full(len(idx), 0.5)
+        if not product_embedding:
+            return sims
+        q = np.asarray(product_embedding, dtype=np.float64)
+        q_norm = float(np.sqrt(np.dot(q, q)))
+        if q_norm == 0:
+            return sims
+        if len(q) == self.dim:
+            rows = self.in_matrix[idx]
+            norms = self.embedding_norms[idx]
+            ok = rows & (norms > 0)
+            sel = idx[ok]
+            sims[ok] = (self.embeddings[sel] @ q) / (self.embedding_norms[sel] * q_norm)
+        for i in self.odd_embedding_rows:
+            pos = np.searchsorted(idx, i)
+            if pos < len(idx) and idx[pos] == i:
+                e = np.asarray(self.platforms[i]["embedding"], dtype=np.float64)
+                e_norm = float(np.sqrt(np.dot(e, e)))
+                if len(e) == len(q) and e_norm > 0:
+                    sims[pos] = float(np.dot(e, q)) / (e_norm * q_norm)
+        return sims
+
+    def factors(
+        self,
+        product_embedding: list[float] | None,
+        product_category: str,
+        lat: float | None,
+        lon: float | None,
+        business_type: str,
+        idx: np.ndarray,
+    ) -> tuple[np.ndarray, ...]:
+        """Return the five factor arrays (D, G, C, H, S) for platform rows `idx` (sorted)."""
+        # Domain: embedding cosine mapped to [0.3, 0.95], L1 match otherwise
+        use_embedding = self.has_embedding[idx] & (product_embedding is not None)
+        domain = np.clip(0.3 + (self._cosine(product_embedding, idx) + 1) * 0.325, 0.3, 0.95)
+        if not use_embedding.all():
+            fallback = self._domain_fallback(product_category)[self.domain_group[idx]]
+            domain = np.where(use_embedding, domain, fallback)
+
+        # Geography: haversine distance from the seller, linear decay over 2000 km
+        lat1 = np.radians(lat or DEFAULT_LAT)
+        lon1 = np.radians(lon or DEFAULT_LON)
+        dlat = self.lat_rad[idx] - lat1
+        dlon = self.lon_rad[idx] - lon1
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * self.cos_lat[idx] * np.sin(dlon / 2) ** 2
+        dist = EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(a))
+        geography = np.maximum(0.3, 1.0 - dist / 2000)
+
+        spec = self.spec_b2b if business_type == "B2B" else self.spec_b2c
+        return domain, geography, self.capacity[idx], self.history[idx], spec[idx]
+
+    def top_k(
+        self,
+        product_embedding: list[float] | None,
+        product_category: str,
+        lat: float | None,
+        lon: float | None,
+        business_type: str,
+        k: int = 3,
+        candidates=None,
+    ) -> list[dict]:
+        """Score platforms and return the best `k` as `{"platform", "score", "factors"}` dicts.
+
+        Ranking follows the reference loop: scores are rounded to 2 decimals
+        and ties keep catalog order. `candidates` restricts scoring to a
+        subset of platform rows (e.g. an ANN shortlist).
+        """
+        if candidates is None:
+            idx = np.arange(len(self))
+        else:
+            idx = np.unique(np.asarray(candidates, dtype=np.int64))
+        if len(idx) == 0:
+            return []
+
+        d, g, c, h, s = self.factors(product_embedding, product_category, lat, lon, business_type, idx)
+        total = (
+            WEIGHTS["domain"] * d + WEIGHTS["geography"] * g + WEIGHTS["capacity"] * c
+            + WEIGHTS["history"] * h + WEIGHTS["specialization"] * s
+        )
+
+        approx = np.round(total, 2)
+        if len(idx) > k:
+            part = np.argpartition(-approx, k - 1)[:k]
+            # np.round can differ from round() by one step at exact halves, so
+            # keep a 0.01 margin and settle the final order with round() below
+            keep = np.flatnonzero(approx >= approx[part].min() - 0.01)
+        else:
+            keep = np.arange(len(idx))
+
+        ranked = sorted(keep.tolist(), key=lambda j: (-round(float(total[j]), 2), int(idx[j])))[:k]
+        return [
+            {
+                "platform": self.names[idx[j]],
+                "score": round(float(total[j]), 2),
+                "factors": {
+                    "domain": round(float(d[j]), 2),
+                    "geography": round(float(g[j]), 2),
+                    "capacity": round(float(c[j]), 2),
+                    "history": round(float(h[j]), 2),
+                    "specialization": round(float(s[j]), 2),
+                },
+            }
+            for j in ranked
+        ]
@@ -0,0 +1,91 @@
+"""Request coalescing ("single-flight") for identical in-flight AWS calls.
+
+While a call for a key is running, further callers with the same key wait
+for that call instead of starting their own, and all of them get its
+result (or its exception). The upstream call runs as its own task, so a
+caller that is cancelled (client disconnect, timeout) only stops waiting;
+the call is cancelled only when every caller has left.
+
+The shared task runs in the context of the caller that started it, so its
+Bedrock usage and trace spans are attributed to that request; coalesced
+callers cost nothing extra.
+"""
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+from app.services.metrics import metrics
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent `do(key, fn)` calls with equal keys into one `fn()`."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.leaders = 0  # upstream calls started
+        self.collapsed = 0  # calls that joined one already in flight
+        self.abandoned = 0  # upstream calls cancelled because every caller left
+        self._flights: dict[Hashable, _Flight] = {}
+        _registry.append(self)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.create_task(fn()))
+            flight.task.add_done_callback(lambda _, key=key, flight=flight: self._forget(key, flight))
+            self.leaders += 1
+        else:
+            self.collapsed += 1
+        flight.waiters += 1
+        try:
+            # shield: cancelling this caller must not cancel the call the others wait on
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is left to read the result; later callers start afresh
+                self._forget(key, flight)
+                flight.task.cancel()
+                self.abandoned += 1
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def stats(self) -> dict:
+        calls = self.leaders + self.collapsed
+        return {
+            "upstream_calls": self.leaders,
+            "collapsed": self.collapsed,
+            "collapse_ratio": round(self.collapsed / calls, 3) if calls else 0.0,
+            "abandoned": self.abandoned,
+            "in_flight": self.in_flight,
+        }
+
+
+_registry: list[SingleFlight] = []
+
+
+def _flight_metrics():
+    for flight in _registry:
+        yield "singleflight_calls_total", (flight.name, "upstream"), flight.leaders
+        yield "singleflight_calls_total", (flight.name, "collapsed"), flight.collapsed
+        yield "singleflight_calls_total", (flight.name, "abandoned"), flight.abandoned
+        yield "singleflight_in_flight", (flight.name,), flight.in_flight
+
+
+metrics.register_collector(_flight_metrics)
@@ -0,0 +1,65 @@
+"""Stage events for the streaming (Server-Sent Events) endpoints.
+
+Pipelines such as `classify_product` and `recommend_platforms` take an
+optional `on_stage` callback and report each intermediate result through
+it. `sse_events` runs a pipeline with a callback that feeds a queue, and
+turns that queue into an SSE byte stream: one event per stage, then
+`result` with the full response and `done`, or `error`.
+"""
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+
+from pydantic import BaseModel
+
+StageCallback = Callable[[str, dict], Awaitable[None]]
+
+# Disable caching and proxy buffering (nginx) so events reach the client as they are sent
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+KEEPALIVE_S = 15.0  # comment line sent when nothing happened, so idle proxies keep the stream open
+
+
+async def emit_stage(on_stage: StageCallback | None, stage: str, data: dict) -> None:
+    if on_stage is not None:
+        await on_stage(stage, data)
+
+
+def format_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n"
+
+
+async def sse_events(run: Callable[[StageCallback], Awaitable[BaseModel]]) -> AsyncIterator[str]:
+    """Run `run(on_stage)` and yield its stage events as SSE messages while it works."""
+    start = time.perf_counter()
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_stage(stage: str, data: dict) -> None:
+        queue.put_nowait((stage, {**data, "elapsed_ms": round((time.perf_counter() - start) * 1000, 1)}))
+
+    async def pipeline():
+        try:
+            result = await run(on_stage)
+            queue.put_nowait(("result", result.model_dump(mode="json")))
+        except Exception as e:
+            print(f"Streaming pipeline error: {e}")
+            queue.put_nowait(("error", {"detail": f"{type(e).__name__}: {e}"}))
+        queue.put_nowait(None)
+
+    task = asyncio.create_task(pipeline())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_S)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                yield format_event("done", {"elapsed_ms": round((time.perf_counter() - start) * 1000, 1)})
+                return
+            yield format_event(*item)
+    finally:
+        # Client went away: stop the work nobody will read
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,174 @@
+"""Compiled ONDC taxonomy for CatalogAI.
+
+Everything `classify_product` derives from `ondc_categories.json` (the
+taxonomy block of the classification prompt, the static few-shot section,
+the code/HSN lookup tables and the category retrieval index) is built once
+into an immutable `CompiledTaxonomy`, which is rebuilt only when a source
+file changes.
+"""
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+from app.services.taxonomy_retrieval import CategoryRetriever
+
+_FIELD_MARKER = re.compile("\x00(\\w+)\x00")
+
+
+@dataclass(frozen=True)
+class CompiledTaxonomy:
+    source_mtime: float
+    categories: tuple  # raw L1 category dicts, as in the JSON file
+    taxonomy_text: str
+    valid_hsn_codes: frozenset
+    category_codes: MappingProxyType  # code -> {"category": "L1 > L2 > L3", "hsn": "XXXX"}
+    items: tuple  # one {"category", "code", "hsn"} mapping per L3 item, in file order
+    taxonomy_lines: tuple  # prompt line per item, aligned with `items`
+    synonyms: MappingProxyType = field(repr=False)  # "L1 > L2 > L3" -> tuple of synonym terms
+    retriever: CategoryRetriever = field(repr=False)
+    # Prompts pre-split into static text and field names: [static, field, static, ...].
+    # The full prompt has the whole taxonomy baked in; the pruned one takes it as a field.
+    prompt_parts: tuple = field(repr=False)
+    pruned_prompt_parts: tuple = field(repr=False)
+
+    def render_prompt(self, taxonomy: str | None = None, **values: str) -> str:
+        """Fill the per-request fields of the precompiled classification prompt.
+
+        Pass `taxonomy` to replace the full category list with a pruned one.
+        """
+        if taxonomy is None:
+            parts = self.prompt_parts
+        else:
+            parts = self.pruned_prompt_parts
+            values["taxonomy"] = taxonomy
+        return "".join(parts[i] if i % 2 == 0 else values[parts[i]] for i in range(len(parts)))
+
+    def with_neighbours(self, item_indices: list[int], k: int) -> list[int]:
+        """Pad retrieved items up to `k` with siblings: same L2 first, then same L1."""
+        chosen = list(dict.fromkeys(item_indices))
+        for depth in (2, 1):
+            prefixes = {self.items[i]["category"].rsplit(" > ", 3 - depth)[0] for i in chosen}
+            for j, item in enumerate(self.items):
+                if len(chosen) >= k:
+                    return chosen
+                if j not in chosen and item["category"].rsplit(" > ", 3 - depth)[0] in prefixes:
+                    chosen.append(j)
+        return chosen
+
+    def taxonomy_block(self, item_indices) -> str:
+        """Taxonomy text restricted to the given items, in taxonomy order."""
+        return "\n".join(self.taxonomy_lines[i] for i in sorted(set(item_indices)))
+
+
+def _split_prompt(prompt_template: str, fields: tuple[str, ...], **static: str) -> tuple:
+    """Render everything but `fields` now, leaving markers to split on."""
+    rendered = prompt_template.format(**static, **{f: f"\x00{f}\x00" for f in fields})
+    return tuple(_FIELD_MARKER.split(rendered))
+
+
+def compile_taxonomy(
+    data: dict,
+    prompt_template: str,
+    request_fields: tuple[str, ...],
+    synonyms: dict | None = None,
+    source_mtime: float = 0.0,
+) -> CompiledTaxonomy:
+    categories = tuple(data.get("categories", []))
+    synonyms = synonyms or {}
+    hsn_codes = set()
+    category_codes = {}
+    items = []
+    lines = []
+    documents = []
+    for cat in categories:
+        l1 = cat["l1"]
+        for sub in cat.get("subcategories", []):
+            l2 = sub["l2"]
+            for item in sub.get("items", []):
+                l3, code, hsn = item["l3"], item["l3_code"], item["hsn"]
+                full_cat = f"{l1} > {l2} > {l3}"
+                hsn_codes.add(hsn)
+                category_codes[code] = MappingProxyType({"category": full_cat, "hsn": hsn})
+                items.append(MappingProxyType({"category": full_cat, "code": code, "hsn": hsn}))
+                lines.append(f"  {l1} > {l2} > {l3}  (code: {code}, HSN: {hsn})")
+                # The L3 name is the strongest signal, so it is repeated
+                documents.append(" ".join([l3, l3, l2, l1, *synonyms.get(full_cat, [])]))
+
+    taxonomy_text = "\n".join(lines)
+    return CompiledTaxonomy(
+        source_mtime=source_mtime,
+        categories=categories,
+        taxonomy_text=taxonomy_text,
+        valid_hsn_codes=frozenset(hsn_codes),
+        category_codes=MappingProxyType(category_codes),
+        items=tuple(items),
+        taxonomy_lines=tuple(lines),
+        synonyms=MappingProxyType({cat: tuple(terms) for cat, terms in synonyms.items()}),
+        retriever=CategoryRetriever(documents),
+        prompt_parts=_split_prompt(prompt_template, request_fields, taxonomy=taxonomy_text),
+        pruned_prompt_parts=_split_prompt(prompt_template, ("taxonomy", *request_fields)),
+    )
+
+
+class TaxonomyLoader:
+    """Serves the compiled taxonomy, recompiling when a source JSON file changes.
+
+    File mtimes are checked at most once per `check_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        prompt_template: str,
+        request_fields: tuple[str, ...],
+        synonyms_path: str | None = None,
+        check_interval: float = 1.0,
+    ):
+        self.path = path
+        self.synonyms_path = synonyms_path
+        self.prompt_template = prompt_template
+        self.request_fields = request_fields
+        self.check_interval = check_interval
+        self._compiled = compile_taxonomy({}, prompt_template, request_fields, source_mtime=-1.0)
+        self._seen_mtime = None
+        self._next_check = 0.0
+        self.reload()
+
+    def get(self) -> CompiledTaxonomy:
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            try:
+                if self._source_mtime() != self._seen_mtime:
+                    self.reload()
+            except OSError:
+                pass
+        return self._compiled
+
+    def _source_mtime(self) -> float:
+        mtime = os.stat(self.path).st_mtime
+        if self.synonyms_path and os.path.exists(self.synonyms_path):
+            mtime = max(mtime, os.stat(self.synonyms_path).st_mtime)
+        return mtime
+
+    def reload(self) -> CompiledTaxonomy:
+        try:
+            mtime = self._source_mtime()
+            # Remember this version even if it fails to parse, to retry only on the next edit
+            self._seen_mtime = mtime
+            with open(self.path) as f:
+                data = json.load(f)
+            synonyms = {}
+            if self.synonyms_path and os.path.exists(self.synonyms_path):
+                with open(self.synonyms_path, encoding="utf-8") as f:
+                    synonyms = json.load(f).get("synonyms", {})
+            self._compiled = compile_taxonomy(
+                data, self.prompt_template, self.request_fields, synonyms=synonyms, source_mtime=mtime
+            )
+        except Exception as e:
+            # Keep serving the last good taxonomy
+            print(f"Taxonomy load error: {e}")
+        return self._compiled
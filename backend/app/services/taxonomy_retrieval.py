@@ -0,0 +1,84 @@
+"""Lexical candidate retrieval over ONDC L3 categories.
+
+A small BM25 index over each L3 category's path names and its synonyms
+(English, Hinglish and Devanagari terms from `category_synonyms.json`).
+CatalogAI uses it to put only the most plausible categories into the
+classification prompt instead of the whole taxonomy.
+"""
+import math
+import re
+from collections import Counter, defaultdict
+
+_TOKEN = re.compile(r"\w+")
+
+# English and Romanized Hindi function words that carry no category signal
+STOPWORDS = frozenset("""
+a an and are as at be by for from i in is it make made makes making of on or our sell selling the to we with
+aur bhi hai hain hoon hum ka ke ki ko liye main mein se wala wale wali banata banati banate karta karti karte
+products product items item quality handmade handcrafted traditional
+""".split())
+
+
+def _stem(token: str) -> str:
+    """Very light English plural folding: sarees -> saree, toys -> toy, boxes -> box."""
+    if len(token) > 4 and token.endswith("es") and token[-3] in "sxz":
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Unigrams plus adjacent-word bigrams, lowercased, stopwords removed."""
+    words = [_stem(w) for w in _TOKEN.findall(text.lower()) if w not in STOPWORDS and not w.isdigit()]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+class CategoryRetriever:
+    """BM25 over per-category documents built from names and synonyms."""
+
+    def __init__(self, documents: list[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self.doc_len = []
+        for i, doc in enumerate(documents):
+            counts = Counter(tokenize(doc))
+            self.doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+        n = len(documents)
+        self.avg_len = (sum(self.doc_len) / n) if n else 1.0
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in self.postings.items()}
+        self.postings = dict(self.postings)
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        """Return up to `k` (document index, score) pairs, best first."""
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for doc, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc] / self.avg_len)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda x: (-x[1], x[0]))[:k]
+
+    def coverage(self, query: str) -> float:
+        """Fraction of the query's words that appear anywhere in the index."""
+        words = [t for t in tokenize(query) if "_" not in t]
+        if not words:
+            return 0.0
+        return sum(1 for w in words if w in self.postings) / len(words)
+
+    def candidates(self, query: str, k: int, min_score: float, min_coverage: float) -> list[tuple[int, float]] | None:
+        """Top-`k` hits, or None when retrieval is not confident enough to prune.
+
+        Retrieval is trusted only if the best hit scores at least `min_score`
+        and at least `min_coverage` of the query's words are known to the index.
+        """
+        hits = self.search(query, k)
+        if not hits or hits[0][1] < min_score or self.coverage(query) < min_coverage:
+            return None
+        return hits
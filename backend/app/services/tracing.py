@@ -0,0 +1,73 @@
+"""Lightweight per-request stage tracing.
+
+`span("translation")` times a block and adds it to the current trace,
+held in a contextvar so it follows the request into awaited calls and
+gathered tasks. `trace_scope("classify")` opens a nested trace for one
+pipeline: its own spans become that response's `stage_timings`, and are
+also reported upwards with a "classify." prefix so the request-level
+trace (and its Server-Timing header) sees every stage.
+
+Spans with the same name add up (three explanation calls give one
+`bedrock` entry with the summed time and a count of 3).
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+_current_trace: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    __slots__ = ("name", "parent", "durations", "counts")
+
+    def __init__(self, name: str = "", parent: "Trace | None" = None):
+        self.name = name
+        self.parent = parent
+        self.durations: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    def record(self, stage: str, ms: float) -> None:
+        self.durations[stage] = self.durations.get(stage, 0.0) + ms
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+        if self.parent is not None:
+            self.parent.record(f"{self.name}.{stage}" if self.name else stage, ms)
+
+    def timings(self) -> dict[str, float]:
+        """Stage -> milliseconds, in the order stages first ran."""
+        return {stage: round(ms, 2) for stage, ms in self.durations.items()}
+
+    def server_timing(self, total_ms: float | None = None) -> str:
+        """Render as a `Server-Timing` header value."""
+        entries = []
+        for stage, ms in self.durations.items():
+            count = self.counts[stage]
+            desc = f';desc="{count} calls"' if count > 1 else ""
+            entries.append(f"{stage};dur={ms:.1f}{desc}")
+        if total_ms is not None:
+            entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+
+@contextmanager
+def span(stage: str):
+    """Time the enclosed block as `stage` of the current trace (no-op outside a trace)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.record(stage, (time.perf_counter() - start) * 1000)
+
+
+@contextmanager
+def trace_scope(name: str = ""):
+    """Open a (nested) trace for the enclosed block and yield it."""
+    trace = Trace(name, _current_trace.get())
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
@@ -0,0 +1,144 @@
+"""Bedrock token and cost accounting.
+
+`BedrockClient` reports the `usage` block of every call here, attributed
+to the calling feature (classification, match_explanation, pricing_insight,
+geo_insight, embedding). Counts are kept per minute for the last day, so
+the admin API can show rolling windows next to the all-time totals, and
+per request (in a contextvar opened by `usage_scope`) so the response can
+carry its estimated cost. Cache hits are counted too: they show what the
+LLM response cache saves per feature.
+"""
+import contextvars
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from app.config import get_settings
+from app.services.metrics import metrics
+
+WINDOWS = {"5m": 5, "1h": 60, "24h": 1440}  # name -> minutes
+RETENTION_MINUTES = max(WINDOWS.values())
+
+# Per feature and minute: calls, input tokens, output tokens, estimated USD, cache hits
+CALLS, INPUT, OUTPUT, COST, CACHE_HITS = range(5)
+
+
+class RequestUsage:
+    __slots__ = ("calls", "input_tokens", "output_tokens", "cost_usd")
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost_usd = 0.0
+
+
+_request_usage: contextvars.ContextVar[RequestUsage | None] = contextvars.ContextVar("request_usage", default=None)
+
+
+@contextmanager
+def usage_scope():
+    """Collect the Bedrock usage of the enclosed block (one request) and yield it."""
+    usage = RequestUsage()
+    token = _request_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _request_usage.reset(token)
+
+
+def _summarize(row: list) -> dict:
+    calls = row[CALLS]
+    cost_per_call = row[COST] / calls if calls else 0.0
+    lookups = calls + row[CACHE_HITS]
+    return {
+        "calls": calls,
+        "input_tokens": row[INPUT],
+        "output_tokens": row[OUTPUT],
+        "cost_usd": round(row[COST], 8),
+        "avg_input_tokens": round(row[INPUT] / calls, 1) if calls else 0.0,
+        "avg_output_tokens": round(row[OUTPUT] / calls, 1) if calls else 0.0,
+        "cost_per_call_usd": round(cost_per_call, 8),
+        "cache_hits": row[CACHE_HITS],
+        "cache_hit_ratio": round(row[CACHE_HITS] / lookups, 3) if lookups else 0.0,
+        # What the cache hits would have cost at this window's average price per call
+        "est_saved_usd": round(row[CACHE_HITS] * cost_per_call, 8),
+    }
+
+
+class UsageLedger:
+    """Per-feature token and cost counters: all-time totals plus per-minute buckets."""
+
+    def __init__(self, pricing: dict[str, list[float]]):
+        self.pricing = pricing  # model id -> [USD per 1K input tokens, USD per 1K output tokens]
+        self.started_at = time.time()
+        self._totals: dict[str, list] = {}
+        self._minutes: deque[tuple[int, dict[str, list]]] = deque()
+
+    def cost(self, model_id: str, input_tokens: int, output_tokens: int) -> float:
+        input_price, output_price = (list(self.pricing.get(model_id, ())) + [0.0, 0.0])[:2]
+        return (input_tokens * input_price + output_tokens * output_price) / 1000
+
+    def _bucket(self) -> dict[str, list]:
+        minute = int(time.time() // 60)
+        if not self._minutes or self._minutes[-1][0] != minute:
+            self._minutes.append((minute, {}))
+            while self._minutes[0][0] <= minute - RETENTION_MINUTES:
+                self._minutes.popleft()
+        return self._minutes[-1][1]
+
+    def _add(self, feature: str, values: tuple) -> None:
+        for rows in (self._totals, self._bucket()):
+            row = rows.get(feature)
+            if row is None:
+                row = rows[feature] = [0, 0, 0, 0.0, 0]
+            for i, v in enumerate(values):
+                row[i] += v
+
+    def record(self, feature: str, model_id: str, input_tokens: int, output_tokens: int = 0) -> float:
+        """Account one Bedrock call; returns its estimated cost in USD."""
+        cost = self.cost(model_id, input_tokens, output_tokens)
+        self._add(feature, (1, input_tokens, output_tokens, cost, 0))
+        metrics.inc("bedrock_tokens_total", (feature, "input"), input_tokens)
+        metrics.inc("bedrock_tokens_total", (feature, "output"), output_tokens)
+        metrics.inc("bedrock_cost_usd_total", (feature,), cost)
+        usage = _request_usage.get()
+        if usage is not None:
+            usage.calls += 1
+            usage.input_tokens += input_tokens
+            usage.output_tokens += output_tokens
+            usage.cost_usd += cost
+        return cost
+
+    def record_cache_hit(self, feature: str) -> None:
+        self._add(feature, (0, 0, 0, 0.0, 1))
+
+    def window(self, minutes: int) -> dict[str, list]:
+        cutoff = int(time.time() // 60) - minutes
+        rows: dict[str, list] = {}
+        for minute, bucket in reversed(self._minutes):
+            if minute <= cutoff:
+                break
+            for feature, values in bucket.items():
+                row = rows.setdefault(feature, [0, 0, 0, 0.0, 0])
+                for i, v in enumerate(values):
+                    row[i] += v
+        return rows
+
+    def summary(self) -> dict:
+        def by_feature(rows: dict[str, list]) -> dict:
+            total = [sum(r[i] for r in rows.values()) for i in range(5)]
+            return {
+                "total": _summarize(total),
+                "by_feature": {f: _summarize(r) for f, r in sorted(rows.items())},
+            }
+
+        return {
+            "since": self.started_at,
+            "pricing_per_1k_tokens": self.pricing,
+            "windows": {name: by_feature(self.window(m)) for name, m in WINDOWS.items()},
+            "all_time": by_feature(self._totals),
+        }
+
+
+usage_ledger = UsageLedger(get_settings().bedrock_pricing)
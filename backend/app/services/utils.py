@@ -1,3 +1,4 @@
+import hashlib
 import json
 import re
 
@@ -34,3 +35,13 @@ def extract_json(text: str) -> dict:
             pass
 
     return {}
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of free text for cache keys: trimmed, casefolded, single-spaced."""
+    return " ".join(text.split()).casefold()
+
+
+def text_fingerprint(text: str) -> str:
+    """Short stable id of a text's normalized form, e.g. to tag cache entries by product."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:16]
@@ -112,10 +112,17 @@ test.describe('API Integration — Edge Cases & Data Integrity', () => {
           admin_id: 'e2e_test',
         },
       });
-      expect(overrideRes.ok()).toBeTruthy();
-      const body = await overrideRes.json();
-      expect(body.success).toBe(true);
-      expect(body.audit_id).toBeTruthy();
+      try {
+        expect(overrideRes.ok()).toBeTruthy();
+        const body = await overrideRes.json();
+        expect(body.success).toBe(true);
+        expect(body.audit_id).toBeTruthy();
+      } finally {
+        // Corrections persist across restarts: withdraw it so other specs see the demo answer
+        await request.delete(`${API}/api/admin/corrections/${recordId}`, {
+          params: { reason: 'E2E test cleanup', admin_id: 'e2e_test' },
+        });
+      }
     }
   });
 
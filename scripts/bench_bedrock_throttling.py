@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Bedrock calls against a simulated provider quota, with and without the
+adaptive concurrency limiter. The fake InvokeModel allows --quota calls at
+once and throttles the rest; half the callers are marked as background
+work. Reports answered calls, fallbacks, throttle errors and how far
+ahead interactive calls finish.
+Usage: python scripts/bench_bedrock_throttling.py [--calls 300] [--quota 10] [--latency-ms 50]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from botocore.exceptions import ClientError
+
+from app.services.bedrock import bedrock_client
+from app.services.limiter import background_work, limiters
+
+THROTTLE = ClientError({'Error': {'Code': 'ThrottlingException'}, 'ResponseMetadata': {'HTTPStatusCode': 429}}, 'InvokeModel')
+
+
+class FakeProvider:
+    def __init__(self, quota, latency_s):
+        self.quota = quota
+        self.latency_s = latency_s
+        self.active = 0
+        self.answered = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+
+    def invoke_model(self, model_id, body):
+        with self.lock:
+            self.active += 1
+            over = self.active > self.quota
+            if over:
+                self.throttled += 1
+        try:
+            if over:
+                raise THROTTLE
+            time.sleep(self.latency_s)
+            with self.lock:
+                self.answered += 1
+            return {'content': [{'text': 'ok'}], 'usage': {'input_tokens': 500, 'output_tokens': 50}}
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+async def run(calls, provider, limiter_enabled, tag):
+    bedrock_client.settings.bedrock_limiter_enabled = limiter_enabled
+    bedrock_client._invoke_model = provider.invoke_model
+    finished = []
+
+    async def call(i):
+        background = i % 2 == 0
+        if background:
+            background_work.set(True)
+        answer = await bedrock_client.invoke_claude(f'{tag} {i}', feature='classification', use_cache=False)
+        finished.append((background, answer == 'ok'))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    ok = sum(1 for _, answered in finished if answered)
+    ranks = {bg: [r for r, (b, _) in enumerate(finished) if b == bg] for bg in (False, True)}
+    print(f"limiter {'on ' if limiter_enabled else 'off'}: {ok}/{calls} answered, {calls - ok} fallbacks, "
+          f"{provider.throttled} throttle errors, {elapsed:.2f}s, "
+          f"mean finish rank interactive {sum(ranks[False]) / len(ranks[False]):.0f} "
+          f"vs background {sum(ranks[True]) / len(ranks[True]):.0f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=300)
+    parser.add_argument('--quota', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=50)
+    args = parser.parse_args()
+
+    bedrock_client._available = True
+    bedrock_client.settings.circuit_breaker_enabled = False  # measure the limiter alone
+    for enabled in (False, True):
+        await run(args.calls, FakeProvider(args.quota, args.latency_ms / 1000), enabled, f'run-{enabled}')
+    for name, limiter in limiters.items():
+        print(f"{name}: {limiter.stats()}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
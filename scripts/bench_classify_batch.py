@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Throughput of /api/catalog/classify/batch on the local paths.
+Builds a catalog of N distinct texts from the labelled eval set (a SKU
+number is appended, which the classifier ignores) and classifies it in one
+batch call versus one classify_product call per item. Items the demo cache
+or fast path cannot answer go to AWS as usual (or its offline fallback).
+Usage: python scripts/bench_classify_batch.py [--items 500]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.catalog_ai import classify_batch, classify_product, train_fast_path
+
+EVAL_PATH = os.path.join(os.path.dirname(__file__), 'data', 'classification_dev.jsonl')
+
+
+def build_catalog(n):
+    with open(EVAL_PATH, encoding='utf-8') as f:
+        texts = [json.loads(line)['text'] for line in f if line.strip()]
+    return [f"{texts[i % len(texts)]} (SKU {i})" for i in range(n)]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=500)
+    args = parser.parse_args()
+
+    catalog = build_catalog(args.items)
+    train_fast_path()  # train outside the timed section
+
+    start = time.perf_counter()
+    for text in catalog:
+        await classify_product(text)
+    serial_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = await classify_batch(catalog)
+    batch_s = time.perf_counter() - start
+
+    local = sum(1 for r in response.results if r.result and r.result.top_categories[0].band.value == 'GREEN')
+    print(f"{len(catalog)} items, {response.unique} unique, {response.failed} failed, {local} answered in the GREEN band")
+    print(f"one call per item: {len(catalog) / serial_s:8.0f} items/s")
+    print(f"batch endpoint:    {len(catalog) / batch_s:8.0f} items/s")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Cost of /api/admin/dashboard as the classification store grows.
+Fills the store with N synthetic records through add_classification and
+times get_dashboard_data (running aggregates) against a full scan of the
+store, which is what every dashboard poll used to do.
+Usage: python scripts/bench_dashboard.py [--sizes 10000 100000 1000000] [--polls 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+# Keep every record in memory so the full scan sees the whole store
+os.environ.setdefault('STORE_CAPACITY', '10000000')
+
+from app.models import database
+from app.models.database import add_classification, classifications_store, get_dashboard_data
+
+BANDS = ('GREEN', 'YELLOW', 'RED')
+
+
+def full_scan():
+    bands = {'GREEN': 0, 'YELLOW': 0, 'RED': 0}
+    total_confidence = 0
+    total_time = 0
+    for c in classifications_store:
+        band = c.get('band', 'RED')
+        bands[band] = bands.get(band, 0) + 1
+        total_confidence += c.get('confidence', 0)
+        total_time += c.get('processing_time_ms', 0)
+    return bands, total_confidence, total_time
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--polls', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'records':>10} {'aggregates':>12} {'full scan':>12}")
+    for size in sorted(args.sizes):
+        while len(classifications_store) < size:
+            i = len(classifications_store)
+            add_classification({
+                'text': f'product {i}',
+                'category': 'Fashion > Ethnic Wear > Sarees',
+                'confidence': 0.5 + (i % 50) / 100,
+                'band': BANDS[i % 3],
+                'processing_time_ms': 100 + i % 200,
+            })
+        dashboard = per_call_us(get_dashboard_data, args.polls)
+        scan = per_call_us(full_scan, max(1, args.polls // 20))
+        print(f"{size:>10} {dashboard:>10.1f}us {scan:>10.0f}us")
+
+    data = get_dashboard_data()
+    bands, total_confidence, _ = full_scan()
+    assert data['band_distribution'] == bands
+    assert abs(data['avg_confidence'] - round(total_confidence / len(classifications_store), 3)) < 1e-9
+    print(f"aggregates match a full scan over {len(classifications_store)} records "
+          f"(recent: {len(database.recent_classifications)})")
+
+
+if __name__ == '__main__':
+    main()
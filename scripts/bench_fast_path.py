@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Fast-path classifier eval on the labelled classification set.
+Reports how many texts the local classifier answers itself (GREEN band,
+>= 0.85 calibrated confidence, and at least FAST_PATH_MIN_SIMILARITY to its
+best category) versus escalates to Bedrock, the accuracy of
+the answers it keeps, its top-1 accuracy overall and its latency. Texts
+outside the taxonomy (no gold category) should always escalate; any kept
+answer for them counts as wrong. With --live, also times the full Bedrock
+pipeline (fast path disabled) on the same texts for a latency comparison.
+The default set was written without reference to the synonyms the
+classifier trains on; --eval-set dev mostly repeats them (an upper bound).
+Held-out results (704 training examples, FAST_PATH_MIN_SIMILARITY=0.4):
+0% answered locally, 32.8% top-1; with the gate at 0.3, 6% local at 7/8
+correct but 1/12 outside-taxonomy texts accepted. FAST_PATH_ENABLED is
+therefore off by default; the script measures the classifier either way.
+Usage: python scripts/bench_fast_path.py [--eval-set heldout|dev] [--live]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.config import get_settings
+from app.services.catalog_ai import classify_product, train_fast_path
+
+EVAL_SETS = {
+    'heldout': os.path.join(os.path.dirname(__file__), 'data', 'classification_heldout.jsonl'),
+    'dev': os.path.join(os.path.dirname(__file__), 'data', 'classification_dev.jsonl'),
+}
+GREEN = 0.85
+
+
+def load_eval_set(name):
+    with open(EVAL_SETS[name], encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--eval-set', choices=sorted(EVAL_SETS), default='heldout')
+    parser.add_argument('--live', action='store_true', help='also time the Bedrock pipeline')
+    args = parser.parse_args()
+
+    examples = load_eval_set(args.eval_set)
+    min_similarity = get_settings().fast_path_min_similarity
+    start = time.perf_counter()
+    classifier = train_fast_path()
+    train_ms = (time.perf_counter() - start) * 1000
+    print(f"trained on {classifier.n_examples} examples, {len(classifier.labels)} labels "
+          f"in {train_ms:.0f} ms (temperature {classifier.temperature:.4f})")
+
+    accepted = correct_accepted = top1 = outside = outside_accepted = 0
+    latencies = []
+    for e in examples:
+        start = time.perf_counter()
+        kept = classifier.predict(e['text'], min_similarity=min_similarity)
+        latencies.append((time.perf_counter() - start) * 1000)
+        predictions = classifier.predict(e['text'])
+        hit = bool(predictions) and predictions[0][0] == e['category']
+        local = bool(kept) and kept[0][1] >= GREEN
+        if e['category'] is None:
+            outside += 1
+            outside_accepted += local
+            continue
+        top1 += hit
+        if local:
+            accepted += 1
+            correct_accepted += hit
+
+    n = len(examples) - outside
+    print(f"\n{n} labelled examples ({args.eval_set}), {outside} outside the taxonomy")
+    print(f"answered locally:     {accepted / n:.1%}  (escalation rate {1 - accepted / n:.1%})")
+    print(f"accuracy when local:  {correct_accepted / accepted:.1%}" if accepted else "accuracy when local:  n/a")
+    print(f"top-1 accuracy (all): {top1 / n:.1%}")
+    if outside:
+        print(f"outside taxonomy answered locally: {outside_accepted}/{outside} (should be 0)")
+    print(f"fast path latency:    p50 {percentile(latencies, 0.5):.3f} ms, p95 {percentile(latencies, 0.95):.3f} ms")
+
+    if args.live:
+        settings = get_settings()
+        enabled = settings.fast_path_enabled
+        settings.fast_path_enabled = False
+        live = []
+        for e in examples:
+            start = time.perf_counter()
+            await classify_product(e['text'])
+            live.append((time.perf_counter() - start) * 1000)
+        settings.fast_path_enabled = enabled
+        print(f"Bedrock pipeline:     p50 {percentile(live, 0.5):.0f} ms, p95 {percentile(live, 0.95):.0f} ms, "
+              f"mean {statistics.mean(live):.0f} ms")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark MatchMaker scoring: per-platform Python loop vs vectorized PlatformMatrix.
+Synthetic catalogs are built by jittering the seed platforms, and every run
+checks that both engines return identical top-3 scores and factors.
+Usage: python scripts/bench_matching.py [--sizes 15,1000,100000]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services import matchmaker
+from app.services.scoring import PlatformMatrix
+
+
+def load_seed_platforms():
+    data_dir = os.path.join(os.path.dirname(__file__), '..', 'backend', 'app', 'data')
+    with open(os.path.join(data_dir, 'platforms_seed.json'), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def synthetic_platforms(seed, n, rng):
+    """Return n platforms: the seed catalog followed by jittered copies."""
+    platforms = [dict(p) for p in seed[:n]]
+    while len(platforms) < n:
+        base = rng.choice(seed)
+        p = json.loads(json.dumps(base))
+        p['name'] = f"{base['name']} #{len(platforms)}"
+        p['geography']['lat'] += rng.uniform(-5, 5)
+        p['geography']['lon'] += rng.uniform(-5, 5)
+        p['capacity']['load_ratio'] = round(rng.uniform(0.1, 0.95), 2)
+        p['history']['success_rate'] = round(rng.uniform(0.4, 0.95), 2)
+        p['embedding'] = [round(min(1.0, max(0.0, x + rng.uniform(-0.2, 0.2))), 2) for x in p['embedding']]
+        platforms.append(p)
+    return platforms
+
+
+def loop_top3(platforms, product_embedding, product_category, lat, lon, business_type):
+    """The original per-platform scoring loop from recommend_platforms."""
+    w = matchmaker.WEIGHTS
+    scored = []
+    for platform in platforms:
+        d = matchmaker._compute_domain_score(product_embedding, product_category, platform)
+        g = matchmaker._compute_geography_score(lat, lon, platform)
+        c = matchmaker._compute_capacity_score(platform)
+        h = matchmaker._compute_history_score(platform)
+        s = matchmaker._compute_specialization_score(business_type, platform)
+        total = w["domain"]*d + w["geography"]*g + w["capacity"]*c + w["history"]*h + w["specialization"]*s
+        scored.append({
+            "platform": platform["name"],
+            "score": round(total, 2),
+            "factors": {"domain": round(d, 2), "geography": round(g, 2), "capacity": round(c, 2), "history": round(h, 2), "specialization": round(s, 2)}
+        })
+    scored.sort(key=lambda x: x["score"], reverse=True)
+    return scored[:3]
+
+
+def best_of(fn, repeats):
+    best = float('inf')
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='15,1000,100000')
+    parser.add_argument('--queries', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    seed = load_seed_platforms()
+    queries = [
+        (
+            [round(rng.uniform(0, 1), 2) for _ in range(8)],
+            rng.choice(['Home & Decor > Metalware > Brass Decoratives', 'Fashion > Ethnic Wear > Silk Sarees', 'Toys > Wooden Toys']),
+            rng.uniform(10, 32), rng.uniform(70, 90),
+            rng.choice(['B2B', 'B2C']),
+        )
+        for _ in range(args.queries)
+    ]
+
+    print(f"{'platforms':>10} {'compile ms':>11} {'loop ms':>10} {'numpy ms':>10} {'speedup':>8}  identical")
+    for n in (int(s) for s in args.sizes.split(',')):
+        platforms = synthetic_platforms(seed, n, rng)
+        start = time.perf_counter()
+        matrix = PlatformMatrix(platforms)
+        compile_ms = (time.perf_counter() - start) * 1000
+
+        repeats = 1 if n >= 50000 else 5
+        loop_total = numpy_total = 0.0
+        identical = True
+        for q in queries:
+            loop_ms, expected = best_of(lambda: loop_top3(platforms, *q), repeats)
+            numpy_ms, actual = best_of(lambda: matrix.top_k(*q, k=3), max(repeats, 5))
+            loop_total += loop_ms
+            numpy_total += numpy_ms
+            identical &= expected == actual
+        loop_ms = loop_total / len(queries)
+        numpy_ms = numpy_total / len(queries)
+        print(f"{n:>10} {compile_ms:>11.1f} {loop_ms:>10.3f} {numpy_ms:>10.3f} {loop_ms / numpy_ms:>7.1f}x  {identical}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Cost of recording a metric on the request path.
+Times metrics.inc / metrics.observe (per-thread shards, no lock) against
+the same update behind a shared lock, single-threaded and with N threads
+recording at once, and the cost of one /metrics render.
+Usage: python scripts/bench_metrics.py [--ops 200000] [--threads 8]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.metrics import metrics
+
+LABELS = ('/api/catalog/classify', 'POST', '200')
+
+
+class LockedCounter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, name, labels=(), value=1.0):
+        with self.lock:
+            key = (name, labels)
+            self.values[key] = self.values.get(key, 0.0) + value
+
+
+def per_op_ns(fn, ops, threads):
+    def work():
+        for _ in range(ops):
+            fn()
+
+    pool = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return (time.perf_counter() - start) / (ops * threads) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ops', type=int, default=200000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    locked = LockedCounter()
+    cases = {
+        'metrics.inc (sharded)': lambda: metrics.inc('http_requests_total', LABELS),
+        'locked dict inc': lambda: locked.inc('http_requests_total', LABELS),
+        'metrics.observe': lambda: metrics.observe('http_request_duration_seconds', 0.042, LABELS[:2]),
+    }
+    print(f"{'':24} {'1 thread':>10} {f'{args.threads} threads':>12}")
+    for name, fn in cases.items():
+        single = per_op_ns(fn, args.ops, 1)
+        multi = per_op_ns(fn, args.ops // args.threads, args.threads)
+        print(f"{name:24} {single:8.0f}ns {multi:10.0f}ns")
+
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"render: {(time.perf_counter() - start) * 1000:.2f}ms for {len(text.splitlines())} lines")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of per-request classification prompt assembly.
+"before" walks the taxonomy tree and formats CLASSIFICATION_PROMPT on every
+call (the old _build_taxonomy_text path); "after" fills the precompiled
+prompt from the TaxonomyLoader. Both must produce the same prompt.
+Usage: python scripts/bench_prompt_assembly.py [--iterations 20000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.catalog_ai import CLASSIFICATION_PROMPT, _data_dir, _taxonomy
+
+TEXT = "Main peetal ke decorative items banata hoon - flower vase, diya stand, candle holder"
+LOCATION = "Moradabad, Uttar Pradesh"
+
+with open(os.path.join(_data_dir, "ondc_categories.json")) as f:
+    _ondc_taxonomy = json.load(f)
+
+
+def legacy_build_taxonomy_text() -> str:
+    lines = []
+    for cat in _ondc_taxonomy.get("categories", []):
+        l1 = cat["l1"]
+        for sub in cat.get("subcategories", []):
+            l2 = sub["l2"]
+            for item in sub.get("items", []):
+                lines.append(f"  {l1} > {l2} > {item['l3']}  (code: {item['l3_code']}, HSN: {item['hsn']})")
+    return "\n".join(lines)
+
+
+def before() -> str:
+    return CLASSIFICATION_PROMPT.format(taxonomy=legacy_build_taxonomy_text(), text=TEXT, location=LOCATION)
+
+
+def after() -> str:
+    return _taxonomy.get().render_prompt(text=TEXT, location=LOCATION)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    assert before() == after(), "compiled prompt differs from the legacy prompt"
+    n = args.iterations
+    before_us = min(timeit.repeat(before, number=n, repeat=5)) / n * 1e6
+    after_us = min(timeit.repeat(after, number=n, repeat=5)) / n * 1e6
+    print(f"prompt size: {len(after())} chars")
+    print(f"before (build + format): {before_us:8.2f} us/request")
+    print(f"after  (compiled):       {after_us:8.2f} us/request")
+    print(f"speedup: {before_us / after_us:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Memory held by the classification store, per million records.
+Builds N realistic records the old way (a list of dicts with ISO timestamp
+strings) and the new way (a RingStore of ClassificationRecord objects with
+an id index) and reports traced allocations, scaled to one million.
+Also times lookups by id: a linear scan of the list versus the index.
+Usage: python scripts/bench_store_memory.py [--records 1000000]
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.models.records import ClassificationRecord, RingStore
+
+CATEGORIES = [f'Fashion > Ethnic Wear > Style {i}' for i in range(60)]
+BANDS = ('GREEN', 'YELLOW', 'RED')
+
+
+def make_data(i):
+    # Strings built per record, as they arrive from requests (not shared literals)
+    return {
+        'id': str(uuid.uuid4())[:8],
+        'timestamp': datetime.utcnow().isoformat(),
+        'text': f'Handmade cotton product number {i} from Varanasi',
+        'category': ''.join(CATEGORIES[i % len(CATEGORIES)]),
+        'confidence': 0.5 + (i % 50) / 100,
+        'band': ''.join(BANDS[i % 3]),
+        'hsn': str(5000 + i % 40),
+        'processing_time_ms': 100.0 + i % 200,
+        'source': ''.join('bedrock'),
+    }
+
+
+def measure(build, n):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = build(n)
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, size, elapsed
+
+
+def build_dicts(n):
+    return [make_data(i) for i in range(n)]
+
+
+def build_ring(n):
+    store = RingStore(ClassificationRecord, n)
+    for i in range(n):
+        store.append(make_data(i))
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=1000000)
+    args = parser.parse_args()
+    n = args.records
+    per_million = 1000000 / n
+
+    old, old_bytes, old_s = measure(build_dicts, n)
+    probe = [old[i]['id'] for i in range(n - 1, 0, -max(1, n // 20))]
+    start = time.perf_counter()
+    for record_id in probe:
+        next(r for r in reversed(old) if r['id'] == record_id)
+    old_lookup_us = (time.perf_counter() - start) / len(probe) * 1e6
+    del old
+    gc.collect()
+
+    new, new_bytes, new_s = measure(build_ring, n)
+    probe = [r.key for r in new.tail(n)[::max(1, n // 20)]]
+    start = time.perf_counter()
+    for record_id in probe:
+        new.get(record_id)
+    new_lookup_us = (time.perf_counter() - start) / len(probe) * 1e6
+
+    print(f"{n} records (memory scaled to 1M)")
+    print(f"list of dicts:  {old_bytes * per_million / 2**20:8.0f} MiB  build {old_s:6.2f}s  lookup by id {old_lookup_us:10.1f}us")
+    print(f"RingStore:      {new_bytes * per_million / 2**20:8.0f} MiB  build {new_s:6.2f}s  lookup by id {new_lookup_us:10.1f}us")
+
+
+if __name__ == '__main__':
+    main()
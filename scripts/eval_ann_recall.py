@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Recall@3 and latency of the MatchMaker ANN shortlist against exhaustive scoring.
+Sweeps IVF list count, probe count and shortlist size so the index can be
+tuned (see MATCH_ANN_* settings in backend/app/config.py). Scores are rounded
+to 2 decimals, so large catalogs have many exact ties at the top; recall
+therefore counts shortlist results whose score matches an exhaustive top-3
+score rather than comparing platform names.
+Usage: python scripts/eval_ann_recall.py [--platforms 100000] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.scoring import PlatformMatrix
+from bench_matching import load_seed_platforms, synthetic_platforms
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--platforms', type=int, default=100000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--lists', default='0,64,1024')
+    parser.add_argument('--probes', default='1,4,16')
+    parser.add_argument('--candidates', default='64,256,1024')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    platforms = synthetic_platforms(load_seed_platforms(), args.platforms, rng)
+    queries = [
+        (
+            [round(rng.uniform(0, 1), 2) for _ in range(8)],
+            'Home & Decor > Metalware > Brass Decoratives',
+            rng.uniform(10, 32), rng.uniform(70, 90),
+            rng.choice(['B2B', 'B2C']),
+        )
+        for _ in range(args.queries)
+    ]
+
+    matrix = PlatformMatrix(platforms)
+    start = time.perf_counter()
+    exact = [matrix.top_k(*q, k=3) for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"{args.platforms} platforms, {len(queries)} queries, exhaustive: {exact_ms:.3f} ms/query\n")
+    print(f"{'lists':>6} {'probe':>6} {'cands':>6} {'build ms':>9} {'ms/query':>9} {'speedup':>8} {'recall@3':>9}")
+
+    for n_lists in (int(x) for x in args.lists.split(',')):
+        start = time.perf_counter()
+        index = matrix.build_ann_index(n_lists=n_lists)
+        build_ms = (time.perf_counter() - start) * 1000
+        for n_probe in (int(x) for x in args.probes.split(',')):
+            for n_cand in (int(x) for x in args.candidates.split(',')):
+                hits = 0
+                start = time.perf_counter()
+                approx = []
+                for q in queries:
+                    candidates = matrix.shortlist(q[0], q[2], q[3], q[4], n_cand, n_probe)
+                    approx.append(matrix.top_k(*q, k=3, candidates=candidates))
+                ms = (time.perf_counter() - start) * 1000 / len(queries)
+                for a, e in zip(approx, exact):
+                    hits += sum((Counter(m['score'] for m in a) & Counter(m['score'] for m in e)).values())
+                recall = hits / (3 * len(queries))
+                print(f"{index.n_lists:>6} {n_probe:>6} {n_cand:>6} {build_ms:>9.0f} {ms:>9.3f} {exact_ms / ms:>7.1f}x {recall:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
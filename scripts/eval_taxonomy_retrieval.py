@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Offline eval of retrieval-pruned classification prompts.
+For each K, reports how often the gold category survives pruning (the
+ceiling on LLM top-1 accuracy with the pruned prompt), retrieval's own top-1
+accuracy, the low-confidence fallback rate and prompt size against the full
+taxonomy prompt. With --live, also classifies every example through Bedrock
+with the full and the pruned prompt and compares LLM top-1 accuracy.
+The default set (scripts/data/classification_heldout.jsonl) was written
+without reference to category_synonyms.json; --eval-set dev uses the older
+set whose texts mostly contain a synonym of their gold category. Examples
+whose text does contain a gold name or synonym are counted as "leaked".
+Held-out results: the shipped gates (min_score 3, min_coverage 0.5) fall
+back on 92% of texts (~4.5% tokens saved); without the coverage gate K=30
+keeps the gold category for only 87% (~44% saved), and raising min_score
+trades that back into fallbacks (min_score 8: 99% kept, 76% fallback).
+Lexical retrieval misses paraphrases, so TAXONOMY_RETRIEVAL_ENABLED is off
+by default; the script evaluates the index either way.
+Usage: python scripts/eval_taxonomy_retrieval.py [--k 5,8,12,20] [--min-score 3.0] [--min-coverage 0.5] [--eval-set heldout|dev] [--live]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from app.services.catalog_ai import CLASSIFICATION_SYSTEM, _taxonomy
+from app.services.utils import extract_json, normalize_text
+
+EVAL_SETS = {
+    'heldout': os.path.join(os.path.dirname(__file__), 'data', 'classification_heldout.jsonl'),
+    'dev': os.path.join(os.path.dirname(__file__), 'data', 'classification_dev.jsonl'),
+}
+LOCATION = 'India'
+
+
+def load_eval_set(name):
+    """Labelled examples; rows without a gold category (outside the taxonomy) are skipped."""
+    with open(EVAL_SETS[name], encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [r for r in rows if r['category']]
+
+
+def leaked(taxonomy, example):
+    """Whether the text contains its gold category's L3 name or one of its synonyms."""
+    text = f" {' '.join(normalize_text(example['text']).replace('-', ' ').split())} "
+    terms = [example['category'].rsplit(' > ', 1)[-1], *taxonomy.synonyms.get(example['category'], ())]
+    return any(f" {normalize_text(term)} " in text for term in terms)
+
+
+def approx_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for this prompt mix)."""
+    return len(text) // 4
+
+
+def pruned_prompt(taxonomy, text, k, min_score, min_coverage):
+    """Return (prompt, candidate categories or None if it fell back to the full list)."""
+    hits = taxonomy.retriever.candidates(text, k, min_score, min_coverage)
+    if hits:
+        indices = taxonomy.with_neighbours([i for i, _ in hits], k)
+        block = taxonomy.taxonomy_block(indices)
+        candidates = [taxonomy.items[i]['category'] for i in indices]
+        return taxonomy.render_prompt(taxonomy=block, text=text, location=LOCATION), candidates
+    return taxonomy.render_prompt(text=text, location=LOCATION), None
+
+
+async def llm_top1(prompt):
+    from app.services.bedrock import bedrock_client
+    raw = await bedrock_client.invoke_claude(prompt, system=CLASSIFICATION_SYSTEM, use_cache=False)
+    top = extract_json(raw).get('top_3') or [{}]
+    return top[0].get('category')
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--k', default='5,8,12,20')
+    parser.add_argument('--min-score', type=float, default=3.0)
+    parser.add_argument('--min-coverage', type=float, default=0.5)
+    parser.add_argument('--eval-set', choices=sorted(EVAL_SETS), default='heldout')
+    parser.add_argument('--live', action='store_true', help='also measure LLM top-1 accuracy via Bedrock')
+    args = parser.parse_args()
+
+    examples = load_eval_set(args.eval_set)
+    taxonomy = _taxonomy.get()
+    full_tokens = sum(approx_tokens(taxonomy.render_prompt(text=e['text'], location=LOCATION)) for e in examples) / len(examples)
+    n_leaked = sum(leaked(taxonomy, e) for e in examples)
+    print(f"{len(examples)} labelled examples ({args.eval_set}, {n_leaked} contain a gold synonym), "
+          f"{len(taxonomy.items)} L3 categories, min_score={args.min_score}, min_coverage={args.min_coverage}")
+    print(f"full prompt: ~{full_tokens:.0f} tokens\n")
+    print(f"{'K':>4} {'gold kept':>10} {'retr top1':>10} {'fallback':>9} {'~tokens':>8} {'saved':>7}")
+
+    for k in (int(x) for x in args.k.split(',')):
+        kept = top1 = fallbacks = tokens = 0
+        for e in examples:
+            prompt, candidates = pruned_prompt(taxonomy, e['text'], k, args.min_score, args.min_coverage)
+            tokens += approx_tokens(prompt)
+            if candidates is None:
+                fallbacks += 1
+                kept += 1  # the full list always contains the gold category
+                continue
+            kept += e['category'] in candidates
+            top1 += candidates[0] == e['category']
+        n = len(examples)
+        avg_tokens = tokens / n
+        print(f"{k:>4} {kept / n:>10.1%} {top1 / n:>10.1%} {fallbacks / n:>9.1%} {avg_tokens:>8.0f} {1 - avg_tokens / full_tokens:>7.1%}")
+
+    if args.live:
+        k = max(int(x) for x in args.k.split(','))
+        full_hits = pruned_hits = 0
+        for e in examples:
+            full = taxonomy.render_prompt(text=e['text'], location=LOCATION)
+            pruned, _ = pruned_prompt(taxonomy, e['text'], k, args.min_score, args.min_coverage)
+            full_hits += await llm_top1(full) == e['category']
+            pruned_hits += await llm_top1(pruned) == e['category']
+        n = len(examples)
+        print(f"\nLLM top-1 accuracy (K={k}): full {full_hits / n:.1%}, pruned {pruned_hits / n:.1%}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Open-loop load test of /api/match/recommend with and without admission control.
+Bedrock is replaced by a fake with fixed latency and a concurrency quota,
+so the app can serve roughly quota / latency LLM calls per second (each
+recommendation makes three). Requests arrive at --rps whatever the app
+does, with Cache-Control: no-cache so every one reaches the fake. The
+Bedrock limiter's wait queue is made large, so overload shows up as latency
+rather than as fallback answers.
+Reports latency percentiles of the answered requests and how many were shed.
+Usage: python scripts/loadtest_admission.py [--rps 30] [--seconds 10] [--quota 8] [--latency-ms 200]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+import httpx
+
+from app.main import app
+from app.services.admission import gates
+from app.services.bedrock import bedrock_client
+from app.services.limiter import limiters
+
+
+def fake_provider(quota, latency_s):
+    slots = threading.Semaphore(quota)
+
+    def invoke_model(model_id, body):
+        with slots:
+            time.sleep(latency_s)
+        if 'inputText' in body:
+            return {'embedding': [0.1] * 16, 'inputTextTokenCount': 8}
+        return {'content': [{'text': '{"explanation": "Good fit."}'}], 'usage': {'input_tokens': 400, 'output_tokens': 40}}
+
+    return invoke_model
+
+
+def percentile(values, p):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+async def run(rps, seconds, shedding, max_in_flight, target_s):
+    gate = gates['llm']
+    gate.max_in_flight = max_in_flight if shedding else 10 ** 9
+    gate.latency_target_s = target_s if shedding else 0.0
+    gate.latency_s = 0.0
+    latencies, statuses = [], {}
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url='http://load', timeout=None) as client:
+        async def one(i):
+            start = time.perf_counter()
+            response = await client.post(
+                '/api/match/recommend',
+                json={'product_category': 'Cotton Saree', 'product_description': f'handloom cotton saree lot {i}',
+                      'location': 'Varanasi'},
+                headers={'Cache-Control': 'no-cache'},
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - start)
+
+        tasks = []
+        began = time.perf_counter()
+        for i in range(int(rps * seconds)):
+            # Open loop: the next arrival does not wait for earlier responses
+            await asyncio.sleep(max(0.0, began + i / rps - time.perf_counter()))
+            tasks.append(asyncio.create_task(one(i)))
+        await asyncio.gather(*tasks)
+
+    label = 'shedding on ' if shedding else 'shedding off'
+    print(f"{label}: {statuses.get(200, 0)} answered, {statuses.get(503, 0)} shed | latency "
+          f"p50 {percentile(latencies, 50):.2f}s  p95 {percentile(latencies, 95):.2f}s  "
+          f"p99 {percentile(latencies, 99):.2f}s  max {max(latencies, default=float('nan')):.2f}s")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rps', type=float, default=30)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--quota', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=200)
+    parser.add_argument('--max-in-flight', type=int, default=16)
+    parser.add_argument('--target-s', type=float, default=1.0)
+    args = parser.parse_args()
+
+    bedrock_client._available = True
+    bedrock_client._invoke_model = fake_provider(args.quota, args.latency_ms / 1000)
+    bedrock_client.settings.bedrock_queue_size = 10 ** 6
+    for limiter in limiters.values():
+        limiter.max_queue = 10 ** 6
+
+    for shedding in (False, True):
+        await run(args.rps, args.seconds, shedding, args.max_in_flight, args.target_s)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Concurrency test for the AWS clients against a local fake endpoint.
+Starts an HTTP server that answers Bedrock InvokeModel, Translate and
+Comprehend calls after a fixed delay, then fires N parallel calls per client
+and checks they finish in about one call's latency while the event loop
+stays responsive.
+Usage: python scripts/test_aws_concurrency.py [--n 16] [--latency 0.3]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+LATENCY = 0.3
+
+
+class FakeAWSHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        time.sleep(LATENCY)
+        target = self.headers.get('X-Amz-Target', '')
+        if self.path.startswith('/model/'):
+            if 'titan' in self.path:
+                body = {'embedding': [0.1] * 1024, 'inputTextTokenCount': 4}
+            else:
+                body = {'content': [{'type': 'text', 'text': '{"ok": true}'}], 'usage': {'input_tokens': 10, 'output_tokens': 5}}
+        elif target.endswith('TranslateText'):
+            body = {'TranslatedText': 'translated', 'SourceLanguageCode': 'hi', 'TargetLanguageCode': 'en'}
+        elif target.endswith('DetectDominantLanguage'):
+            body = {'Languages': [{'LanguageCode': 'en', 'Score': 0.99}]}
+        else:
+            body = {}
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeAWSServer(ThreadingHTTPServer):
+    # The default listen backlog (5) overflows once the clients hold keep-alive
+    # connections, which would measure the fake server instead of the client
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def start_fake_endpoint():
+    server = FakeAWSServer(('127.0.0.1', 0), FakeAWSHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def max_loop_lag(stop: asyncio.Event) -> float:
+    """Largest delay seen by a 10 ms heartbeat while the calls run."""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    return worst
+
+
+async def timed_parallel(name, make_call, expected, n):
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(max_loop_lag(stop))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(make_call(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lag = await lag_task
+    # Parallel calls should cost about one call, not n of them
+    # and must have reached the fake endpoint rather than a fallback
+    ok = elapsed < LATENCY * 2.5 and lag < LATENCY / 2 and all(r == expected for r in results)
+    print(f"  {name:<16} {n} calls in {elapsed:.2f}s (serial would be {n * LATENCY:.1f}s), max loop lag {lag * 1000:.0f} ms  {'PASS' if ok else 'FAIL'}")
+    return ok
+
+
+async def run(n):
+    from app.services.bedrock import bedrock_client
+    from app.services.aws_nlp import aws_nlp
+
+    checks = [
+        await timed_parallel('invoke_claude', lambda i: bedrock_client.invoke_claude(f'prompt {i}'), '{"ok": true}', n),
+        await timed_parallel('get_embedding', lambda i: bedrock_client.get_embedding(f'text {i}'), [0.1] * 8, n),
+        await timed_parallel('translate', lambda i: aws_nlp.translate(f'text {i}'), 'translated', n),
+        await timed_parallel('detect_language', lambda i: aws_nlp.detect_language(f'text {i}'), 'en', n),
+    ]
+    return all(checks)
+
+
+def main():
+    global LATENCY
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.3)
+    args = parser.parse_args()
+    LATENCY = args.latency
+
+    server = start_fake_endpoint()
+    os.environ['AWS_ENDPOINT_URL'] = f'http://127.0.0.1:{server.server_address[1]}'
+    os.environ.setdefault('AWS_ACCESS_KEY_ID', 'test')
+    os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'test')
+    os.environ['AWS_MAX_ATTEMPTS'] = '1'
+
+    print(f"Fake AWS endpoint at {os.environ['AWS_ENDPOINT_URL']} ({LATENCY * 1000:.0f} ms per call)")
+    ok = asyncio.run(run(args.n))
+    server.shutdown()
+    print('ALL PASSED' if ok else 'FAILURES')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()